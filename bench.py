@@ -0,0 +1,167 @@
+# bench.py
+# 헤드리스 루프백 벤치마크: 합성/녹화 프레임 소스로 VideoServer를 띄우고 VideoClient N개를 붙여서
+# 장면마다 FPS, 프레임당 바이트, 단계별 지연(p50/p95/p99), 프로세스별 CPU를 JSON으로 출력
+#
+#   python bench.py                                  # 합성 4장면 × mjpeg, 1920x1080, 10초
+#   python bench.py --scenes typing,video --codec h264 --clients 3 --out result.json
+#   python bench.py --replay capture.avi             # 녹화 파일(server/capture.py로 생성) 재생
+#   python bench.py --transport udp --loss 0.05      # UDP + FEC, 수신 측에서 5% 손실 흉내
+#
+# server/와 client/에 같은 이름의 모듈(net, utils, codec)이 있어서 서버/클라이언트는 각각 별도
+# 프로세스(이 파일을 --role server|client로 다시 실행)로 돌고, 결과를 stdout 마지막 줄 JSON으로 돌려줌
+import os, sys, json, time, socket, argparse, platform, subprocess, threading
+
+ROOT_DIR = os.path.abspath(os.path.dirname(__file__))
+SCENES = ("static", "typing", "scrolling", "video")
+
+def _use(side: str):
+    # 진입점(main.py)과 같은 import 환경: 프로젝트 루트 + server/ 또는 client/
+    for p in (ROOT_DIR, os.path.join(ROOT_DIR, side)):
+        if p not in sys.path: sys.path.insert(0, p)
+
+def _ms(stats: dict) -> dict:
+    # LatencyStats.report()의 (p50, p95, p99) 튜플 → 이름 붙인 dict
+    return {k: dict(zip(("p50", "p95", "p99"), v)) for k, v in stats.items() if isinstance(v, (tuple, list))}
+
+# ===== 서버 프로세스: stdin이 닫힐 때까지 스트리밍 =====
+def run_server(args) -> dict:
+    _use("server")
+    from PySide6.QtCore import QCoreApplication, QTimer
+    from net import VideoServer
+    from capture import open_source
+    from codec import h264_available
+
+    app = QCoreApplication([])
+    vs = VideoServer("127.0.0.1", args.port, source=open_source(args.source))
+    done = threading.Event()
+    threading.Thread(target=lambda: (sys.stdin.read(), done.set()), daemon=True).start()
+    timer = QTimer(); timer.timeout.connect(lambda: done.is_set() and app.quit()); timer.start(100)
+    cpu0, t0 = time.process_time(), time.monotonic()
+    vs.start(); app.exec()
+    vs.stop(); vs.wait(3000)
+    cpu, wall = time.process_time() - cpu0, time.monotonic() - t0
+    return {"cpu_s": round(cpu, 3), "cpu_pct": round(100.0 * cpu / max(wall, 1e-6), 1), "wall_s": round(wall, 3),
+            "h264": h264_available(), "capture": vs.capture_stats()}
+
+# ===== 클라이언트 프로세스: seconds 동안 받고 통계 =====
+def run_client(args) -> dict:
+    _use("client")
+    from PySide6.QtCore import QCoreApplication, QTimer, Qt
+    from net import VideoClient
+
+    app = QCoreApplication([])
+    vc = VideoClient("127.0.0.1", args.port, args.profile, args.codec, transport=args.transport)
+    st = {"frames": 0, "bytes": 0.0, "lat": {}, "size": None, "udp": vc.udp_stats()}
+    def on_frame(_img, w, h): st["frames"] += 1; st["size"] = (w, h)
+    def on_status(fps, elapsed, connected, mbps, lat):
+        st["bytes"] += mbps * 1_000_000 / 8   # 상태는 지난 보고 이후 받은 양(Mbit)을 보고함
+        if lat: st["lat"] = lat                # 마지막(연결 끊김) 보고는 빈 dict
+        if connected: st["udp"] = vc.udp_stats()
+    vc.sig_frame.connect(on_frame, Qt.DirectConnection)
+    vc.sig_status.connect(on_status, Qt.DirectConnection)
+    QTimer.singleShot(int(args.seconds * 1000), app.quit)
+    cpu0, t0 = time.process_time(), time.monotonic()
+    vc.start(); app.exec()
+    wall = time.monotonic() - t0
+    vc.stop(); vc.wait(3000)
+    cpu = time.process_time() - cpu0
+    lat = st["lat"]
+    return {"frames": st["frames"], "fps": round(st["frames"] / max(wall, 1e-6), 2),
+            "bytes": int(st["bytes"]), "bytes_per_frame": int(st["bytes"] / max(1, st["frames"])),
+            "size": st["size"], "dropped": lat.get("dropped", 0), "latency_ms": _ms(lat), "udp": st["udp"],
+            "cpu_s": round(cpu, 3), "cpu_pct": round(100.0 * cpu / max(wall, 1e-6), 1), "wall_s": round(wall, 3)}
+
+# ===== 조정: 장면마다 서버 1 + 클라이언트 N 프로세스 =====
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+
+def _wait_listen(port: int, proc, timeout: float = 15.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if proc.poll() is not None: raise RuntimeError("서버 프로세스가 시작하지 못했습니다")
+        try:
+            socket.create_connection(("127.0.0.1", port), 0.2).close(); return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("서버 대기 시간 초과")
+
+def _worker(role: str, args, extra: list[str], **kw) -> subprocess.Popen:
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", RD_UDP_LOSS=str(args.loss))
+    cmd = [sys.executable, os.path.abspath(__file__), "--role", role, "--port", str(args.port)] + extra
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, env=env, text=True, **kw)
+
+def _result(proc: subprocess.Popen, timeout: float) -> dict:
+    # stdin을 받는 작업(서버)은 stdin을 닫으면 멈추고 결과를 냄
+    out, _ = proc.communicate("" if proc.stdin else None, timeout=timeout)
+    lines = [l for l in (out or "").splitlines() if l.startswith("{")]
+    if proc.returncode or not lines: raise RuntimeError(f"작업 프로세스 실패 (종료 코드 {proc.returncode})")
+    return json.loads(lines[-1])
+
+def _mean_p50(clients: list[dict], stage: str) -> float | None:
+    v = [c["latency_ms"][stage]["p50"] for c in clients if stage in c["latency_ms"]]
+    return round(sum(v) / len(v), 1) if v else None
+
+def run_scenario(name: str, source: str, args) -> dict:
+    args.port = _free_port()
+    srv = _worker("server", args, ["--source", source], stdin=subprocess.PIPE)
+    try:
+        _wait_listen(args.port, srv)
+        cli = [_worker("client", args, ["--seconds", str(args.seconds), "--codec", args.codec, "--profile", args.profile,
+                                        "--transport", args.transport])
+               for _ in range(args.clients)]
+        clients = [_result(c, args.seconds + 30) for c in cli]
+    except Exception:
+        srv.kill(); raise
+    server = _result(srv, 30)
+    frames = sum(c["frames"] for c in clients)
+    return {"scene": name, "source": source, "codec": args.codec, "profile": args.profile, "transport": args.transport,
+            "summary": {"fps": round(sum(c["fps"] for c in clients) / len(clients), 2),
+                        "bytes_per_frame": int(sum(c["bytes"] for c in clients) / max(1, frames)),
+                        "encode_ms_p50": _mean_p50(clients, "encode"),
+                        "decode_ms_p50": _mean_p50(clients, "decode"),
+                        "e2e_ms_p50": _mean_p50(clients, "e2e"),
+                        "server_cpu_pct": server["cpu_pct"],
+                        "client_cpu_pct": round(sum(c["cpu_pct"] for c in clients) / len(clients), 1)},
+            "server": server, "clients": clients}
+
+def main():
+    ap = argparse.ArgumentParser(description="헤드리스 루프백 영상 스트리밍 벤치마크(JSON 출력)")
+    ap.add_argument("--scenes", default=",".join(SCENES), help="합성 장면 목록(쉼표): " + ", ".join(SCENES))
+    ap.add_argument("--replay", action="append", default=[], help="녹화 파일 재생 장면 추가(여러 번 가능)")
+    ap.add_argument("--size", default="1920x1080", help="합성 화면 크기 WxH")
+    ap.add_argument("--seconds", type=float, default=10.0, help="장면당 측정 시간(초)")
+    ap.add_argument("--clients", type=int, default=1, help="동시 접속 클라이언트 수")
+    ap.add_argument("--codec", default="mjpeg", choices=("mjpeg", "h264"))
+    ap.add_argument("--profile", default="lan")
+    ap.add_argument("--transport", default="tcp", choices=("tcp", "udp"), help="영상 전송 경로(udp는 FEC + TCP 대체)")
+    ap.add_argument("--loss", type=float, default=0.0, help="UDP 수신 손실 흉내 비율(0~1, 클라이언트에서 버림)")
+    ap.add_argument("--out", help="결과 JSON 파일(없으면 stdout)")
+    ap.add_argument("--role", choices=("server", "client"), help=argparse.SUPPRESS)
+    ap.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    ap.add_argument("--source", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.role:   # 작업 프로세스
+        res = run_server(args) if args.role == "server" else run_client(args)
+        print(json.dumps(res), flush=True); return
+
+    jobs = [(s, f"synthetic:{s}:{args.size}") for s in args.scenes.split(",") if s]
+    jobs += [(os.path.basename(p), f"replay:{os.path.abspath(p)}") for p in args.replay]
+    results = []
+    for name, source in jobs:
+        print(f"[bench] {name} ({source}) {args.seconds:g}s × {args.clients}", file=sys.stderr, flush=True)
+        results.append(run_scenario(name, source, args))
+    report = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+              "platform": platform.platform(), "cpus": os.cpu_count(),
+              "config": {"seconds": args.seconds, "clients": args.clients, "codec": args.codec,
+                         "profile": args.profile, "size": args.size, "transport": args.transport, "loss": args.loss},
+              "scenarios": results}
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f: f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
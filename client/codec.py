@@ -0,0 +1,113 @@
+# client/codec.py
+import zlib
+import numpy as np, cv2
+
+try:
+    import av   # 선택: H.264 모드 디코딩
+except ImportError:
+    av = None
+
+from common import (PKT_FRAME, PKT_TILES, PKT_BANDS, PKT_H264, PKT_REGIONS, TILE_HDR, BAND_HDR, BANDS_HDR, REGION_HDR, PALETTE_HDR,
+                    TILE_JPEG, TILE_PALETTE)
+
+# ----- 타일 코덱: JPEG 또는 팔레트+zlib(무손실) -----
+def decode_palette(blob, tw: int, th: int) -> np.ndarray | None:
+    n = PALETTE_HDR.unpack_from(blob, 0)[0]; off = PALETTE_HDR.size + n * 3
+    pal = np.frombuffer(blob[PALETTE_HDR.size:off], dtype=np.uint8).reshape(n, 3)
+    try: idx = np.frombuffer(zlib.decompress(blob[off:]), dtype=np.uint8)
+    except zlib.error: return None
+    if idx.size != tw * th or (n and int(idx.max()) >= n): return None
+    return pal[idx].reshape(th, tw, 3)
+
+def decode_tile(codec: int, blob, tw: int, th: int) -> np.ndarray | None:
+    if codec == TILE_PALETTE: return decode_palette(blob, tw, th)
+    if codec == TILE_JPEG: return cv2.imdecode(np.frombuffer(blob, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return None
+
+# ----- 타일 델타 적용 -----
+def apply_tiles(fb: np.ndarray, payload: bytes) -> bool:
+    # payload = [TILE_HDR + blob] * n → fb에 제자리 덮어쓰기
+    mv = memoryview(payload); off = 0; fh, fw = fb.shape[:2]
+    while off + TILE_HDR.size <= len(mv):
+        x, y, tw, th, codec, blen = TILE_HDR.unpack_from(mv, off); off += TILE_HDR.size
+        tile = decode_tile(codec, mv[off:off+blen], tw, th); off += blen
+        if tile is None or x + tw > fw or y + th > fh or tile.shape[:2] != (th, tw): return False
+        fb[y:y+th, x:x+tw] = tile
+    return off == len(mv)
+
+# ----- 가로 띠(band) 프레임: 띠마다 병렬 디코딩 → 미리 잡아 둔 한 장에 바로 채움 -----
+def decode_bands(payload: bytes, pool, fb: np.ndarray | None = None) -> np.ndarray | None:
+    mv = memoryview(payload)
+    iw, ih = BANDS_HDR.unpack_from(mv, 0); off = BANDS_HDR.size
+    bands = []
+    while off + BAND_HDR.size <= len(mv):
+        y, bh, blen = BAND_HDR.unpack_from(mv, off); off += BAND_HDR.size
+        bands.append((y, bh, mv[off:off+blen])); off += blen
+    if off != len(mv) or not bands: return None
+    if fb is None or fb.shape != (ih, iw, 3): fb = np.empty((ih, iw, 3), dtype=np.uint8)
+    def dec(band):
+        y, bh, blob = band
+        img = cv2.imdecode(np.frombuffer(blob, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None or y + bh > ih or img.shape != (bh, iw, 3): return False
+        fb[y:y+bh] = img
+        return True
+    return fb if all(pool.map(dec, bands)) else None
+
+# ----- 영역별 코덱 프레임: 바탕(JPEG 1장 또는 띠) 디코딩 후 무손실 타일 덮어쓰기 -----
+def decode_regions(payload: bytes, pool, fb: np.ndarray | None = None) -> np.ndarray | None:
+    mv = memoryview(payload)
+    btype, blen = REGION_HDR.unpack_from(mv, 0); off = REGION_HDR.size
+    base = mv[off:off+blen]
+    if btype == PKT_BANDS: fb = decode_bands(base, pool, fb)
+    else: fb = cv2.imdecode(np.frombuffer(base, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if fb is None or not apply_tiles(fb, mv[off+blen:]): return None
+    return fb
+
+# ----- H.264: 패킷(접근 단위) 하나씩 바로 디코딩 -----
+def h264_available() -> bool:
+    return av is not None
+
+class H264Decoder:
+    def __init__(self):
+        self.ctx = av.CodecContext.create("h264", "r")
+
+    def decode(self, data: bytes) -> np.ndarray | None:
+        # 키프레임 전이거나 깨진 패킷이면 None
+        img = None
+        try:
+            for fr in self.ctx.decode(av.Packet(data)):
+                img = fr.to_ndarray(format="bgr24")
+        except Exception:
+            return None
+        return img
+
+# ----- 화면 패킷 → 현재 화면: 실시간 수신과 녹화 재생이 같이 씀 -----
+class FrameDecoder:
+    # 타일 델타/H.264처럼 앞 화면이 필요한 패킷을 위해 프레임버퍼와 H.264 디코더 상태를 가짐
+    def __init__(self, pool):
+        self.pool = pool
+        self.fb = None     # 타일을 덮어쓸 로컬 프레임버퍼(BGR)
+        self.h264 = None   # H.264 디코더(참조 프레임 상태를 가짐)
+
+    def decode(self, ptype: int, blob) -> np.ndarray | None:
+        # None → 이 패킷으로는 화면을 못 만듦(기준 화면 없음/깨짐). 화면 패킷이 아니어도 None
+        img = None
+        if ptype == PKT_FRAME:
+            img = cv2.imdecode(np.frombuffer(blob, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is not None: self.fb = img
+        elif ptype == PKT_BANDS:
+            img = self.fb = decode_bands(blob, self.pool, self.fb)
+        elif ptype == PKT_REGIONS:
+            img = self.fb = decode_regions(blob, self.pool, self.fb)
+        elif ptype == PKT_TILES and self.fb is not None:
+            # 전체 프레임 이후 변경분만 도착 → 제자리 패치
+            if apply_tiles(self.fb, blob): img = self.fb
+        elif ptype == PKT_H264 and h264_available():
+            if self.h264 is None: self.h264 = H264Decoder()
+            img = self.h264.decode(blob)
+            if img is None: self.h264 = None   # 참조가 깨짐 → 새 디코더로 다음 IDR부터
+        return img
+
+    def reset(self):
+        # 기준 화면을 버림 → 다음 전체 프레임/IDR부터 다시
+        self.fb = None; self.h264 = None
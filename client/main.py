@@ -8,7 +8,8 @@ if ROOT_DIR not in sys.path:
     sys.path.insert(0, ROOT_DIR)
 
 from PySide6.QtWidgets import QApplication, QDialog
-from ui import ConnectDialog, ClientWindow
+from ui import ConnectDialog, ClientWindow, PlaybackWindow
+from common import RECORD_EXT
 
 def main():
     app = QApplication(sys.argv)
@@ -20,13 +21,21 @@ def main():
     except Exception:
         pass
 
+    # 인자가 녹화 파일이면 접속 없이 바로 재생
+    if len(sys.argv) > 1 and sys.argv[1].endswith(RECORD_EXT):
+        w = PlaybackWindow(sys.argv[1]); w.show()
+        sys.exit(app.exec())
+
     default_ip = sys.argv[1] if len(sys.argv) > 1 else None
     dlg = ConnectDialog(default_ip=default_ip)
     if dlg.exec() != QDialog.Accepted:
         sys.exit(0)
+    if dlg.play_path:
+        w = PlaybackWindow(dlg.play_path); w.show()
+        sys.exit(app.exec())
 
     server_ip = dlg.ed_ip.text().strip()
-    w = ClientWindow(server_ip)
+    w = ClientWindow(server_ip, dlg.cb_profile.currentData(), "h264" if dlg.cb_h264.isChecked() else "mjpeg", mux=dlg.mux)
     w.show()
     sys.exit(app.exec())
 
@@ -0,0 +1,192 @@
+# client/mux.py
+# 다중화 연결(클라이언트 쪽): 서버 MUX_PORT에 TCP 하나만 열고, 영상/제어/파일 연결은 그 위의 스트림으로
+# open()이 돌려주는 소켓은 보통 TCP 소켓처럼 쓰면 됨(내부 소켓 쌍의 한쪽) → VideoClient/ControlClient/FileClient는 그대로
+import socket, select, threading
+
+from utils import recv_exact
+from common import (MUX_PORT, MUX_MAGIC, MUX_HDR, MUX_OPEN, MUX_DATA, MUX_CLOSE, MUX_CREDIT, MUX_CREDIT_LEN, MUX_PRIORITY,
+                    MUX_CHUNK, MUX_PAIR_BUF, MUX_WINDOW, MUX_MAX_STREAMS)
+
+def stream_pair() -> tuple[socket.socket, socket.socket]:
+    a, b = socket.socketpair()
+    for s in (a, b):
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, MUX_PAIR_BUF)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, MUX_PAIR_BUF)
+    return a, b
+
+def credit_frame(sid: int, n: int) -> bytes:
+    return MUX_HDR.pack(sid, MUX_CREDIT, MUX_CREDIT_LEN.size) + MUX_CREDIT_LEN.pack(n)
+
+class _Stream:
+    __slots__ = ("sock", "prio", "closing", "out", "window", "owed")
+    def __init__(self, sock: socket.socket, prio: int):
+        self.sock = sock; self.prio = prio
+        self.closing = False      # 서버가 CLOSE → 남은 데이터를 다 쓰면 앱 쪽에 EOF, 앱이 소켓을 닫기를 기다림
+        self.out = bytearray()    # 서버에게 받았지만 아직 앱 쪽에 못 쓴 데이터(송신 스레드가 쓸 수 있을 때 씀)
+        self.window = MUX_WINDOW  # 서버에 더 보내도 되는 양(서버의 CREDIT으로 늘어남)
+        self.owed = 0             # 앱 쪽에 넘겼지만 아직 CREDIT으로 돌려주지 않은 양
+
+# ===== 다중화 연결: 수신 스레드(프레임 → 스트림 버퍼) + 송신 스레드(준비된 스트림을 우선순위 순으로, 밀린 버퍼 쓰기) =====
+class MuxConnection:
+    def __init__(self, host: str, port: int = MUX_PORT):
+        self.host = host; self.port = port
+        self._lock = threading.Lock()        # 스트림 표/연결 교체
+        self._send_lock = threading.Lock()   # TCP 쓰기(송신 스레드, OPEN, CLOSE)
+        self._sock = None
+        self._streams: dict[int, _Stream] = {}
+        self._next = 1
+        self._wake = None                    # 새 스트림이 생기면 송신 스레드의 select를 깨움
+
+    def probe(self, timeout: float = 2.0) -> bool:
+        try:
+            with self._lock: self._ensure(timeout)
+            return True
+        except OSError:
+            return False
+
+    def open(self, channel: int, timeout: float = 5.0) -> socket.socket:
+        # 채널 스트림 하나 열기. 연결이 끊겼으면 다시 연결. 실패 → OSError
+        with self._lock:
+            self._ensure(timeout)
+            if len(self._streams) >= MUX_MAX_STREAMS: raise OSError("스트림이 너무 많습니다")
+            while self._next in self._streams or not self._next: self._next = (self._next + 1) & 0xFFFF
+            sid = self._next; self._next = (sid + 1) & 0xFFFF
+            a, b = stream_pair(); a.setblocking(False)   # 이쪽 끝은 두 스레드가 막히지 않게 씀(앱 쪽 b는 보통 소켓)
+            self._streams[sid] = _Stream(a, MUX_PRIORITY.get(channel, len(MUX_PRIORITY)))
+            conn = self._sock
+        self._send(conn, MUX_HDR.pack(sid, MUX_OPEN, 1) + bytes([channel]))
+        self._poke()
+        return b
+
+    def close(self):
+        with self._lock: conn = self._sock
+        if conn is not None: self._teardown(conn)
+
+    def _ensure(self, timeout: float):
+        if self._sock is not None: return
+        s = socket.create_connection((self.host, self.port), timeout)
+        try:
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            s.settimeout(None); s.sendall(MUX_MAGIC)
+        except OSError:
+            s.close(); raise
+        self._sock = s; self._wake = socket.socketpair()
+        threading.Thread(target=self._rx_loop, args=(s,), daemon=True).start()
+        threading.Thread(target=self._tx_loop, args=(s, self._wake[0]), daemon=True).start()
+
+    def _send(self, conn: socket.socket, data: bytes):
+        try:
+            with self._send_lock: conn.sendall(data)
+        except OSError:
+            self._teardown(conn)
+
+    def _poke(self):
+        try: self._wake[1].send(b"\0")
+        except (OSError, TypeError): pass
+
+    def _teardown(self, conn: socket.socket):
+        # 연결이 끊김 → 모든 스트림에 EOF(앱은 평소 연결이 끊긴 것처럼 처리). 다음 open()이 다시 연결
+        with self._lock:
+            if self._sock is not conn: return
+            streams = list(self._streams.values()); self._streams.clear()
+            self._sock = None; wake = self._wake; self._wake = None
+        for s in [conn, *(st.sock for st in streams)]:
+            try: s.shutdown(socket.SHUT_RDWR)
+            except OSError: pass
+            try: s.close()
+            except OSError: pass
+        try: wake[1].send(b"\0")   # 송신 스레드가 깨어나서 끝남(wake[0]은 송신 스레드가 닫음)
+        except OSError: pass
+        wake[1].close()
+
+    def _drop(self, conn: socket.socket, sid: int, notify: bool):
+        with self._lock:
+            if self._sock is not conn: return
+            st = self._streams.pop(sid, None)
+        if st is None: return
+        try: st.sock.close()
+        except OSError: pass
+        if notify and not st.closing: self._send(conn, MUX_HDR.pack(sid, MUX_CLOSE, 0))
+
+    def _flush(self, conn: socket.socket, sid: int, st: _Stream):
+        # 스트림 버퍼 → 앱 쪽 소켓(막히지 않게). 남으면 송신 스레드가 쓸 수 있을 때 다시 부름
+        with self._lock:
+            if self._streams.get(sid) is not st: return
+            err = False
+            try:
+                while st.out:
+                    n = st.sock.send(st.out)
+                    del st.out[:n]; st.owed += n
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError:
+                err = True
+            credit = 0
+            if st.owed >= MUX_WINDOW // 4:   # 모아서 돌려줌(작은 메시지마다 CREDIT을 보내지 않음)
+                credit = st.owed; st.owed = 0
+            pending = bool(st.out); shut = not err and not pending and st.closing
+        if err: self._drop(conn, sid, True); return
+        if credit: self._send(conn, credit_frame(sid, credit))
+        if pending: self._poke()   # 송신 스레드의 select에 쓰기 대기로
+        if shut:
+            try: st.sock.shutdown(socket.SHUT_WR)
+            except OSError: self._drop(conn, sid, False)
+
+    def _rx_loop(self, conn: socket.socket):
+        # 앱이 안 읽는 스트림이 있어도 여기서는 기다리지 않음(버퍼에 두고 창이 차면 서버가 그 스트림만 멈춤)
+        try:
+            while True:
+                hdr = recv_exact(conn, MUX_HDR.size)
+                if not hdr: break
+                sid, op, n = MUX_HDR.unpack(hdr)
+                body = recv_exact(conn, n) if n else b""
+                if body is None: break
+                with self._lock: st = self._streams.get(sid)
+                if st is None: continue
+                if op == MUX_DATA:
+                    with self._lock:
+                        if st.closing: continue
+                        if len(st.out) + st.owed + n > MUX_WINDOW: break   # 창을 넘김 → 형식 오류
+                        st.out += body
+                    self._flush(conn, sid, st)
+                elif op == MUX_CLOSE:
+                    with self._lock: st.closing = True
+                    self._flush(conn, sid, st)   # 남은 데이터를 다 쓴 뒤에 EOF
+                elif op == MUX_CREDIT and n == MUX_CREDIT_LEN.size:
+                    with self._lock:
+                        paused = st.window <= 0; st.window += MUX_CREDIT_LEN.unpack(body)[0]
+                    if paused: self._poke()   # 송신 스레드가 이 스트림을 다시 읽음
+        except OSError:
+            pass
+        self._teardown(conn)
+
+    def _tx_loop(self, conn: socket.socket, wake: socket.socket):
+        try:
+            while True:
+                with self._lock:
+                    if self._sock is not conn: return
+                    streams = dict(self._streams)
+                    rs = [st.sock for st in streams.values() if st.closing or st.window > 0]   # 창이 0 → CREDIT까지 안 읽음
+                    ws = [st.sock for st in streams.values() if st.out]
+                try: r, w, _ = select.select([wake] + rs, ws, [])
+                except (OSError, ValueError): continue   # 그사이 수신 스레드가 닫은 스트림 → 표를 다시 읽음
+                if wake in r: wake.recv(4096)
+                for sid, st in streams.items():
+                    if st.sock in w: self._flush(conn, sid, st)
+                ready = sorted((st.prio, sid) for sid, st in streams.items() if st.sock in r)
+                if not ready: continue
+                # 우선순위가 가장 높은 스트림에서 한 조각 → 다시 select(그사이 제어 메시지가 오면 먼저 나감)
+                sid = ready[0][1]; st = streams[sid]
+                with self._lock: n = MUX_CHUNK if st.closing else min(MUX_CHUNK, st.window)
+                if n <= 0: continue
+                try: data = st.sock.recv(n)
+                except (BlockingIOError, InterruptedError): continue
+                except OSError: data = b""
+                if not data: self._drop(conn, sid, True); continue   # 앱이 소켓을 닫음
+                if st.closing: continue
+                with self._lock: st.window -= len(data)
+                self._send(conn, MUX_HDR.pack(sid, MUX_DATA, len(data)) + data)
+        except OSError:
+            pass   # 끊는 중에 닫힌 소켓
+        finally:
+            wake.close()
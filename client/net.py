@@ -1,89 +1,316 @@
 # client/net.py
-import os, json, time, struct, socket, tempfile, zipfile
+import os, json, time, struct, socket, select, tempfile, zipfile, zlib, threading, collections
+from concurrent.futures import ThreadPoolExecutor
 from PySide6.QtCore import QThread, Signal
 from PySide6.QtGui import QImage
-import numpy as np, cv2
 
-from utils import recv_exact, send_json, np_bgr_to_qimage
+from utils import recv_exact, send_json, np_bgr_to_qimage, LatencyStats
+from codec import h264_available, FrameDecoder
+from udp import UdpReceiver
 
-# ---------- 포트 상수 ----------
-from common import VIDEO_PORT, CONTROL_PORT, FILE_PORT
+# ---------- 포트/패킷 상수 ----------
+from common import (VIDEO_PORT, CONTROL_PORT, FILE_PORT, MUX_VIDEO, MUX_CONTROL, MUX_FILE, PKT_INFO, PKT_CURSOR, PKT_CURSOR_SHAPE, VIDEO_HDR,
+                    CURSOR_HDR, CURSOR_SHAPE_HDR, FRAME_META, FRAME_PKTS, VIDEO_VERSION,
+                    STREAM_PROFILES, DEFAULT_PROFILE, CODEC_THREADS, DEFAULT_CODEC, DEFAULT_MONITOR,
+                    VIDEO_TRANSPORT, UDP_PROBE_SEC, UDP_FALLBACK_LOSS,
+                    CONTROL_VERSION, CTRL_BIN_FLAG, CTRL_EVENT, CTRL_BUTTONS,
+                    CONTROL_QUEUE_MAX, CONTROL_RETRY_MIN, CONTROL_RETRY_MAX,
+                    EV_MOVE, EV_DOWN, EV_UP, EV_WHEEL, EV_KEY_DOWN, EV_KEY_UP)
 
 
 # ----- 영상 수신 -----
 class VideoClient(QThread):
-    sig_status = Signal(float, int, bool, float)  # fps, elapsed, connected, mbps
+    sig_status = Signal(float, int, bool, float, dict)  # fps, elapsed, connected, mbps, 지연 통계(LatencyStats.report)
     sig_frame  = Signal(QImage, int, int)
-    def __init__(self, host: str, port: int = VIDEO_PORT):
+    sig_monitors = Signal(list, int)  # 서버 모니터 목록[{i,x,y,w,h}], 현재 구독 모니터
+    sig_cursor = Signal(int, int, bool)            # 원격 커서 위치(구독 모니터 기준 실제 px), 보임 여부
+    sig_cursor_shape = Signal(QImage, int, int)    # 커서 모양(ARGB, 빈 이미지면 기본 화살표), 핫스팟
+    def __init__(self, host: str, port: int = VIDEO_PORT, profile: str = DEFAULT_PROFILE, codec: str = DEFAULT_CODEC,
+                 monitor: int = DEFAULT_MONITOR, transport: str = VIDEO_TRANSPORT, mux=None):
         super().__init__(); self.host=host; self.port=port
+        self.mux=mux     # MuxConnection이면 포트별 연결 대신 그 위의 영상 스트림
+        self.monitor=monitor
+        self.profile=profile if profile in STREAM_PROFILES else DEFAULT_PROFILE
+        self.codec=codec if codec=="mjpeg" or (codec=="h264" and h264_available()) else DEFAULT_CODEC
+        self.viewport=None   # 화면 표시 영역(w,h, 물리 픽셀) → 서버가 이 크기에 맞춰 축소 인코딩
         self._stop=False; self._sock=None
+        self._send_lock=threading.Lock()   # 영상 소켓 쓰기: 네트워크 스레드(ack/ping)와 UI 스레드(프로필 등)가 같이 씀
         self._connected=False; self._conn_ts=None
         self._cnt=0; self._last=time.time(); self._bytes=0
+        self._rx_n=0    # 받은 영상 패킷 수 → ack로 서버에 알림(서버 ABR이 지연/처리량 계산)
+        self._pool=None # 띠(band) 병렬 디코딩
+        self._dec=None  # 화면 패킷 디코더(프레임버퍼/H.264 참조 상태)
+        self._key_ts=0.0 # 마지막 전체 프레임 요청 시각(IDR 도착 전 연속 요청 방지)
+        self._ver=1      # 서버가 v2를 확인해 주면 화면 패킷 헤더 뒤에 FRAME_META가 옴
+        self._lat=LatencyStats(); self._ping_ts=0.0
+        self.transport="tcp"   # 지금 화면 패킷이 오는 경로. "udp"는 서버가 확인해 준 뒤부터
+        self._udp=UdpReceiver() if transport=="udp" else None   # 협상이 실패하면 닫고 TCP로 계속
+        self._udp_probe=None   # (서버 UDP 주소, 토큰, 마감 시각): 확인될 때까지 프로브를 보냄
+        self._fseq=0           # 마지막으로 처리한 화면 패킷 순번(TCP/UDP 사이에 늦게 온 프레임 버림)
+        self._udp_done=(0,0)   # 닫은 UDP 수신기의 (복구, 유실) 누계
     def run(self):
         try:
-            self._sock=socket.socket(socket.AF_INET,socket.SOCK_STREAM)
-            self._sock.settimeout(5.0); self._sock.connect((self.host,self.port))
+            if self.mux: self._sock=self.mux.open(MUX_VIDEO)
+            else:
+                self._sock=socket.socket(socket.AF_INET,socket.SOCK_STREAM)
+                self._sock.settimeout(5.0); self._sock.connect((self.host,self.port))
             self._sock.settimeout(None); self._connected=True; self._conn_ts=time.time()
+            hello={"t":"hello","v":VIDEO_VERSION,"profile":self.profile,"codec":self.codec,"monitor":self.monitor}
+            if self.viewport: hello["w"],hello["h"]=self.viewport
+            if self._udp: hello["udp"]=True
+            self._send(hello)
         except Exception:
-            self.sig_status.emit(0.0,0,False,0.0); return
+            self.sig_status.emit(0.0,0,False,0.0,{}); return
+        self._pool=ThreadPoolExecutor(CODEC_THREADS, thread_name_prefix="video-decode")
+        self._dec=FrameDecoder(self._pool)
         try:
             while not self._stop:
-                hdr=recv_exact(self._sock,12)
+                # 정적 화면이면 패킷이 안 올 수 있음 → 대기 중에도 상태(경과 시간) 갱신
+                rl=[self._sock]+([self._udp.sock] if self._udp else [])
+                ready=select.select(rl,[],[],0.2 if self._udp_probe else 0.5)[0]
+                if self._udp and self._udp.sock in ready:
+                    for seq,data in self._udp.read(): self._on_udp_frame(seq,data)
+                    self._check_udp()
+                if self._sock not in ready:
+                    self._tick_status(); continue
+                hdr=recv_exact(self._sock,VIDEO_HDR.size)
                 if not hdr: break
-                data_len,w,h=struct.unpack(">III",hdr)
+                ptype,data_len,w,h=VIDEO_HDR.unpack(hdr)
+                meta=None
+                if self._ver>=2 and ptype in FRAME_PKTS:
+                    meta=recv_exact(self._sock,FRAME_META.size)
+                    if not meta: break
                 blob=recv_exact(self._sock,data_len)
                 if not blob: break
-                self._bytes += 12+len(blob)
-                arr=np.frombuffer(blob,dtype=np.uint8)
-                img=cv2.imdecode(arr,cv2.IMREAD_COLOR)
-                if img is not None:
-                    self.sig_frame.emit(np_bgr_to_qimage(img),w,h)
-                    self._cnt+=1
-                now=time.time()
-                if now-self._last>=1.0:
-                    fps=float(self._cnt); self._cnt=0
-                    elapsed=int(now-(self._conn_ts or now))
-                    mbps=(self._bytes*8.0)/1_000_000.0; self._bytes=0; self._last=now
-                    self.sig_status.emit(fps,elapsed,self._connected,mbps)
+                self._bytes += VIDEO_HDR.size+len(blob)+(len(meta) if meta else 0)
+                if ptype in (PKT_CURSOR,PKT_CURSOR_SHAPE):
+                    # 커서 채널: 프레임과 별도로 바로 반영, ack 없음
+                    self._on_cursor(ptype,blob); self._tick_status(); continue
+                if ptype==PKT_INFO: self._on_info(blob)
+                else: self._on_packet(ptype,w,h,meta,blob,time.time())
+                self._rx_n+=1
+                self._send({"t":"ack","n":self._rx_n})
+                self._tick_status()
         finally:
             try:
                 if self._sock: self._sock.close()
             except Exception: pass
-            self._connected=False; self.sig_status.emit(0.0,0,False,0.0)
+            if self._udp: self._udp.close(); self._udp=None
+            self._pool.shutdown(wait=False)
+            self._connected=False; self.sig_status.emit(0.0,0,False,0.0,{})
+    def _send(self, obj: dict):
+        # 길이+JSON 한 건을 통째로(다른 스레드의 쓰기와 바이트가 섞이지 않게)
+        with self._send_lock: send_json(self._sock, obj)
+    def _on_info(self, blob: bytes):
+        try: info=json.loads(blob.decode("utf-8","ignore"))
+        except ValueError: info={}
+        if info.get("t")=="monitors":
+            self.monitor=int(info.get("cur",self.monitor)); self.sig_monitors.emit(info.get("list",[]),self.monitor)
+        elif info.get("t")=="hello":
+            self._ver=int(info.get("v",1))
+        elif info.get("t")=="pong":
+            try: self._lat.on_pong(float(info["c"]),float(info["s"]),time.time())
+            except (KeyError,TypeError,ValueError): pass
+        elif info.get("t")=="udp" and self._udp:
+            if "token" in info:   # 서버 UDP 주소로 토큰 프로브 → 서버가 확인("on")하면 화면 패킷이 UDP로
+                try: self._udp_probe=((self.host,int(info["port"])),int(info["token"]),time.time()+UDP_PROBE_SEC)
+                except (KeyError,TypeError,ValueError): return
+                self._udp.probe(*self._udp_probe[:2])
+            elif info.get("on"):
+                self._udp_probe=None; self.transport="udp"; self._udp.last=self._fseq
+            else:   # 서버가 TCP로 되돌림(ack 끊김 등)
+                self._drop_udp()
+    def _on_packet(self, ptype: int, w: int, h: int, meta, blob, recv_ts: float) -> bool:
+        # 화면 패킷 1개 처리. False → 이미 더 새 프레임을 처리해서 버림
+        seq=FRAME_META.unpack(meta)[0] if meta else None
+        if seq is not None:
+            if seq<=self._fseq: return False
+            if seq>self._fseq+1 and self.transport=="udp": self._dec.reset()   # 건너뛴 프레임이 있으면 기준 화면도 없음
+            self._fseq=seq
+        img=self._dec.decode(ptype,blob)
+        if img is None and ptype in FRAME_PKTS:
+            # 기준 화면이 깨졌으면 다음 델타도 소용없음 → 서버에 전체 프레임 요청
+            self._dec.fb=None
+            if time.time()-self._key_ts>=1.0:
+                self._key_ts=time.time(); self._send({"t":"key"})
+        if img is not None:
+            self.sig_frame.emit(np_bgr_to_qimage(img),w,h)
+            self._cnt+=1
+        if meta and img is not None:   # 못 그린 프레임은 순번 빈칸 → 손실로 셈
+            seq,cap,enc,snd=FRAME_META.unpack(meta)
+            self._lat.on_frame(seq,cap/1e6,enc/1e6,snd/1e6,recv_ts,time.time())
+        return True
+    def _on_udp_frame(self, seq: int, data: bytes):
+        # UDP로 완성된 프레임(VIDEO_HDR + FRAME_META + payload). ack는 프레임 순번으로(TCP 패킷 수와 따로)
+        if self.transport!="udp" or len(data)<VIDEO_HDR.size+FRAME_META.size: return
+        ptype,data_len,w,h=VIDEO_HDR.unpack_from(data)
+        mv=memoryview(data); off=VIDEO_HDR.size+FRAME_META.size
+        self._bytes+=len(data)
+        if self._on_packet(ptype,w,h,mv[VIDEO_HDR.size:off],mv[off:off+data_len],time.time()):
+            self._send({"t":"ack","s":seq})
+    def _check_udp(self):
+        # 복구 못 한 프레임이 너무 많으면 TCP로(서버가 전체 프레임부터 다시 보냄)
+        if self.transport=="udp" and self._udp.loss_ratio()>=UDP_FALLBACK_LOSS:
+            self._send({"t":"udp","on":False}); self._drop_udp()
+    def _drop_udp(self):
+        if self._udp:
+            self._udp.close(); self._udp_done=(self._udp_done[0]+self._udp.recovered,self._udp_done[1]+self._udp.lost)
+        self._udp=None; self._udp_probe=None; self.transport="tcp"
+    def udp_stats(self) -> dict:
+        u=self._udp; rec,lost=self._udp_done
+        return {"transport":self.transport,"recovered":rec+(u.recovered if u else 0),"lost":lost+(u.lost if u else 0)}
+    def _on_cursor(self, ptype: int, blob: bytes):
+        if ptype==PKT_CURSOR and len(blob)>=CURSOR_HDR.size:
+            x,y,vis=CURSOR_HDR.unpack_from(blob); self.sig_cursor.emit(x,y,bool(vis)); return
+        if ptype!=PKT_CURSOR_SHAPE or len(blob)<CURSOR_SHAPE_HDR.size: return
+        w,h,hx,hy=CURSOR_SHAPE_HDR.unpack_from(blob)
+        qimg=QImage()
+        if w and h:
+            try: raw=zlib.decompress(blob[CURSOR_SHAPE_HDR.size:])
+            except zlib.error: raw=b""
+            if len(raw)==w*h*4: qimg=QImage(raw,w,h,w*4,QImage.Format_ARGB32).copy()   # 메모리 순서 BGRA
+        self.sig_cursor_shape.emit(qimg,hx,hy)
+    def _tick_status(self):
+        now=time.time()
+        if self._udp_probe:
+            if now>=self._udp_probe[2]: self._drop_udp()   # UDP가 막힌 경로 → TCP로 계속
+            else: self._udp.probe(*self._udp_probe[:2])
+        if self._ver>=2 and now-self._ping_ts>=2.0:
+            # 시계 차이 추정용 ping(2초마다). 응답은 PKT_INFO pong
+            self._ping_ts=now
+            try: self._send({"t":"ping","c":now})
+            except OSError: pass
+        if now-self._last>=1.0:
+            fps=float(self._cnt); self._cnt=0
+            elapsed=int(now-(self._conn_ts or now))
+            mbps=(self._bytes*8.0)/1_000_000.0; self._bytes=0; self._last=now
+            self.sig_status.emit(fps,elapsed,self._connected,mbps,self._lat.report())
+    def set_profile(self, profile: str):
+        # 접속 중 프로필 변경: 서버가 새 프로필의 전체 프레임부터 다시 보냄
+        if profile not in STREAM_PROFILES: return
+        self.profile=profile
+        try:
+            if self._connected and self._sock: self._send({"t":"hello","profile":profile})
+        except Exception: pass
+    def set_monitor(self, monitor: int):
+        # 구독 모니터 변경: 서버가 그 모니터의 전체 프레임부터 다시 보냄(PKT_INFO로 확인)
+        self.monitor=monitor
+        try:
+            if self._connected and self._sock: self._send({"t":"hello","profile":self.profile,"monitor":monitor})
+        except Exception: pass
+    def set_viewport(self, w: int, h: int):
+        # 프레임 헤더의 w,h는 계속 원격 실제 해상도 → 좌표 변환에는 영향 없음
+        if self.viewport==(w,h): return
+        self.viewport=(w,h)
+        try:
+            if self._connected and self._sock: self._send({"t":"viewport","w":w,"h":h})
+        except Exception: pass
     def stop(self): self._stop=True
 
 # ----- 제어 송신 -----
+def event_json(ev: tuple) -> dict:
+    # 이진 입력 이벤트 (종류, 인자, a, b) → 예전 JSON 메시지(이진 형식을 모르는 서버용)
+    kind,arg,a,b=ev
+    if kind==EV_MOVE: return {"t":"mouse_move","x":a,"y":b}
+    if kind in (EV_DOWN,EV_UP): return {"t":"mouse_down" if kind==EV_DOWN else "mouse_up","btn":CTRL_BUTTONS[min(arg,2)]}
+    if kind==EV_WHEEL: return {"t":"mouse_wheel","delta":a}
+    return {"t":"key","vk":arg,"down":kind==EV_KEY_DOWN}
+
 class ControlClient:
-    def __init__(self, host:str, port:int=CONTROL_PORT):
-        self.host=host; self.port=port; self.sock=None; self.connect()
-    def connect(self):
-        try:
-            if self.sock: self.sock.close()
-        except: pass
+    # UI 스레드는 대기열에 넣기만 하고, 연결/재연결/전송은 송신 스레드가 → 네트워크가 멈춰도 뷰어는 안 멈춤
+    def __init__(self, host:str, port:int=CONTROL_PORT, mux=None):
+        self.host=host; self.port=port; self.mux=mux; self.sock=None
+        self.binary=False   # 서버가 hello에 v2로 답하면 입력 이벤트를 이진 묶음으로
+        self.dropped=0      # 대기열이 넘쳐서 버린 마우스 이동 수
+        self._q=collections.deque()   # 입력 이벤트 튜플 또는 JSON dict(드문 메시지), 보낼 순서대로
+        self._cv=threading.Condition(); self._stop=False
+        threading.Thread(target=self._run, name="control-send", daemon=True).start()
+    def send_json(self,obj:dict):
+        self._put([obj])
+    def send_events(self, events:list[tuple]):
+        # 입력 이벤트 [(EV_*, 인자, a, b)]. 한 번에 모인 이벤트는 한 프레임으로
+        if events: self._put(events)
+    def close(self):
+        with self._cv: self._stop=True; self._cv.notify()
+    def _put(self, items:list):
+        with self._cv:
+            q=self._q
+            for it in items:
+                if type(it) is tuple and it[0]==EV_MOVE and q and type(q[-1]) is tuple and q[-1][0]==EV_MOVE:
+                    q[-1]=it; self.dropped+=1; continue   # 아직 안 나간 이동 → 최신 위치로 바꿈
+                q.append(it)
+            if len(q)>CONTROL_QUEUE_MAX:
+                # 넘침: 오래된 이동부터 버림. 버튼/키/JSON은 순서·짝(누름/뗌)이 깨지면 안 되므로 남김
+                over=len(q)-CONTROL_QUEUE_MAX; keep=collections.deque()
+                for it in q:
+                    if over and type(it) is tuple and it[0]==EV_MOVE: over-=1; self.dropped+=1; continue
+                    keep.append(it)
+                self._q=keep
+            self._cv.notify()
+    def _run(self):
+        delay=CONTROL_RETRY_MIN; retry_at=0.0
+        while True:
+            with self._cv:
+                while not self._q and not self._stop: self._cv.wait()
+                if self._stop: break
+                now=time.monotonic()
+                if not self.sock and now<retry_at: self._cv.wait(retry_at-now); continue   # 재연결 대기 중(대기열은 그대로)
+            if not self.sock and not self._connect():
+                retry_at=time.monotonic()+delay; delay=min(delay*2,CONTROL_RETRY_MAX); continue
+            delay=CONTROL_RETRY_MIN
+            with self._cv: items=list(self._q); self._q.clear()
+            if not self.binary: self._poll_hello()
+            try:
+                self.sock.sendall(self._encode(items))
+            except OSError:
+                with self._cv: self._q.extendleft(reversed(items))   # 못 보낸 것은 재연결 뒤에 다시
+                self._disconnect()
+        self._disconnect()
+    def _connect(self) -> bool:
+        self.binary=False
         try:
-            self.sock=socket.socket(socket.AF_INET,socket.SOCK_STREAM)
-            self.sock.settimeout(3.0); self.sock.connect((self.host,self.port))
+            if self.mux: self.sock=self.mux.open(MUX_CONTROL)
+            else: self.sock=socket.create_connection((self.host,self.port),3.0)
             self.sock.settimeout(None)
-        except Exception:
-            self.sock=None
-    def send_json(self,obj:dict):
-        if not self.sock:
-            self.connect()
-            if not self.sock: return
+            send_json(self.sock, {"t":"hello","v":CONTROL_VERSION})   # 답은 다음 전송 때 확인(기다리지 않음)
+            return True
+        except OSError:
+            self._disconnect(); return False
+    def _disconnect(self):
         try:
-            body=json.dumps(obj).encode("utf-8")
-            head=struct.pack(">I",len(body))
-            self.sock.sendall(head+body)
-        except Exception:
-            try: self.sock.close()
-            except: pass
-            self.sock=None
+            if self.sock: self.sock.close()
+        except OSError: pass
+        self.sock=None
+    def _encode(self, items:list) -> bytes:
+        # 이어진 입력 이벤트는 이진 묶음 하나로, JSON 메시지는 각각(서버가 이진을 모르면 모두 JSON)
+        out=[]; evs=[]
+        def flush():
+            if not evs: return
+            body=b"".join(CTRL_EVENT.pack(k,arg&0xFF,max(-32768,min(32767,a)),max(-32768,min(32767,b))) for k,arg,a,b in evs)
+            out.append(struct.pack(">I",CTRL_BIN_FLAG|len(body))+body); evs.clear()
+        for it in items:
+            if type(it) is tuple and self.binary: evs.append(it); continue
+            flush()
+            body=json.dumps(event_json(it) if type(it) is tuple else it).encode("utf-8")
+            out.append(struct.pack(">I",len(body))+body)
+        flush()
+        return b"".join(out)
+    def _poll_hello(self):
+        # 서버의 hello 답이 와 있으면 읽음(예전 서버는 아무것도 보내지 않음)
+        try:
+            if not self.sock or not select.select([self.sock],[],[],0)[0]: return
+            head=recv_exact(self.sock,4)
+            if not head: return
+            msg=json.loads(recv_exact(self.sock,struct.unpack(">I",head)[0]).decode("utf-8","ignore"))
+            if msg.get("t")=="hello" and int(msg.get("v",1))>=2: self.binary=True
+        except (OSError,ValueError,TypeError,AttributeError): pass
 
 # ----- 파일 전송 -----
 class FileClient:
-    def __init__(self, host:str, port:int=FILE_PORT):
-        self.host=host; self.port=port
+    def __init__(self, host:str, port:int=FILE_PORT, mux=None):
+        self.host=host; self.port=port; self.mux=mux
     def _connect(self):
+        if self.mux: return self.mux.open(MUX_FILE)   # 요청마다 새 스트림(TCP 핸드셰이크 없음)
         s=socket.socket(socket.AF_INET,socket.SOCK_STREAM)
         s.settimeout(5.0); s.connect((self.host,self.port)); s.settimeout(None)
         return s
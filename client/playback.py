@@ -0,0 +1,151 @@
+# client/playback.py
+import mmap, time, threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PySide6.QtCore import QThread, Signal
+from PySide6.QtGui import QImage
+
+from utils import np_bgr_to_qimage
+from codec import FrameDecoder
+from common import (VIDEO_HDR, PKT_FRAME, PKT_BANDS, PKT_REGIONS, CODEC_THREADS,
+                    REC_MAGIC, REC_HDR, REC_FRAME, REC_INDEX, REC_KEY)
+
+_INDEX_DTYPE = np.dtype([("ts", ">i8"), ("off", ">u8")])   # REC_INDEX와 같은 배치
+_SELF_CONTAINED = (PKT_FRAME, PKT_BANDS, PKT_REGIONS)      # 앞 화면 없이 디코딩되는 패킷
+
+# ===== 세션 녹화 파일(서버 record.py): mmap으로 열고 키 프레임 색인으로 바로 탐색 =====
+class Recording:
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = open(path, "rb")
+        try: self.mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: self._fh.close(); raise ValueError("빈 녹화 파일입니다")
+        if len(self.mm) < REC_HDR.size or REC_HDR.unpack_from(self.mm, 0)[0] != REC_MAGIC:
+            self.close(); raise ValueError("녹화 파일 형식이 아닙니다")
+        self.start_us = REC_HDR.unpack_from(self.mm, 0)[1]
+        self.keys = self._load_index()   # 키 프레임 (ts, off) 배열, 시각 순
+        # 끝 시각: 마지막 키 프레임부터만 훑음(처음부터 읽지 않음)
+        self.end_us = self.start_us
+        for _, ts, _, _ in self.records(int(self.keys["off"][-1]) if len(self.keys) else REC_HDR.size):
+            self.end_us = max(self.end_us, ts)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_us - self.start_us) / 1e6
+
+    def _load_index(self) -> np.ndarray:
+        # 색인은 키 프레임마다 16바이트. 녹화 중 끊긴 파일이면 본문보다 앞선 항목만 믿음
+        try:
+            with open(self.path + ".idx", "rb") as f: raw = f.read()
+        except OSError:
+            raw = None
+        if raw is None:   # 색인이 없으면(복사 누락 등) 한 번 훑어서 만듦
+            keys = [(ts, off) for off, ts, flags, _ in self.records(REC_HDR.size) if flags & REC_KEY]
+            return np.array(keys, dtype=_INDEX_DTYPE)
+        keys = np.frombuffer(raw[:len(raw) // REC_INDEX.size * REC_INDEX.size], dtype=_INDEX_DTYPE)
+        keys = keys[keys["off"] + REC_FRAME.size <= len(self.mm)]
+        # 본문 중간에서 끊긴 키 프레임은 마지막 하나뿐(이어 쓰기) → 온전하지 않으면 뺌
+        if len(keys) and next(self.records(int(keys["off"][-1])), None) is None: keys = keys[:-1]
+        return keys
+
+    def records(self, off: int):
+        # off부터 (위치, 캡처 시각 µs, 플래그, 패킷 memoryview). 잘린 마지막 기록에서 멈춤
+        mv = memoryview(self.mm); end = len(mv)
+        while off + REC_FRAME.size <= end:
+            ts, flags, n = REC_FRAME.unpack_from(mv, off)
+            body = off + REC_FRAME.size
+            if body + n > end or n < VIDEO_HDR.size: return
+            yield off, ts, flags, mv[body:body + n]
+            off = body + n
+
+    def key_before(self, ts_us: int) -> int:
+        # ts_us 이하의 마지막 키 프레임 위치(없으면 첫 기록)
+        i = int(np.searchsorted(self.keys["ts"], ts_us, side="right")) - 1
+        return int(self.keys["off"][max(i, 0)]) if len(self.keys) else REC_HDR.size
+
+    def close(self):
+        try: self.mm.close()
+        except (AttributeError, BufferError): pass
+        self._fh.close()
+
+# ===== 재생 스레드: 녹화 시각대로(배속 가능) 디코딩해서 VideoClient와 같은 sig_frame으로 보냄 =====
+class PlaybackThread(QThread):
+    sig_frame = Signal(QImage, int, int)
+    sig_pos   = Signal(float, float, bool)   # 현재 위치(초), 전체 길이(초), 재생 중 여부
+    def __init__(self, rec: Recording):
+        super().__init__()
+        self.rec = rec
+        self._cond = threading.Condition()
+        self._stop = False; self._playing = False
+        self._seek = 0.0     # 처리할 탐색 위치(초) 또는 None. 처음에는 0초 화면을 보여 줌
+        self.speed = 1.0
+
+    def play(self):
+        with self._cond: self._playing = True; self._cond.notify()
+    def pause(self):
+        with self._cond: self._playing = False; self._cond.notify()
+    def toggle(self):
+        with self._cond: self._playing = not self._playing; self._cond.notify()
+    def seek(self, sec: float):
+        with self._cond: self._seek = max(0.0, min(sec, self.rec.duration)); self._cond.notify()
+    def set_speed(self, speed: float):
+        with self._cond: self.speed = max(0.1, speed); self._cond.notify()
+    def stop(self):
+        with self._cond: self._stop = True; self._cond.notify()
+
+    def run(self):
+        pool = ThreadPoolExecutor(CODEC_THREADS, thread_name_prefix="playback-decode")
+        dec = FrameDecoder(pool); rec = self.rec
+        it = None; pos = rec.start_us; clock = None   # clock: (기준 벽시계, 기준 녹화 시각 µs, 배속)
+        try:
+            while True:
+                with self._cond:
+                    if self._stop: return
+                    target, self._seek = self._seek, None
+                    playing, speed = self._playing, self.speed
+                    if target is None and not playing:
+                        self.sig_pos.emit((pos - rec.start_us) / 1e6, rec.duration, False)   # 일시정지 표시
+                        clock = None; self._cond.wait(); continue
+                if target is not None:
+                    it, pos = self._seek_to(dec, rec.start_us + int(target * 1e6)); clock = None
+                    self.sig_pos.emit((pos - rec.start_us) / 1e6, rec.duration, playing); continue
+                nxt = next(it, None) if it is not None else None
+                if nxt is None:   # 끝까지 재생
+                    with self._cond: self._playing = False
+                    self.sig_pos.emit((pos - rec.start_us) / 1e6, rec.duration, False); continue
+                off, ts, _, pkt = nxt
+                if clock is None or clock[2] != speed: clock = (time.monotonic(), pos, speed)
+                delay = clock[0] + (ts - clock[1]) / 1e6 / speed - time.monotonic()
+                if delay > 0:
+                    with self._cond:
+                        if self._cond.wait_for(lambda: self._stop or self._seek is not None or not self._playing
+                                               or self.speed != speed, delay):
+                            it = rec.records(off); continue   # 탐색/일시정지/배속 변경 → 이 기록부터 다시
+                self._show(dec, pkt); pos = ts
+                self.sig_pos.emit((pos - rec.start_us) / 1e6, rec.duration, True)
+        finally:
+            pool.shutdown(wait=False)
+
+    def _seek_to(self, dec: FrameDecoder, ts_us: int):
+        # 목표 이전 마지막 키 프레임부터 목표까지의 기록만: 헤더로 훑어서 마지막 자립 패킷(전체 프레임)부터 디코딩
+        rec = self.rec; start = rec.key_before(ts_us)
+        span = []; nxt = None
+        for off, ts, flags, pkt in rec.records(start):
+            if ts > ts_us and span: nxt = off; break
+            ptype = VIDEO_HDR.unpack_from(pkt)[0]
+            if ptype in _SELF_CONTAINED: span.clear()
+            span.append((ts, pkt))
+        dec.reset(); pos = rec.start_us; last = None
+        for ts, pkt in span:
+            img = dec.decode(VIDEO_HDR.unpack_from(pkt)[0], pkt[VIDEO_HDR.size:])
+            if img is not None: last = (img, pkt); pos = ts
+        if last is not None: self._emit(*last)
+        return (rec.records(nxt) if nxt is not None else None), pos
+
+    def _show(self, dec: FrameDecoder, pkt):
+        img = dec.decode(VIDEO_HDR.unpack_from(pkt)[0], pkt[VIDEO_HDR.size:])
+        if img is not None: self._emit(img, pkt)
+
+    def _emit(self, img: np.ndarray, pkt):
+        _, _, w, h = VIDEO_HDR.unpack_from(pkt)
+        self.sig_frame.emit(np_bgr_to_qimage(img), w, h)
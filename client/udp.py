@@ -0,0 +1,97 @@
+# client/udp.py
+import socket, random, collections
+import numpy as np
+
+import fec
+from common import UDP_HDR, UDP_PROBE, UDP_MAGIC, UDP_SHARD, UDP_LOSS, UDP_FALLBACK_WINDOW
+
+UDP_RCVBUF = 4 * 1024 * 1024
+
+class _Partial:
+    # 조립 중인 프레임 1개: 묶음(데이터 group개 + 패리티)마다 데이터 수만큼 조각이 모이면 완성
+    __slots__ = ("size", "n", "group", "parity", "shards", "need")
+    def __init__(self, size: int, n: int, group: int, parity: int):
+        self.size = size; self.n = n; self.group = group; self.parity = parity
+        self.shards: dict[int, bytes] = {}
+        self.need = [min(group, n - g) for g in range(0, n, group)]   # 묶음별 아직 필요한 조각 수
+
+    def add(self, idx: int, payload: bytes) -> bool:
+        # True → 모든 묶음을 복구할 수 있음
+        if idx in self.shards or idx >= self.n + len(self.need) * self.parity: return False
+        self.shards[idx] = payload
+        g = idx // self.group if idx < self.n else (idx - self.n) // self.parity
+        self.need[g] -= 1
+        return all(c <= 0 for c in self.need)
+
+    def assemble(self) -> bytes | None:
+        out = bytearray()
+        for g, start in enumerate(range(0, self.n, self.group)):
+            k = min(self.group, self.n - start)
+            data = [self.shards.get(i) for i in range(start, start + k)]
+            if any(d is None for d in data):
+                m = fec.parity_count(k, self.group, self.parity)
+                pad = lambda b: None if b is None else np.frombuffer(b.ljust(UDP_SHARD, b"\0"), dtype=np.uint8)
+                base = self.n + g * self.parity
+                got = fec.recover([pad(d) for d in data] + [pad(self.shards.get(base + j)) for j in range(m)], k, m)
+                if got is None: return None
+                data = [d.tobytes() for d in got]
+            for d in data: out += d
+        return bytes(out[:self.size])
+
+# ===== 영상 UDP 수신: 조각 모으기 + FEC 복구. 복구 못 한 프레임은 더 새 프레임이 완성되는 순간 건너뜀 =====
+class UdpReceiver:
+    def __init__(self, loss: float | None = None):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF)
+        s.bind(("0.0.0.0", 0)); s.setblocking(False)
+        self.sock = s
+        self.loss = UDP_LOSS if loss is None else loss   # 시험용 손실 흉내(받은 데이터그램을 이 확률로 버림)
+        self._rng = random.Random()
+        self._frames: dict[int, _Partial] = {}
+        self.last = 0          # 마지막으로 넘긴(또는 건너뛴) 프레임 순번
+        self.recovered = 0     # 유실이 있었지만 FEC로 살린 프레임 수
+        self.lost = 0          # 복구 못 하고 건너뛴 프레임 수
+        self.window = collections.deque(maxlen=UDP_FALLBACK_WINDOW)   # 최근 프레임 성공(True)/유실(False)
+
+    def probe(self, addr: tuple, token: int):
+        try: self.sock.sendto(UDP_PROBE.pack(UDP_MAGIC, token), addr)
+        except OSError: pass
+
+    def loss_ratio(self) -> float:
+        if len(self.window) < self.window.maxlen: return 0.0
+        return self.window.count(False) / len(self.window)
+
+    def read(self) -> list[tuple[int, bytes]]:
+        # 지금 도착한 데이터그램을 모두 처리 → 완성된 프레임 (순번, 프레임 바이트) 목록(순번 순)
+        out = []
+        while True:
+            try:
+                d = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return out
+            except ConnectionResetError:
+                continue
+            except OSError:
+                return out
+            if self.loss and self._rng.random() < self.loss: continue
+            if len(d) <= UDP_HDR.size: continue
+            seq, size, idx, n, group, parity = UDP_HDR.unpack_from(d)
+            if seq <= self.last or not n or not group or not parity: continue   # 이미 넘겼거나 건너뛴 프레임의 늦은 조각
+            fr = self._frames.get(seq)
+            if fr is None:
+                if len(self._frames) >= 64: del self._frames[min(self._frames)]   # 끝내 못 모은 프레임 정리
+                fr = self._frames[seq] = _Partial(size, n, group, parity)
+            if not fr.add(idx, d[UDP_HDR.size:]): continue
+            data = fr.assemble()
+            if data is None: continue
+            if any(i not in fr.shards for i in range(n)): self.recovered += 1
+            # 이보다 오래된 미완성 프레임은 기다리지 않음
+            skipped = seq - self.last - 1
+            self.lost += skipped; self.window.extend([False] * min(skipped, self.window.maxlen)); self.window.append(True)
+            self.last = seq
+            for s in [s for s in self._frames if s <= seq]: del self._frames[s]
+            out.append((seq, data))
+
+    def close(self):
+        try: self.sock.close()
+        except OSError: pass
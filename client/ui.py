@@ -1,19 +1,23 @@
 # client/ui.py
 import os
-from PySide6.QtCore import Qt, QPoint, Signal, QEvent, QTimer, QSize
-from PySide6.QtGui import QImage, QPixmap, QIcon, QAction, QCursor, QColor, QPainter, QPen
+from PySide6.QtCore import Qt, QPoint, QPointF, QRect, QRectF, Signal, QEvent, QTimer, QSize
+from PySide6.QtGui import QImage, QPixmap, QIcon, QAction, QCursor, QColor, QPainter, QPen, QPolygonF
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QFrame, QStyle, QDialog, QLineEdit, QTreeWidget, QTreeWidgetItem,
     QHeaderView, QSplitter, QProgressBar, QMessageBox, QSizePolicy,
-    QListWidget, QListWidgetItem, QCheckBox, QDialogButtonBox, QAbstractItemView, QMenu, QApplication, QGraphicsDropShadowEffect
+    QListWidget, QListWidgetItem, QCheckBox, QDialogButtonBox, QAbstractItemView, QMenu, QApplication, QGraphicsDropShadowEffect,
+    QComboBox, QFileDialog, QSlider
 )
 from utils import qt_to_vk, human_size, fmt_mtime
 from net import VideoClient, ControlClient, FileClient
+from mux import MuxConnection
+from codec import h264_available
+from playback import Recording, PlaybackThread
 
 # ---------- 포트 상수: 외부(common.py) 우선, 실패 시 기본값 ----------
 
-from common import VIDEO_PORT, CONTROL_PORT, FILE_PORT  # 프로젝트 루트 공유 파일
+from common import VIDEO_PORT, CONTROL_PORT, FILE_PORT, MUX_ENABLED, STREAM_PROFILES, DEFAULT_PROFILE, DEFAULT_CODEC, DEFAULT_MONITOR, RECORD_EXT  # 프로젝트 루트 공유 파일
 
 class IpEditDialog(QDialog):
     def __init__(self, parent=None, *, title="IP 추가", ok_text="추가", alias="", ip=""):
@@ -106,7 +110,7 @@ class ConnectDialog(QDialog):
         self.setWindowTitle("원격 연결")
 
         # 리스트 UI가 들어가므로 조금 키웁니다.
-        self.setFixedSize(500, 400)
+        self.setFixedSize(500, 490)
 
         # --- 위젯들 ---
         # 토글: 직접 입력
@@ -129,8 +133,22 @@ class ConnectDialog(QDialog):
 
         self.btn_add_ip = QPushButton("IP 추가")
 
+        # 화질 프로필(서버가 프로필별로 한 번만 인코딩)
+        self.cb_profile = QComboBox()
+        for key, prof in STREAM_PROFILES.items():
+            self.cb_profile.addItem(prof.get("label", key), key)
+        self.cb_profile.setCurrentIndex(max(0, self.cb_profile.findData(DEFAULT_PROFILE)))
+
+        # H.264(프레임 간 압축): 동영상/스크롤에 유리. PyAV가 없거나 서버가 지원하지 않으면 MJPEG
+        self.cb_h264 = QCheckBox("H.264 압축 (동영상/스크롤)")
+        self.cb_h264.setEnabled(h264_available())
+        if not h264_available(): self.cb_h264.setToolTip("PyAV(av) 패키지가 필요합니다")
+
         # 하단 버튼/에러
         self.btn_connect = QPushButton("연결")
+        self.btn_play = QPushButton("녹화 재생…")   # 서버가 저장한 세션 녹화 파일 보기(접속 없이)
+        self.play_path = None
+        self.mux = None   # 다중화 포트로 연결되면 그 연결(ClientWindow가 이어서 씀), 아니면 포트별 연결(호환 모드)
         self.lbl_err = QLabel("")
         self.lbl_err.setObjectName("ConnectError")
 
@@ -144,14 +162,20 @@ class ConnectDialog(QDialog):
         row = QHBoxLayout(); row.addWidget(self.list_ips, 1); row.addWidget(self.btn_add_ip, 0)
         lay.addLayout(row)
 
+        lay.addWidget(QLabel("화질"))
+        lay.addWidget(self.cb_profile)
+        lay.addWidget(self.cb_h264)
+
         lay.addStretch(1)
-        lay.addWidget(self.btn_connect)
+        row_btn = QHBoxLayout(); row_btn.addWidget(self.btn_connect, 1); row_btn.addWidget(self.btn_play, 0)
+        lay.addLayout(row_btn)
         lay.addWidget(self.lbl_err)
 
         # --- 시그널 ---
         self.cb_manual.toggled.connect(self._update_mode)
         self.btn_add_ip.clicked.connect(self._on_add_ip)
         self.btn_connect.clicked.connect(self.try_connect)
+        self.btn_play.clicked.connect(self._on_play_file)
         self.ed_ip.returnPressed.connect(self.try_connect)
         self.list_ips.itemDoubleClicked.connect(lambda *_: self.try_connect())
 
@@ -171,6 +195,10 @@ class ConnectDialog(QDialog):
                     break
         self._update_mode()  # 위젯 활성화/비활성 적용
 
+    def _on_play_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "녹화 파일 열기", "", f"세션 녹화 (*{RECORD_EXT});;모든 파일 (*)")
+        if path: self.play_path = path; self.accept()
+
     # --- IP 리스트 저장/로딩 ---
     def _load_ip_list(self):
         import json
@@ -307,7 +335,15 @@ class ConnectDialog(QDialog):
                 self.lbl_err.setText("연결 실패: 선택한 항목에 IP가 없습니다.")
                 return
 
-        # probe: CONTROL → VIDEO → FILE 순
+        # 다중화 포트 먼저: 연결되면 그 연결을 그대로 씀(이후 채널은 핸드셰이크 없이 스트림으로)
+        if MUX_ENABLED:
+            mux = MuxConnection(ip)
+            if mux.probe():
+                self.mux = mux
+                self.ed_ip.setText(ip)
+                self.accept(); return
+
+        # 호환 모드(다중화 포트가 없는 서버) probe: CONTROL → VIDEO → FILE 순
         def probe(port: int, timeout=2.0) -> bool:
             try:
                 s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -366,18 +402,23 @@ class TopHeader(QFrame):
         # 중: 배지
         self.badge_time = Badge("⏱ 00:00:00")
         self.badge_bw   = Badge("⇅ 0 Mbps")
+        self.badge_lat  = Badge("⌛ - ms")
         self.badge_ip   = Badge("서버 IP: -")
         center = QHBoxLayout(); center.setContentsMargins(0,0,0,0); center.setSpacing(8)
-        center.addStretch(1); center.addWidget(self.badge_time); center.addWidget(self.badge_bw); center.addWidget(self.badge_ip); center.addStretch(1)
+        center.addStretch(1); center.addWidget(self.badge_time); center.addWidget(self.badge_bw); center.addWidget(self.badge_lat); center.addWidget(self.badge_ip); center.addStretch(1)
         center_wrap = QWidget(); center_wrap.setLayout(center)
 
-        # 우: 버튼
+        # 우: 모니터 선택(원격 모니터가 2개 이상일 때만 표시) + 버튼
+        self.cb_monitor = QComboBox(); self.cb_monitor.setVisible(False)
+        self.btn_mon_win = QPushButton("새 창"); self.btn_mon_win.setVisible(False)
+        self.btn_mon_win.setToolTip("다른 모니터를 새 창으로 보기")
+        self.btn_mon_win.setMenu(QMenu(self.btn_mon_win))
         self.btn_full = QPushButton("전체 화면"); self.btn_full.clicked.connect(on_fullscreen)
         self.btn_transfer = QPushButton("파일 전달"); self.btn_transfer.setCheckable(True); self.btn_transfer.clicked.connect(on_toggle_transfer)
         self.btn_re = QPushButton("재연결"); self.btn_re.clicked.connect(on_reconnect)
         self.btn_exit = QPushButton("원격 종료"); self.btn_exit.setObjectName("btnExit"); self.btn_exit.clicked.connect(on_exit)
         right = QHBoxLayout(); right.setContentsMargins(0,0,12,0); right.setSpacing(8)
-        for b in [self.btn_full, self.btn_transfer, self.btn_re, self.btn_exit]:
+        for b in [self.cb_monitor, self.btn_mon_win, self.btn_full, self.btn_transfer, self.btn_re, self.btn_exit]:
             right.addWidget(b)
         right_wrap = QWidget(); right_wrap.setLayout(right)
 
@@ -391,6 +432,15 @@ class TopHeader(QFrame):
         self.badge_time.setText(f"⏱ {h:02d}:{m:02d}:{s:02d}")
     def update_bw(self, mbps:float):
         self.badge_bw.setText(f"⇅ {mbps:.0f} Mbps")
+    def update_latency(self, fps:float, stats:dict):
+        # 배지: 종단 지연 p50(시계 차이 추정 전이면 서버 처리+디코딩만), 툴팁: 단계별 p50/p95/p99 + 손실
+        names={"encode":"캡처→인코딩","queue":"송신 대기","network":"네트워크","decode":"디코딩","e2e":"종단"}
+        main=stats.get("e2e")
+        self.badge_lat.setText(f"⌛ {main[0]:.0f} ms" if main else "⌛ - ms")
+        lines=[f"{fps:.0f} FPS · 손실 {stats.get('dropped',0)}"]
+        for k,label in names.items():
+            if k in stats: p50,p95,p99=stats[k]; lines.append(f"{label}: p50 {p50:.0f} / p95 {p95:.0f} / p99 {p99:.0f} ms")
+        self.badge_lat.setToolTip("\n".join(lines))
     def update_ip(self, s:str):
         self.badge_ip.setText(f"서버 IP: {s}")
 
@@ -403,9 +453,52 @@ class ViewerLabel(QLabel):
         self.setMouseTracking(True)
         self.setFocusPolicy(Qt.StrongFocus)
         self.remote_size = (0,0)
+        self.remote_origin = (0,0)   # 보고 있는 모니터의 원격 가상 화면 좌표(다중 모니터)
+        self.cursor_pos = None       # 원격 커서 (x, y, 보임): 프레임과 별도로 받아 마지막 프레임 위에 그림
+        self.cursor_img = None; self.cursor_hot = (0,0)   # 커서 모양(None → 기본 화살표), 핫스팟
         self.setAlignment(Qt.AlignCenter)
         self.setText("원격 화면\n\n원격 PC 화면이 여기에 표시됩니다.")
     def set_remote_size(self, w:int, h:int): self.remote_size=(w,h)
+    def set_remote_origin(self, x:int, y:int): self.remote_origin=(x,y)
+    def _frame_geom(self) -> tuple[int,int,float] | None:
+        # 라벨 안에서 원격 화면이 그려진 위치(ox, oy)와 배율
+        rw, rh = self.remote_size
+        if rw<=0 or rh<=0: return None
+        lw, lh = self.width(), self.height()
+        r = min(lw/rw, lh/rh)
+        return (lw-int(rw*r))//2, (lh-int(rh*r))//2, r
+    def _cursor_rect(self) -> QRect:
+        g = self._frame_geom()
+        if g is None or self.cursor_pos is None: return QRect()
+        ox, oy, r = g; x, y, _ = self.cursor_pos
+        w, h = (self.cursor_img.width(), self.cursor_img.height()) if self.cursor_img else (12, 19)
+        hx, hy = self.cursor_hot if self.cursor_img else (0, 0)
+        return QRectF(ox+(x-hx)*r, oy+(y-hy)*r, w*r, h*r).toAlignedRect().adjusted(-2,-2,2,2)
+    def set_cursor(self, x:int, y:int, visible:bool):
+        # 커서가 지나간 자리만 다시 그림(프레임 디코딩/인코딩 없음)
+        old = self._cursor_rect(); self.cursor_pos = (x, y, visible)
+        self.update(old.united(self._cursor_rect()))
+    def set_cursor_shape(self, img: QImage, hx:int, hy:int):
+        self.cursor_img = None if img.isNull() else img; self.cursor_hot = (hx, hy)
+        self.update()
+    def paintEvent(self, e):
+        super().paintEvent(e)
+        g = self._frame_geom()
+        if g is None or self.cursor_pos is None or not self.cursor_pos[2]: return
+        pm = self.pixmap()
+        if pm is None or pm.isNull(): return
+        ox, oy, r = g; x, y, _ = self.cursor_pos
+        if not (0 <= x < self.remote_size[0] and 0 <= y < self.remote_size[1]): return   # 다른 모니터에 있음
+        p = QPainter(self); p.setRenderHint(QPainter.Antialiasing)
+        if self.cursor_img is not None:
+            p.setRenderHint(QPainter.SmoothPixmapTransform)
+            p.drawImage(self._cursor_rect().adjusted(2,2,-2,-2), self.cursor_img)
+        else:
+            # 모양을 모르면 기본 화살표
+            pts = [(0,0),(0,16),(4,12),(7,18),(9,17),(6,11),(11,11)]
+            p.setPen(QPen(QColor(0,0,0), 1)); p.setBrush(QColor(255,255,255))
+            p.drawPolygon(QPolygonF([QPointF(ox+x*r+px*r, oy+y*r+py*r) for px, py in pts]))
+        p.end()
     def map_to_remote(self, p: QPoint) -> tuple[int,int]:
         rw, rh = self.remote_size
         if rw<=0 or rh<=0: return (0,0)
@@ -418,7 +511,8 @@ class ViewerLabel(QLabel):
             rx = int(max(0, min(x, vw)) * rw / vw)
             ry = int(max(0, min(y, vh)) * rh / vh)
         else: rx, ry = 0, 0
-        return max(0,min(rx,rw-1)), max(0,min(ry,rh-1))
+        mx, my = self.remote_origin
+        return mx+max(0,min(rx,rw-1)), my+max(0,min(ry,rh-1))
     def mouseMoveEvent(self, e):  self.sig_mouse.emit({"t":"move","x":e.position().x(),"y":e.position().y()})
     def mousePressEvent(self, e):
         btn = "left" if e.button()==Qt.LeftButton else "right" if e.button()==Qt.RightButton else "middle"
@@ -679,7 +773,7 @@ from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QMessageBox, QApplication
 )
 
-from common import VIDEO_PORT, CONTROL_PORT, FILE_PORT
+from common import VIDEO_PORT, CONTROL_PORT, FILE_PORT, MOUSE_MOVE_INTERVAL_MS, CTRL_BUTTONS, EV_MOVE, EV_DOWN, EV_UP, EV_WHEEL, EV_KEY_DOWN, EV_KEY_UP
 from net import VideoClient, ControlClient, FileClient
 from utils import qt_to_vk
 
@@ -689,15 +783,23 @@ from utils import qt_to_vk
 #  - 몰입형 전체화면(프레임리스) + 상단 접근 시 "중앙 X 버튼" 노출
 # ----------------------------------------------------------------------
 class ClientWindow(QMainWindow):
-    def __init__(self, server_ip: str):
+    def __init__(self, server_ip: str, profile: str = DEFAULT_PROFILE, codec: str = DEFAULT_CODEC,
+                 monitor: int = DEFAULT_MONITOR, mux: MuxConnection | None = None):
         super().__init__()
         self.setWindowTitle("원격 뷰어 클라이언트")
         self.resize(1180, 760)
         self.server_ip = server_ip
+        self.profile = profile
+        self.codec = codec
+        self.monitor = monitor
+        self.mux = mux             # 다중화 연결(없으면 포트별 연결)
+        self._monitors = []        # 서버가 알려 준 모니터 목록
+        self._extra_windows = []   # 다른 모니터를 띄운 창들
 
         # --- 헤더/배지/버튼 ---
         self.header = TopHeader(self.on_fullscreen, self.toggle_transfer_page, self.on_reconnect, self.on_exit)
         self.header.update_ip(f"{self.server_ip}")
+        self.header.cb_monitor.activated.connect(self._on_monitor_selected)
 
         # --- 페이지: 원격 뷰어 ---
         self.view = ViewerLabel()
@@ -715,7 +817,7 @@ class ClientWindow(QMainWindow):
         self._filter_installed = False  # 전역 이벤트 필터 설치 여부
 
         # --- 페이지: 파일 전달 ---
-        self.fc = FileClient(self.server_ip, FILE_PORT)
+        self.fc = FileClient(self.server_ip, FILE_PORT, mux=self.mux)
         self.page_transfer = FileTransferPage(self.fc)
 
         # --- 스택 구성 ---
@@ -735,13 +837,27 @@ class ClientWindow(QMainWindow):
         # 상태바 초기화
         self.statusBar()
 
+        # 뷰어 크기 변경은 잠시 모았다가 서버에 한 번만 알림(서버가 그 크기로 축소 인코딩)
+        self._viewport_timer = QTimer(self); self._viewport_timer.setSingleShot(True)
+        self._viewport_timer.setInterval(200)
+        self._viewport_timer.timeout.connect(self._report_viewport)
+
+        # 마우스 이동 모으기: 간격마다 최대 1번(첫 이동은 바로), 사이에 온 이동은 마지막 위치만 남김
+        self._move_pending = None
+        self._move_timer = QTimer(self); self._move_timer.setSingleShot(True)
+        self._move_timer.setInterval(MOUSE_MOVE_INTERVAL_MS)
+        self._move_timer.timeout.connect(self._flush_move)
+
         # --- 네트워크(영상/제어) ---
-        self.vc = VideoClient(self.server_ip, VIDEO_PORT)
+        self.vc = VideoClient(self.server_ip, VIDEO_PORT, self.profile, self.codec, self.monitor, mux=self.mux)
         self.vc.sig_status.connect(self.on_status)
+        self.vc.sig_monitors.connect(self.on_monitors)
+        self.vc.sig_cursor.connect(self.view.set_cursor)
+        self.vc.sig_cursor_shape.connect(self.view.set_cursor_shape)
         self.vc.sig_frame.connect(self.on_frame)
         self.vc.start()
 
-        self.cc = ControlClient(self.server_ip, CONTROL_PORT)
+        self.cc = ControlClient(self.server_ip, CONTROL_PORT, mux=self.mux)
 
         # --- 몰입형 전체화면: 중앙 X 버튼 오버레이 초기화 ---
         self._init_immersive_close_button()
@@ -759,12 +875,38 @@ class ClientWindow(QMainWindow):
             self.statusBar().clearMessage()
 
     # ===================== 상태/프레임 수신 =====================
-    def on_status(self, fps: float, elapsed: int, connected: bool, mbps: float):
+    def on_status(self, fps: float, elapsed: int, connected: bool, mbps: float, stats: dict):
         self.header.update_time(elapsed if connected else 0)
         self.header.update_bw(mbps)
+        self.header.update_latency(fps, stats)
         if not connected and self.stack.currentIndex() == 0:
             self.view.setText("연결 끊김")
 
+    def on_monitors(self, mons: list, cur: int):
+        # 서버 모니터 목록 수신: 선택 상자/새 창 메뉴를 채우고, 제어 좌표 원점을 현재 모니터로
+        self._monitors = mons; self.monitor = cur
+        cb = self.header.cb_monitor; cb.blockSignals(True); cb.clear()
+        menu = self.header.btn_mon_win.menu(); menu.clear()
+        for m in mons:
+            label = f"모니터 {m['i']} ({m['w']}x{m['h']})"
+            cb.addItem(label, m["i"])
+            menu.addAction(label, lambda i=m["i"]: self._open_monitor_window(i))
+            if m["i"] == cur: self.view.set_remote_origin(int(m["x"]), int(m["y"]))
+        cb.setCurrentIndex(max(0, cb.findData(cur))); cb.blockSignals(False)
+        multi = len(mons) > 1
+        cb.setVisible(multi); self.header.btn_mon_win.setVisible(multi)
+
+    def _on_monitor_selected(self, idx: int):
+        mon = self.header.cb_monitor.itemData(idx)
+        if mon is not None and mon != self.monitor: self.vc.set_monitor(int(mon))
+
+    def _open_monitor_window(self, mon: int):
+        # 모니터 하나 = 영상 연결 하나. 창을 더 열어 여러 모니터를 동시에 구독
+        # 창마다 다중화 연결 하나(첫 스트림을 열 때 연결)
+        w = ClientWindow(self.server_ip, self.profile, self.codec, mon, MuxConnection(self.server_ip) if self.mux else None)
+        self._extra_windows = [x for x in self._extra_windows if x.isVisible()] + [w]
+        w.show()
+
     def on_frame(self, qimg, w: int, h: int):
         if self.stack.currentIndex() == 0:
             self.view.set_remote_size(w, h)
@@ -779,8 +921,14 @@ class ClientWindow(QMainWindow):
             self.view.setPixmap(pm.scaled(self.view.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
         # 중앙 X 버튼 위치 동기화
         self._layout_immersive_close()
+        self._viewport_timer.start()
         super().resizeEvent(e)
 
+    def _report_viewport(self):
+        dpr = self.view.devicePixelRatioF()
+        w, h = int(self.view.width() * dpr), int(self.view.height() * dpr)
+        if w > 0 and h > 0: self.vc.set_viewport(w, h)
+
     def moveEvent(self, e):
         self._layout_immersive_close()
         super().moveEvent(e)
@@ -796,21 +944,34 @@ class ClientWindow(QMainWindow):
         cursor = QPoint(int(ev.get("x", 0)), int(ev.get("y", 0)))
         rx, ry = self.view.map_to_remote(cursor)
         t = ev.get("t")
+        btn = CTRL_BUTTONS.index(ev["btn"]) if ev.get("btn") in CTRL_BUTTONS else 0
         if t == "move":
-            self.cc.send_json({"t": "mouse_move", "x": rx, "y": ry})
+            if self._move_timer.isActive(): self._move_pending = (rx, ry); return
+            self.cc.send_events([(EV_MOVE, 0, rx, ry)]); self._move_timer.start()
         elif t == "down":
-            self.cc.send_json({"t": "mouse_move", "x": rx, "y": ry})
-            self.cc.send_json({"t": "mouse_down", "btn": ev.get("btn", "left")})
+            self._move_pending = None   # 누른 위치가 더 새 위치
+            self._send_input([(EV_MOVE, 0, rx, ry), (EV_DOWN, btn, 0, 0)])   # 이동 + 누름을 한 프레임으로
         elif t == "up":
-            self.cc.send_json({"t": "mouse_up", "btn": ev.get("btn", "left")})
+            self._send_input([(EV_UP, btn, 0, 0)])
         elif t == "wheel":
-            self.cc.send_json({"t": "mouse_wheel", "delta": int(ev.get("delta", 0))})
+            self._send_input([(EV_WHEEL, 0, int(ev.get("delta", 0)), 0)])
+
+    def _flush_move(self):
+        if self._move_pending is None: return
+        rx, ry = self._move_pending; self._move_pending = None
+        self.cc.send_events([(EV_MOVE, 0, rx, ry)]); self._move_timer.start()
+
+    def _send_input(self, events: list[tuple]):
+        # 버튼/휠/키: 남아 있던 이동을 먼저 붙여서 보냄(순서 유지)
+        if self._move_pending is not None:
+            events = [(EV_MOVE, 0, *self._move_pending)] + events; self._move_pending = None
+        self.cc.send_events(events)
 
     def keyPressEvent(self, e):
         if self.stack.currentIndex() == 0 and not e.isAutoRepeat():
             vk = qt_to_vk(e)
             if vk:
-                self.cc.send_json({"t": "key", "vk": int(vk), "down": True})
+                self._send_input([(EV_KEY_DOWN, int(vk), 0, 0)])
         else:
             super().keyPressEvent(e)
 
@@ -818,7 +979,7 @@ class ClientWindow(QMainWindow):
         if self.stack.currentIndex() == 0 and not e.isAutoRepeat():
             vk = qt_to_vk(e)
             if vk:
-                self.cc.send_json({"t": "key", "vk": int(vk), "down": False})
+                self._send_input([(EV_KEY_UP, int(vk), 0, 0)])
         else:
             super().keyReleaseEvent(e)
 
@@ -830,13 +991,19 @@ class ClientWindow(QMainWindow):
             self.vc.wait(1000)
         except Exception:
             pass
-        self.vc = VideoClient(self.server_ip, VIDEO_PORT)
+        self.cc.close()
+        if self.mux: self.mux.close()   # 다음 스트림을 열 때 새로 연결
+        self.vc = VideoClient(self.server_ip, VIDEO_PORT, self.profile, self.codec, self.monitor, mux=self.mux)
         self.vc.sig_status.connect(self.on_status)
+        self.vc.sig_monitors.connect(self.on_monitors)
+        self.vc.sig_cursor.connect(self.view.set_cursor)
+        self.vc.sig_cursor_shape.connect(self.view.set_cursor_shape)
         self.vc.sig_frame.connect(self.on_frame)
+        self._report_viewport()
         self.vc.start()
 
-        self.cc = ControlClient(self.server_ip, CONTROL_PORT)
-        self.fc = FileClient(self.server_ip, FILE_PORT)
+        self.cc = ControlClient(self.server_ip, CONTROL_PORT, mux=self.mux)
+        self.fc = FileClient(self.server_ip, FILE_PORT, mux=self.mux)
         self.page_transfer.fc = self.fc
         self.page_transfer.refresh_server(None)
 
@@ -860,6 +1027,8 @@ class ClientWindow(QMainWindow):
             self.vc.wait(1000)
         except Exception:
             pass
+        self.cc.close()
+        if self.mux: self.mux.close()
         super().closeEvent(e)
 
     # ===================== 몰입형 전체화면(프레임리스) =====================
@@ -1009,3 +1178,84 @@ class ClientWindow(QMainWindow):
                     self._immersive_hide_timer.start(600)
 
         return super().eventFilter(obj, ev)
+
+# ----------------------------------------------------------------------
+# PlaybackWindow: 세션 녹화 재생 창(접속 없이 파일만)
+#  - 슬라이더/←→ 키로 탐색: 키 프레임 색인으로 바로 그 시점 화면
+#  - 재생/일시정지(스페이스), 배속
+# ----------------------------------------------------------------------
+class PlaybackWindow(QMainWindow):
+    SPEEDS = (0.5, 1.0, 2.0, 4.0, 8.0)
+    def __init__(self, path: str):
+        super().__init__()
+        self.setWindowTitle(f"녹화 재생 - {os.path.basename(path)}")
+        self.resize(1180, 760)
+        self.rec = Recording(path)   # 녹화 파일이 아니면 ValueError
+
+        self.view = ViewerLabel()
+        self.view.setText("녹화 화면")
+        self.btn_play = QPushButton("재생"); self.btn_play.setFixedWidth(80)
+        self.slider = QSlider(Qt.Horizontal); self.slider.setRange(0, max(1, int(self.rec.duration * 1000)))
+        self.lbl_pos = QLabel(); self.lbl_pos.setMinimumWidth(140); self.lbl_pos.setAlignment(Qt.AlignCenter)
+        self.cb_speed = QComboBox()
+        for s in self.SPEEDS: self.cb_speed.addItem(f"{s:g}x", s)
+        self.cb_speed.setCurrentIndex(self.SPEEDS.index(1.0))
+
+        bar = QHBoxLayout(); bar.setContentsMargins(12, 0, 12, 8); bar.setSpacing(8)
+        bar.addWidget(self.btn_play); bar.addWidget(self.slider, 1); bar.addWidget(self.lbl_pos); bar.addWidget(self.cb_speed)
+        root = QVBoxLayout(); root.setContentsMargins(12, 12, 12, 0); root.setSpacing(8)
+        root.addWidget(self.view, 1); root.addLayout(bar)
+        wrap = QWidget(); wrap.setLayout(root); self.setCentralWidget(wrap)
+        self.statusBar().showMessage(f"키 프레임 {len(self.rec.keys)}개 · 길이 {self._fmt(self.rec.duration)}")
+
+        self._pos = 0.0; self._playing = False
+        self.th = PlaybackThread(self.rec)
+        self.th.sig_frame.connect(self.on_frame)
+        self.th.sig_pos.connect(self.on_pos)
+        self.btn_play.clicked.connect(self.on_toggle)
+        # 슬라이더를 끄는 동안에도 바로 그 시점 화면(색인으로 탐색하므로 처음부터 읽지 않음)
+        self.slider.sliderMoved.connect(lambda v: self.th.seek(v / 1000.0))
+        self.slider.actionTriggered.connect(self._on_slider_action)
+        self.cb_speed.currentIndexChanged.connect(lambda i: self.th.set_speed(self.cb_speed.itemData(i)))
+        self.on_pos(0.0, self.rec.duration, False)
+        self.th.start()
+
+    @staticmethod
+    def _fmt(sec: float) -> str:
+        sec = int(sec); return f"{sec // 3600:02d}:{sec % 3600 // 60:02d}:{sec % 60:02d}"
+
+    def on_frame(self, qimg, w: int, h: int):
+        self.view.set_remote_size(w, h)
+        pm = QPixmap.fromImage(qimg)
+        self.view.setPixmap(pm.scaled(self.view.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+    def on_pos(self, pos: float, total: float, playing: bool):
+        self._pos = pos; self._playing = playing
+        if not self.slider.isSliderDown(): self.slider.setValue(int(pos * 1000))
+        self.lbl_pos.setText(f"{self._fmt(pos)} / {self._fmt(total)}")
+        self.btn_play.setText("일시정지" if playing else "재생")
+
+    def on_toggle(self):
+        if not self._playing and self._pos >= self.rec.duration: self.th.seek(0.0)   # 끝에서 누르면 처음부터
+        self.th.toggle()
+
+    def _on_slider_action(self, action: int):
+        # 트랙 클릭/키보드 이동도 탐색(끌기는 sliderMoved에서)
+        if action != QSlider.SliderMove: self.th.seek(self.slider.sliderPosition() / 1000.0)
+
+    def keyPressEvent(self, e):
+        if e.key() == Qt.Key_Space: self.on_toggle(); return
+        if e.key() in (Qt.Key_Left, Qt.Key_Right):
+            self.th.seek(self._pos + (5.0 if e.key() == Qt.Key_Right else -5.0)); return
+        super().keyPressEvent(e)
+
+    def resizeEvent(self, e):
+        pm = self.view.pixmap()
+        if pm and not pm.isNull():
+            self.view.setPixmap(pm.scaled(self.view.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        super().resizeEvent(e)
+
+    def closeEvent(self, e):
+        self.th.stop(); self.th.wait(1500)
+        self.rec.close()
+        super().closeEvent(e)
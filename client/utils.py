@@ -1,5 +1,5 @@
 # client/utils.py
-import os, json, struct
+import os, json, struct, collections
 import numpy as np, cv2
 from datetime import datetime
 from PySide6.QtGui import QImage
@@ -24,6 +24,37 @@ def send_json(sock, obj: dict):
     raw = json.dumps(obj).encode("utf-8")
     sock.sendall(struct.pack(">I", len(raw)) + raw)
 
+# ----- 지연 측정: 서버 시계 차이 추정 + 단계별 지연 분포 + 손실 프레임 -----
+class LatencyStats:
+    STAGES=("encode","queue","network","decode","e2e")   # 캡처→인코딩 완료→송신 시작→수신→표시, 전체
+    def __init__(self, window:int=512):
+        self.samples={k:collections.deque(maxlen=window) for k in self.STAGES}   # 초 단위, 최근 window개
+        self._clock=collections.deque(maxlen=8)   # (왕복 시간, 서버-클라이언트 시계 차이) 표본
+        self.offset=None                          # 서버 시각 - 클라이언트 시각(초). 모르면 None
+        self.dropped=0; self._last_seq=None
+    def on_pong(self, c:float, s:float, now:float):
+        # NTP식: 왕복 시간이 가장 짧았던 표본의 시계 차이를 사용(큐 대기로 늘어난 표본은 무시)
+        rtt=now-c
+        if rtt<0: return
+        self._clock.append((rtt, s-(c+now)/2.0)); self.offset=min(self._clock)[1]
+    def on_frame(self, seq:int, cap:float, enc:float, send:float, recv:float, shown:float):
+        # cap/enc/send: 서버 시계(초), recv/shown: 클라이언트 시계(초)
+        if self._last_seq is not None and seq>self._last_seq+1: self.dropped+=seq-self._last_seq-1
+        self._last_seq=seq
+        self.samples["encode"].append(enc-cap); self.samples["queue"].append(send-enc)
+        self.samples["decode"].append(shown-recv)
+        if self.offset is not None:
+            self.samples["network"].append(recv+self.offset-send)
+            self.samples["e2e"].append(shown+self.offset-cap)
+    def report(self) -> dict:
+        # {"dropped": n, 단계: (p50, p95, p99) ms}. 표본이 없는 단계는 빠짐
+        out={"dropped":self.dropped}
+        for k,d in self.samples.items():
+            if not d: continue
+            a=np.percentile(np.fromiter(d,dtype=np.float64),[50,95,99])*1000.0
+            out[k]=tuple(round(float(x),1) for x in a)
+        return out
+
 # ----- 표시 유틸 -----
 def human_size(n: int) -> str:
     if n is None: return ""
@@ -1,13 +1,165 @@
 # common.py
-import socket
+import os, socket, struct
 
 DEFAULT_HOST   = "0.0.0.0"
 VIDEO_PORT     = 50007   # 영상 전송
 CONTROL_PORT   = 50008   # 입력 제어
 FILE_PORT      = 50009   # 파일/클립보드/디렉토리 API
+MUX_PORT       = 50010   # 다중화 연결: 위 세 채널을 TCP 연결 하나로(위 포트들은 호환 모드로 그대로)
 FRAME_FPS      = 12
+FRAME_IDLE_FPS = 2       # 화면 변화가 없을 때 내려갈 수 있는 최저 FPS
+FRAME_BACKOFF  = 1.5     # 같은 프레임이 이어질 때 프레임 간격 증가 배율
 JPEG_QUALITY   = 80
 
+# ----- 스트림 프로필: 클라이언트가 접속 시 선택, 같은 프로필끼리 인코딩 결과를 공유 -----
+STREAM_PROFILES = {
+    "lan":   {"label": "원본 화질 (LAN)", "quality": JPEG_QUALITY, "fps": FRAME_FPS, "scale": 1.0},
+    "wan":   {"label": "저화질 (WAN)",    "quality": 50,           "fps": 8,         "scale": 0.75},
+    "thumb": {"label": "썸네일",          "quality": 40,           "fps": 2,         "scale": 0.25},
+}
+DEFAULT_PROFILE = "lan"
+VIEWPORT_SCALE_STEPS = 8   # 뷰어 크기 맞춤 배율을 1/8 단위로 올림 → 비슷한 창 크기끼리 스트림 공유
+
+# ----- 적응형 비트레이트: 클라이언트별 지연/처리량을 보고 단계를 오르내림 -----
+ABR_TARGET_LATENCY = 0.3   # 목표 종단 지연(초): 캡처 → 클라이언트 표시 → ack 도착
+ABR_LADDER = [             # (화질 배율, 크기 배율, FPS 배율) — 0단계 = 프로필 그대로
+    (1.0,  1.0,  1.0),
+    (0.75, 1.0,  1.0),
+    (0.6,  0.75, 1.0),
+    (0.5,  0.5,  0.75),
+    (0.4,  0.5,  0.5),
+]
+ABR_MIN_QUALITY    = 30    # 단계를 내려도 이 아래로는 안 내려감
+ABR_MIN_SCALE      = 0.25
+ABR_MIN_FPS        = 2
+ABR_STEP_INTERVAL  = 1.0   # 단계 변경 최소 간격(초)
+ABR_RECOVER_HOLD   = 3.0   # 이 시간 동안 여유가 있으면 한 단계 복구
+
+# ----- 영상 패킷 -----
+PKT_FRAME      = 0       # 전체 프레임(JPEG 1장)
+PKT_TILES      = 1       # 변경된 타일만(이전 프레임에 덮어쓰기)
+PKT_BANDS      = 2       # 전체 프레임을 가로 띠 N개로 나눠 각각 JPEG(병렬 인코딩/디코딩)
+PKT_H264       = 3       # H.264 Annex-B 접근 단위 1개(선택 모드, PyAV 필요)
+PKT_REGIONS    = 4       # 바탕 전체 프레임(JPEG, 무손실 타일 자리는 단색) + 무손실 타일 덮어쓰기
+PKT_INFO       = 5       # 서버 → 클라이언트 알림(JSON): 모니터 목록/현재 구독 모니터
+PKT_CURSOR     = 6       # 커서 위치(프레임과 별도, ack 없음)
+PKT_CURSOR_SHAPE = 7     # 커서 모양(바뀔 때만, ack 없음)
+FRAME_PKTS     = (PKT_FRAME, PKT_TILES, PKT_BANDS, PKT_H264, PKT_REGIONS)   # 화면 패킷(v2에서 FRAME_META가 붙음)
+VIDEO_HDR      = struct.Struct(">BIII")    # type, payload_len, w, h
+FRAME_META     = struct.Struct(">Iqqq")    # (v2) 시청자별 순번, 캡처/인코딩 완료/송신 시작 시각(서버 시계 µs)
+VIDEO_VERSION  = 2       # hello의 "v". 서버가 PKT_INFO {"t":"hello","v":2}로 답한 뒤부터 화면 패킷 헤더 뒤에 FRAME_META
+TILE_HDR       = struct.Struct(">HHHHBI")  # x, y, w, h, 타일 코덱, blob_len (+ blob)
+REGION_HDR     = struct.Struct(">BI")      # 바탕 패킷 타입(PKT_FRAME/PKT_BANDS), 바탕 payload 길이 (+ 바탕 + 타일들)
+PALETTE_HDR    = struct.Struct(">H")       # 팔레트 색 수 (+ BGR*n + zlib(인덱스 uint8))
+CURSOR_HDR     = struct.Struct(">iiB")     # 구독 모니터 기준 x, y(실제 해상도 px), 보임 여부
+CURSOR_SHAPE_HDR = struct.Struct(">HHHH")  # w, h, 핫스팟 x, y (+ zlib(BGRA))
+CURSOR_HZ      = 60      # 커서 위치 확인 주기(Hz). 바뀐 경우에만 보냄
+BANDS_HDR      = struct.Struct(">HH")      # 인코딩된 이미지 w, h (+ 띠들)
+BAND_HDR       = struct.Struct(">HHI")     # y, 띠 높이, jpeg_len (+ jpeg)
+TILE_SIZE      = 64      # 타일 한 변(px)
+BAND_MIN_HEIGHT = 256    # 띠 하나의 최소 높이(px). 이보다 작은 화면은 JPEG 1장
+CODEC_THREADS  = max(1, min(8, os.cpu_count() or 1))   # 띠/타일 병렬 인코딩·디코딩 스레드 수
+TILE_FULL_RATIO = 0.5    # 변경 타일 비율이 이 이상이면 전체 프레임 전송
+
+# ----- 프레임 소스(server/capture.py): "mss"(실제 화면) | "synthetic[:static|typing|scrolling|video[:WxH]]" | "replay:파일" -----
+FRAME_SOURCE   = os.environ.get("RD_FRAME_SOURCE", "mss")
+
+# ----- 세션 녹화: 이미 인코딩한 화면 패킷을 그대로 이어 씀(재캡처/재인코딩 없음) + 키 프레임 시각 색인(.idx) -----
+# 파일: REC_HDR + [REC_FRAME + 패킷(VIDEO_HDR + payload)]*,  색인(파일명.idx): [REC_INDEX]* (키 프레임마다, 시각 순)
+RECORD_DIR     = os.environ.get("RD_RECORD_DIR", "")   # 비어 있으면 녹화 안 함. 연결 세션(첫 접속~모두 끊김)마다 파일 1개
+RECORD_EXT     = ".tvr"
+RECORD_KEYINT_SEC = 5.0  # 녹화 스트림에 전체(키) 프레임을 끼우는 간격(초) → 탐색 시 최대 이만큼만 앞에서부터 적용
+REC_MAGIC      = b"TVREC\x00\x00\x01"
+REC_HDR        = struct.Struct(">8sq")     # 매직, 세션 시작 시각(서버 시계 µs)
+REC_FRAME      = struct.Struct(">qBI")     # 캡처 시각(서버 시계 µs), 플래그(REC_KEY), 패킷 길이 (+ 패킷)
+REC_INDEX      = struct.Struct(">qQ")      # 키 프레임 캡처 시각(µs), 파일 안 REC_FRAME 위치
+REC_KEY        = 0x01
+
+# ----- 서버 네트워크(server/aio.py): 세 서버가 asyncio 루프 스레드 1개를 같이 씀(연결마다 스레드 없음) -----
+NET_IO_THREADS    = 4     # 블로킹 작업(파일 전송/디스크) 실행기 스레드 수. 연결 수와 무관하게 고정
+NET_BACKLOG       = 128   # listen 대기열
+VIDEO_MAX_CONNS   = 32    # 서버별 동시 연결 상한(수용 제어): 넘으면 accept 직후 닫음
+CONTROL_MAX_CONNS = 128   # (합계는 Windows select 한도 512 안쪽으로)
+FILE_MAX_CONNS    = 256   # 파일 요청은 NET_IO_THREADS개씩 처리, 나머지는 순서대로 대기
+FILE_IO_TIMEOUT   = 30.0  # 파일 연결 요청 수신/전송이 이 시간(초) 동안 멈추면 끊음(느린 연결이 실행기를 붙잡지 않게)
+
+# ----- 중계 노드(server/relay.py): 상위 스트림 1개를 하위 시청자 여러 명에게 그대로 전달, 이어 붙여 확장 -----
+RELAY_MAX_CONNS    = 256   # 중계 노드 하나의 시청자 상한
+RELAY_RETRY_SEC    = 2.0   # 상위 연결이 끊기면 이 간격으로 재접속(시청자 연결은 유지)
+RELAY_KEY_INTERVAL = 1.0   # 상위에 전체(키) 프레임을 요청하는 최소 간격(초)
+
+# ----- UDP 영상 전송(선택): 화면 패킷만 UDP로(제어 메시지/알림/커서는 그대로 TCP). 접속할 때 협상하고 안 되면 TCP -----
+# 프레임 바이트(VIDEO_HDR + FRAME_META + payload)를 UDP_SHARD 조각으로 자르고, 데이터 UDP_FEC_GROUP개마다
+# 리드-솔로몬 패리티 UDP_FEC_PARITY개(fec.py) → 묶음마다 그만큼 유실돼도 복구. 복구 못 한 프레임은 기다리지 않고 건너뜀
+VIDEO_TRANSPORT = os.environ.get("RD_VIDEO_TRANSPORT", "tcp")   # 클라이언트: "udp"면 UDP 요청
+UDP_HDR        = struct.Struct(">IIHHBB")  # 프레임 순번(FRAME_META와 같음), 프레임 바이트 수, 조각 번호, 데이터 조각 수, 묶음 크기, 묶음당 패리티 수
+UDP_PROBE      = struct.Struct(">4sI")     # 클라이언트 → 서버 UDP: 매직, 토큰(TCP로 받은 값) → 서버가 보낼 주소를 알게 됨
+UDP_MAGIC      = b"RDU1"
+UDP_SHARD      = 1200    # 조각 크기(바이트): 헤더를 더해도 MTU 1500 안쪽
+UDP_FEC_GROUP  = 24      # 데이터 조각 수/묶음
+UDP_FEC_PARITY = 6       # 패리티 조각 수/묶음(오버헤드 25%)
+UDP_PROBE_SEC  = 2.0     # 이 시간 안에 UDP 경로가 확인되지 않으면 TCP로 계속
+UDP_FALLBACK_WINDOW = 50     # (클라이언트) 최근 이만큼의 프레임 중
+UDP_FALLBACK_LOSS   = 0.3    # 복구 못 한 비율이 이 이상이면 TCP로 되돌림
+UDP_FALLBACK_STALL  = 3.0    # (서버) UDP 프레임 ack가 이 시간(초) 동안 없으면 TCP로 되돌림
+UDP_LOSS       = float(os.environ.get("RD_UDP_LOSS", "0"))   # 시험용 손실 흉내: 클라이언트가 받은 데이터그램을 이 확률로 버림
+
+# ----- 다중화 연결(server/mux.py, client/mux.py): 영상/제어/파일 채널을 TCP 하나에 프레임으로 나눠 실음 -----
+# 연결 시작: MUX_MAGIC, 이후 양방향 [MUX_HDR + payload]*. 클라이언트가 스트림 번호를 정해 OPEN(payload = 채널 1바이트)하면
+# 서버는 그 채널 서버에 연결 하나로 붙임 → 스트림 안의 바이트는 기존 포트별 프로토콜 그대로
+# 보낼 때는 준비된 스트림 중 우선순위가 높은 것부터 MUX_CHUNK씩 → 작은 제어 메시지가 영상/파일 대용량 데이터를 앞지름
+# 스트림마다 방향별 창(MUX_WINDOW): 받은 쪽이 채널 쪽에 넘긴 만큼 CREDIT(payload = MUX_CREDIT_LEN)으로 돌려줌
+# → 안 읽히는 스트림은 그 스트림만 멈추고(역압), 연결의 수신은 다른 스트림을 계속 처리
+MUX_ENABLED    = os.environ.get("RD_MUX", "1") != "0"   # 클라이언트: "0"이면 포트별 연결(호환 모드)만
+MUX_MAGIC      = b"RDX2"
+MUX_HDR        = struct.Struct(">HBI")     # 스트림 번호, 종류(MUX_OPEN/DATA/CLOSE/CREDIT), payload 길이
+MUX_OPEN, MUX_DATA, MUX_CLOSE, MUX_CREDIT = 0, 1, 2, 3
+MUX_CREDIT_LEN = struct.Struct(">I")       # CREDIT payload: 더 보내도 되는 바이트 수
+MUX_VIDEO, MUX_CONTROL, MUX_FILE = 0, 1, 2   # 채널
+MUX_PRIORITY   = {MUX_CONTROL: 0, MUX_VIDEO: 1, MUX_FILE: 2}   # 작을수록 먼저
+MUX_CHUNK      = 16 * 1024   # DATA 프레임 최대 payload: 대용량 채널이 한 번에 회선을 붙잡는 양
+MUX_PAIR_BUF   = 256 * 1024  # 스트림마다 내부 소켓 쌍 버퍼 → 넘치면 채널 서버/클라이언트에 역압(영상 ABR이 그대로 동작)
+MUX_WINDOW     = 512 * 1024  # 스트림 하나가 CREDIT 없이 보낼 수 있는 양 = 받는 쪽 스트림별 버퍼 상한
+MUX_MAX_CONNS  = 64          # 다중화 연결 상한(채널 연결은 각 서버의 상한도 따름)
+MUX_MAX_STREAMS = 64         # 다중화 연결 하나의 동시 스트림 상한
+
+# ----- 제어 채널: 길이(>I) + JSON 메시지. 서버가 hello에 v2로 답하면 입력 이벤트는 고정 크기 이진 묶음으로 -----
+# 이진 묶음 = 길이에 CTRL_BIN_FLAG를 켠 프레임, 내용은 [CTRL_EVENT]* (JSON 메시지는 64KB 이하라 이 비트가 켜지지 않음)
+CONTROL_VERSION = 2
+CTRL_BIN_FLAG  = 0x80000000
+CTRL_EVENT     = struct.Struct(">BBhh")    # 종류, 인자(버튼 번호/가상 키), a, b(좌표 x, y 또는 휠 delta)
+EV_MOVE, EV_DOWN, EV_UP, EV_WHEEL, EV_KEY_DOWN, EV_KEY_UP = 1, 2, 3, 4, 5, 6
+CTRL_BUTTONS   = ("left", "right", "middle")   # EV_DOWN/EV_UP의 버튼 번호
+CONTROL_QUEUE_MAX = 256      # 클라이언트 송신 대기열 상한(이벤트 수). 넘치면 오래된 마우스 이동부터 버림(버튼/키는 버리지 않음)
+CONTROL_RETRY_MIN = 0.5      # 제어 연결이 끊기면 송신 스레드가 이 간격부터 두 배씩 늘려 재연결
+CONTROL_RETRY_MAX = 5.0
+MOUSE_MOVE_INTERVAL_MS = 8   # 클라이언트: 마우스 이동은 이 간격(ms)에 최대 1번(사이 이동은 마지막 위치만). 버튼/키 전에는 바로 보냄
+# 입력 주입 백엔드(server/inject.py): "auto" | "sendinput"(Windows) | "xtest"(Linux X11) | "record"(메모리 기록, 시험용) | "none"
+INPUT_BACKEND  = os.environ.get("RD_INPUT_BACKEND", "auto")
+
+# ----- 모니터: 1부터(mss 번호). 클라이언트 연결 하나가 모니터 하나를 구독, 여러 개는 창을 더 엶 -----
+DEFAULT_MONITOR = 1
+
+# ----- 코덱: 접속 시 클라이언트가 요청, 서버에 PyAV가 없으면 MJPEG(타일/띠)로 대체 -----
+VIDEO_CODECS   = ("mjpeg", "h264")
+DEFAULT_CODEC  = "mjpeg"
+H264_KEYINT_SEC = 2.0    # 주기적 키프레임 간격(초)
+
+# ----- 내용별 영역 코덱: 글자/단색 UI 타일은 팔레트+zlib(무손실), 사진 타일은 JPEG -----
+TILE_JPEG      = 0
+TILE_PALETTE   = 1
+REGION_LOSSLESS    = True
+REGION_FLAT_COLORS = 16    # 이 이하 색이면 단색 UI로 보고 무손실
+REGION_MAX_COLORS  = 256   # 이보다 색이 많으면 사진으로 보고 JPEG
+REGION_EDGE_DELTA  = 48    # 이웃 픽셀과 채널 차가 이보다 크면 에지
+REGION_EDGE_RATIO  = 0.02  # 그 사이 색 수면 에지 비율이 이 이상일 때만 글자로 보고 무손실
+REGION_ZLIB_LEVEL  = 6
+REGION_SAMPLE_STEP   = 4     # 사진 빨리 거르기: 타일을 이 간격으로 표본(64px 타일 → 256개)
+REGION_SAMPLE_COLORS = 128   # 표본 색 수가 이보다 많으면 전체 분류 없이 사진(JPEG)
+REGION_PHOTO_RATIO   = 0.5   # 전체 프레임에서 사진 타일이 이 비율을 넘으면 영역 코덱을 건너뛰고 JPEG만
+REGION_SKIP_MIN      = 8     # PKT_REGIONS가 JPEG보다 크지 않으면 이만큼의 전체 프레임은 분류 없이 JPEG(질 때마다 두 배)
+REGION_SKIP_MAX      = 256
+
 def get_local_ip() -> str:
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     try:
@@ -0,0 +1,65 @@
+# fec.py
+# UDP 영상 전송용 소거 부호: 서버(server/udp.py)가 패리티를 만들고 클라이언트(client/udp.py)가 복구
+# GF(2^8) 코시 행렬 리드-솔로몬(체계적 부호): 묶음마다 데이터 조각 k개 + 패리티 m개, 그중 아무 k개만 도착하면 전부 복구
+import functools
+import numpy as np
+
+def _tables():
+    exp = np.zeros(512, dtype=np.int32); log = np.zeros(256, dtype=np.int32); x = 1
+    for i in range(255):
+        exp[i] = x; log[x] = i
+        x <<= 1
+        if x & 0x100: x ^= 0x11D   # x^8 + x^4 + x^3 + x^2 + 1
+    exp[255:510] = exp[:255]
+    mul = np.zeros((256, 256), dtype=np.uint8)   # 곱셈표: MUL[a][조각 배열] 한 번으로 조각 전체를 곱함
+    a = np.arange(1, 256)
+    mul[1:, 1:] = exp[log[a][:, None] + log[a][None, :]]
+    return exp, log, mul
+
+_EXP, _LOG, MUL = _tables()
+
+def _inv(a: int) -> int:
+    return int(_EXP[255 - _LOG[a]])
+
+def parity_count(k: int, group: int, parity: int) -> int:
+    # 마지막 묶음처럼 데이터 조각이 group개보다 적으면 패리티도 비율만큼(최소 1개)
+    return min(parity, max(1, -(-k * parity // group)))
+
+@functools.lru_cache(maxsize=64)
+def cauchy(m: int, k: int) -> np.ndarray:
+    # 패리티 j, 데이터 i의 계수 1/(x_j + y_i), x_j = k + j, y_i = i → 어떤 정사각 부분행렬도 역행렬이 있음 (k + m <= 256)
+    return np.array([[_inv((k + j) ^ i) for i in range(k)] for j in range(m)], dtype=np.uint8)
+
+def encode(data: np.ndarray, m: int) -> np.ndarray:
+    # data: (k, 조각 크기) uint8 → 패리티 (m, 조각 크기)
+    c = cauchy(m, data.shape[0])
+    return np.bitwise_xor.reduce(MUL[c[:, :, None], data[None, :, :]], axis=1)
+
+def recover(shards: list, k: int, m: int) -> list | None:
+    # shards: 데이터 k개 + 패리티 m개(같은 크기 uint8 배열, 못 받은 것은 None) → 데이터 k개. 부족하면 None
+    miss = [i for i in range(k) if shards[i] is None]
+    if not miss: return shards[:k]
+    par = [j for j in range(m) if shards[k + j] is not None][:len(miss)]
+    if len(par) < len(miss): return None
+    c = cauchy(m, k); have = [i for i in range(k) if shards[i] is not None]
+    # 받은 데이터 조각의 몫을 빼면 남는 값 = 빠진 조각들의 선형 결합(e×e 코시 부분행렬)
+    rhs = np.stack([shards[k + j] for j in par])
+    if have:
+        rhs ^= np.bitwise_xor.reduce(MUL[c[np.ix_(par, have)][:, :, None], np.stack([shards[i] for i in have])[None]], axis=1)
+    inv = _invert([[int(c[j, i]) for i in miss] for j in par])
+    out = list(shards[:k])
+    for r, i in enumerate(miss):
+        out[i] = np.bitwise_xor.reduce(MUL[np.array(inv[r], dtype=np.uint8)[:, None], rhs], axis=0)
+    return out
+
+def _invert(a: list[list[int]]) -> list[list[int]]:
+    # GF(2^8) 가우스-조르단(행렬은 빠진 조각 수 크기라 작음)
+    n = len(a); a = [row[:] + [int(i == r) for i in range(n)] for r, row in enumerate(a)]
+    for col in range(n):
+        piv = next(r for r in range(col, n) if a[r][col])
+        a[col], a[piv] = a[piv], a[col]
+        f = _inv(a[col][col]); a[col] = [int(MUL[f, v]) for v in a[col]]
+        for r in range(n):
+            if r != col and a[r][col]:
+                g = a[r][col]; a[r] = [v ^ int(MUL[g, w]) for v, w in zip(a[r], a[col])]
+    return [row[n:] for row in a]
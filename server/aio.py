@@ -0,0 +1,155 @@
+# server/aio.py
+import sys, json, struct, socket, asyncio, threading, traceback
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QObject
+
+from common import NET_IO_THREADS, NET_BACKLOG, CTRL_BIN_FLAG
+
+# ===== 네트워크 이벤트 루프: 프로세스에 하나, 영상/제어/파일 서버가 같이 씀 =====
+class NetLoop:
+    _inst = None
+    _guard = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "NetLoop":
+        with cls._guard:
+            if cls._inst is None: cls._inst = cls()
+            return cls._inst
+
+    def __init__(self):
+        # 영상 송신이 add_reader/add_writer를 쓰므로 Windows에서도 Proactor가 아닌 Selector 루프
+        self.loop = asyncio.SelectorEventLoop()
+        self.executor = ThreadPoolExecutor(NET_IO_THREADS, thread_name_prefix="net-io")   # 블로킹 파일/디스크 작업
+        self.loop.set_default_executor(self.executor)
+        self._thread = threading.Thread(target=self.loop.run_forever, name="net-loop", daemon=True)
+        self._thread.start()
+
+    def call(self, fn, *args):
+        # 다른 스레드(UI/캡처/인코딩)에서 루프 스레드로 넘김
+        self.loop.call_soon_threadsafe(fn, *args)
+
+def listen_socket(host: str, port: int) -> socket.socket:
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind((host, port)); srv.listen(NET_BACKLOG); srv.setblocking(False)
+    return srv
+
+async def sock_recv_exact(sock: socket.socket, n: int) -> bytes | None:
+    loop = asyncio.get_running_loop(); buf = bytearray()
+    while len(buf) < n:
+        chunk = await loop.sock_recv(sock, n - len(buf))
+        if not chunk: return None
+        buf += chunk
+    return bytes(buf)
+
+async def sock_messages(sock: socket.socket, limit: int, binary: bool = False):
+    # 길이(>I) + JSON 메시지: 한 번에 읽은 만큼 모두 꺼내서 목록으로(작은 메시지마다 recv 2번 하지 않고,
+    # 밀려 있던 메시지를 받는 쪽이 한꺼번에 보고 합칠 수 있음). 끊기면 끝
+    # binary=True → 길이에 CTRL_BIN_FLAG가 켜진 프레임은 파싱하지 않고 bytes로 넘김(제어 채널 이진 입력 묶음)
+    loop = asyncio.get_running_loop(); buf = bytearray()
+    while True:
+        data = await loop.sock_recv(sock, 64 * 1024)
+        if not data: return
+        buf += data; off = 0; msgs = []
+        while len(buf) - off >= 4:
+            n = struct.unpack_from(">I", buf, off)[0]
+            raw = binary and n & CTRL_BIN_FLAG
+            if raw: n &= ~CTRL_BIN_FLAG
+            if n > limit: raise ValueError("메시지가 너무 큽니다")
+            if len(buf) - off < 4 + n: break
+            body = bytes(buf[off+4:off+4+n]); off += 4 + n
+            msgs.append(body if raw else json.loads(body.decode("utf-8", errors="ignore")))
+        del buf[:off]
+        if msgs: yield msgs
+
+# ===== 루프 위의 TCP 서버: QThread와 같은 start/stop/wait + Qt 시그널(ServerWindow는 그대로) =====
+class LoopServer(QObject):
+    # 연결 하나 = 코루틴 하나(handle). 상한(max_conns)을 넘는 연결은 accept 직후 닫음
+    # 하위 클래스는 async def handle(self, c, ip)를 구현: 연결이 끝나면 반환, 예외 → 그 연결만 닫음(소켓은 _conn_main이 닫음)
+    def __init__(self, host: str, port: int, max_conns: int):
+        super().__init__()
+        self.host = host; self.port = port
+        self.max_conns = max_conns
+        self.net = NetLoop.shared()
+        self._task = None
+        self._done = threading.Event(); self._done.set()
+        self._conns: dict[socket.socket, asyncio.Task] = {}   # 루프 스레드에서만
+        self.rejected = 0
+
+    def start(self):
+        if not self._done.is_set(): return
+        self._done.clear()
+        self.net.call(self._spawn)
+
+    def stop(self):
+        self.net.call(self._cancel)
+
+    def wait(self, msecs: int | None = None) -> bool:
+        return self._done.wait(None if msecs is None else msecs / 1000)
+
+    def isRunning(self) -> bool:
+        return not self._done.is_set()
+
+    def force_disconnect_all(self):
+        self.net.call(self._drop_all)
+
+    def _spawn(self):
+        self._task = self.net.loop.create_task(self._main())
+
+    def _cancel(self):
+        if self._task is not None: self._task.cancel()
+
+    def _drop_all(self):
+        for t in list(self._conns.values()): t.cancel()
+
+    def _drop(self, c: socket.socket):
+        # 루프 스레드에서: 이 연결의 코루틴을 끝냄(정리는 handle의 finally)
+        t = self._conns.get(c)
+        if t is not None: t.cancel()
+
+    async def _main(self):
+        try:
+            await self.serve()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            traceback.print_exc(file=sys.stderr)   # bind 실패 등: QThread.run에서 난 예외처럼 출력만
+        finally:
+            self._task = None; self._done.set()
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        srv = listen_socket(self.host, self.port)
+        try:
+            while True:
+                try:
+                    c, addr = await loop.sock_accept(srv)
+                except (ConnectionError, InterruptedError):
+                    continue
+                except OSError:
+                    await asyncio.sleep(0.1); continue   # 파일 디스크립터 부족 등 → 잠깐 쉬고 다시
+                if not self.attach(c, addr[0] if addr else ""):
+                    try: c.close()
+                    except OSError: pass
+        finally:
+            srv.close()
+            tasks = list(self._conns.values())
+            for t in tasks: t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def attach(self, c: socket.socket, ip: str) -> bool:
+        # 루프 스레드에서: 연결 하나를 handle 코루틴으로 받음(accept한 소켓 또는 다중화 연결의 스트림). False → 상한/정지 중
+        if self._task is None or len(self._conns) >= self.max_conns:
+            self.rejected += 1; return False
+        self._conns[c] = self.net.loop.create_task(self._conn_main(c, ip))
+        return True
+
+    async def _conn_main(self, c: socket.socket, ip: str):
+        try:
+            await self.handle(c, ip)
+        except Exception:
+            pass   # 연결 오류/형식 오류 → 이 연결만 닫음
+        finally:
+            self._conns.pop(c, None)
+            try: c.close()
+            except OSError: pass
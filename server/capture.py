@@ -0,0 +1,203 @@
+# server/capture.py
+import sys, math
+import numpy as np, cv2
+try:
+    from mss import mss   # 기본 소스: 실제 화면
+except ImportError:
+    mss = None
+
+from utils import FramePool
+
+# ===== 프레임 소스: 영상 서버의 캡처 단계가 읽는 화면 =====
+# 소스는 모두 같은 모양:
+#   monitors   mss와 같은 목록. 0번 = 전체 가상 화면, 1번부터 모니터 {left, top, width, height}
+#   grab(m, pool) → 모니터 m의 BGR 프레임(pool 버퍼). 캡처 스레드에서만 호출
+#   close()
+# common.py의 FRAME_SOURCE(환경 변수 RD_FRAME_SOURCE)로 고름:
+#   "mss" | "synthetic[:장면[:WxH]]" | "replay:파일 경로"
+SYNTHETIC_SCENES = ("static", "typing", "scrolling", "video")
+
+def open_source(spec: str):
+    kind, _, arg = (spec or "mss").partition(":")
+    if kind == "mss": return MssSource()
+    if kind == "synthetic":
+        scene, _, size = arg.partition(":")
+        w, h = (int(v) for v in size.lower().split("x")) if size else (1920, 1080)
+        return SyntheticSource(scene or "static", w, h)
+    if kind == "replay": return ReplaySource(arg)
+    raise ValueError(f"알 수 없는 프레임 소스: {spec}")
+
+def _monitor_list(sizes: list[tuple[int, int]]) -> list[dict]:
+    # 모니터를 가로로 나란히 놓은 mss 형식 목록
+    mons, x = [], 0
+    for w, h in sizes:
+        mons.append({"left": x, "top": 0, "width": w, "height": h}); x += w
+    return [{"left": 0, "top": 0, "width": x, "height": max(h for _, h in sizes)}] + mons
+
+# ----- 실제 화면(mss) -----
+class MssSource:
+    def __init__(self):
+        if mss is None: raise RuntimeError("mss가 설치되어 있지 않습니다 (pip install mss)")
+        with mss() as sct:
+            self.monitors = [dict(m) for m in sct.monitors]
+        self._sct = None   # mss 핸들은 스레드별이라 캡처 스레드에서 처음 grab할 때 염
+
+    def grab(self, m: int, pool: FramePool) -> np.ndarray:
+        if self._sct is None: self._sct = mss()
+        # mss 버퍼를 복사 없이 BGRA 뷰로 보고, 재사용 버퍼에 바로 BGR 변환
+        shot = self._sct.grab(self._sct.monitors[m])
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=pool.take((shot.height, shot.width, 3)))
+
+    def close(self):
+        if self._sct is not None:
+            try: self._sct.close()
+            except Exception: pass
+            self._sct = None
+
+# ----- 합성 화면: 디스플레이 없는 환경/벤치마크용. grab 횟수만 보고 그리므로 매번 같은 입력 -----
+class SyntheticSource:
+    # static    바탕화면 + 글자 있는 창, 변화 없음(유휴 FPS/타일 델타 0 확인)
+    # typing    편집기 창에 글자가 한 글자씩 늘어남(작은 변경 타일, 무손실 글자 타일)
+    # scrolling 문서 창이 몇 줄씩 위로 밀림(창 전체가 바뀌지만 내용은 글자)
+    # video     화면 대부분이 매 프레임 바뀌는 사진 같은 움직임(JPEG/H.264, ABR)
+    TEXT = ("The quick brown fox jumps over the lazy dog. 0123456789 "
+            "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor. ")
+
+    def __init__(self, scene: str = "static", w: int = 1920, h: int = 1080, count: int = 1):
+        if scene not in SYNTHETIC_SCENES: raise ValueError(f"알 수 없는 합성 장면: {scene}")
+        self.scene = scene
+        self.monitors = _monitor_list([(w, h)] * max(1, count))
+        self._ticks: dict[int, int] = {}
+        self._desk: dict[int, np.ndarray] = {}     # 모니터별 고정 바탕(창 포함)
+        self._doc = None                           # scrolling: 창보다 긴 문서 이미지
+        self._noise = None                         # video: 고정 잡음(시드 고정)
+
+    def grab(self, m: int, pool: FramePool) -> np.ndarray:
+        mon = self.monitors[m]; w, h = mon["width"], mon["height"]
+        n = self._ticks.get(m, 0); self._ticks[m] = n + 1
+        if m not in self._desk: self._desk[m] = self._desktop(w, h, m)
+        out = pool.take((h, w, 3))
+        np.copyto(out, self._desk[m])
+        x0, y0, x1, y1 = self._window(w, h)
+        if self.scene == "typing": self._draw_typing(out, x0, y0, x1, y1, n)
+        elif self.scene == "scrolling": self._draw_scroll(out, x0, y0, x1, y1, n)
+        elif self.scene == "video": self._draw_video(out, x0, y0, x1, y1, n)
+        return out
+
+    def close(self): pass
+
+    @staticmethod
+    def _window(w: int, h: int) -> tuple[int, int, int, int]:
+        return w // 8, h // 8, w - w // 8, h - h // 6
+
+    def _desktop(self, w: int, h: int, m: int) -> np.ndarray:
+        # 세로 그라데이션 바탕 + 작업 표시줄 + 창(제목 표시줄, 흰 본문, 글자 몇 줄)
+        g = np.linspace(0, 1, h, dtype=np.float32)[:, None]
+        img = np.empty((h, w, 3), dtype=np.uint8)
+        for c, (a, b) in enumerate(((120, 60), (80, 40), (40, 20))):
+            img[..., c] = (a + (b - a) * g).astype(np.uint8)
+        cv2.rectangle(img, (0, h - 40), (w, h), (48, 48, 48), -1)
+        x0, y0, x1, y1 = self._window(w, h)
+        cv2.rectangle(img, (x0, y0 - 30), (x1, y0), (200, 120, 40), -1)
+        cv2.putText(img, f"synthetic {self.scene} #{m}", (x0 + 10, y0 - 9), cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                    (255, 255, 255), 1, cv2.LINE_AA)
+        cv2.rectangle(img, (x0, y0), (x1, y1), (255, 255, 255), -1)
+        if self.scene == "static":
+            for i, y in enumerate(range(y0 + 28, y1 - 8, 24)):
+                self._line(img, x0 + 12, y, x1 - 12, i)
+        return img
+
+    def _line(self, img, x: int, y: int, x1: int, i: int):
+        k = i * 37 % len(self.TEXT)
+        text = (self.TEXT[k:] + self.TEXT)[:max(1, (x1 - x) // 10)]
+        cv2.putText(img, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (20, 20, 20), 1, cv2.LINE_AA)
+
+    def _draw_typing(self, out, x0, y0, x1, y1, n: int):
+        # 한 줄에 cols 글자, 창이 차면 처음부터. 프레임마다 2글자
+        cols = max(1, (x1 - x0 - 24) // 10); rows = max(1, (y1 - y0 - 16) // 24)
+        typed = (2 * n) % (cols * rows) + 2
+        text = self.TEXT * (cols * rows // len(self.TEXT) + 1)
+        for r in range((typed - 1) // cols + 1):
+            line = text[r * cols:min(typed, (r + 1) * cols)]
+            cv2.putText(out, line, (x0 + 12, y0 + 28 + r * 24), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                        (20, 20, 20), 1, cv2.LINE_AA)
+        # 마지막 줄 끝에 입력 커서
+        (tw, _), _ = cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+        cx = x0 + 14 + tw; cy = y0 + 28 + r * 24
+        cv2.line(out, (cx, cy - 14), (cx, cy + 4), (0, 0, 0), 2)
+
+    def _draw_scroll(self, out, x0, y0, x1, y1, n: int):
+        # 창 높이의 3배 문서를 프레임마다 6px씩 올리고, 끝나면 처음으로
+        ww, wh = x1 - x0, y1 - y0
+        if self._doc is None or self._doc.shape[1] != ww:
+            doc = np.full((wh * 3, ww, 3), 255, dtype=np.uint8)
+            for i, y in enumerate(range(20, wh * 3, 24)):
+                self._line(doc, 12, y, ww - 12, i)
+                if i % 12 == 0: cv2.rectangle(doc, (12, y + 8), (ww // 3, y + 14), (200, 120, 40), -1)
+            self._doc = np.vstack([doc, doc[:wh]])   # 끝에서 처음으로 이어지게
+        off = (6 * n) % (self._doc.shape[0] - wh)
+        out[y0:y1, x0:x1] = self._doc[off:off + wh]
+
+    def _draw_video(self, out, x0, y0, x1, y1, n: int):
+        # 저해상도 플라스마(사인파 합)를 확대 + 고정 잡음 → 매 프레임 창 전체가 부드럽게 바뀜
+        ww, wh = x1 - x0, y1 - y0
+        sw, sh = max(2, ww // 8), max(2, wh // 8)
+        t = n / 12.0
+        yy, xx = np.mgrid[0:sh, 0:sw].astype(np.float32)
+        v = (np.sin(xx / 7 + t) + np.sin(yy / 5 - t * 1.3) + np.sin((xx + yy) / 9 + t * 0.7)) / 3
+        small = np.empty((sh, sw, 3), dtype=np.uint8)
+        for c, ph in enumerate((0.0, 2.1, 4.2)):
+            small[..., c] = (127 + 120 * np.sin(math.pi * v + ph)).astype(np.uint8)
+        region = out[y0:y1, x0:x1]
+        if self._noise is None or self._noise.shape != region.shape:
+            self._noise = np.random.default_rng(0).integers(0, 16, region.shape, dtype=np.uint8)
+        # region은 연속 메모리가 아니라 dst로 못 넘김 → 결과를 대입
+        region[:] = cv2.add(cv2.resize(small, (ww, wh), interpolation=cv2.INTER_LINEAR),
+                            np.roll(self._noise, n * 3, axis=1))
+
+# ----- 녹화 파일 재생: OpenCV가 여는 동영상(또는 img_%04d.png 같은 이미지 묶음)을 grab마다 한 프레임씩 -----
+class ReplaySource:
+    def __init__(self, path: str, loop: bool = True):
+        self.path = path; self.loop = loop
+        self._cap = cv2.VideoCapture(path)
+        if not self._cap.isOpened(): raise RuntimeError(f"재생할 수 없는 파일: {path}")
+        w = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)); h = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.monitors = _monitor_list([(w, h)])
+        self._last = None   # 마지막으로 내준 프레임(loop가 아니면 끝난 뒤 계속 이것). 잡고 있는 동안 풀이 재사용 안 함
+
+    def grab(self, m: int, pool: FramePool) -> np.ndarray:
+        mon = self.monitors[1]
+        out = pool.take((mon["height"], mon["width"], 3))
+        ok, img = self._cap.read(out)
+        if not ok and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, img = self._cap.read(out)
+        if not ok:
+            if self._last is None: out[:] = 0; self._last = out
+            return self._last
+        if img is not out: np.copyto(out, img)   # 디코더가 다른 버퍼를 돌려준 경우만 복사
+        self._last = out
+        return out
+
+    def close(self):
+        self._cap.release()
+
+# ----- 같은 입력으로 반복 측정할 녹화 파일 만들기 -----
+def record(spec: str, path: str, frames: int, fps: float = 12.0, monitor: int = 1):
+    src = open_source(spec); pool = FramePool()
+    try:
+        mon = src.monitors[monitor]
+        size = (mon["width"], mon["height"])
+        out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"FFV1"), fps, size)   # 무손실
+        if not out.isOpened(): out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+        for _ in range(frames): out.write(src.grab(monitor, pool))
+        out.release()
+    finally:
+        src.close()
+
+if __name__ == "__main__":
+    # 예: python capture.py synthetic:typing typing.avi 240
+    if len(sys.argv) < 4:
+        print("usage: python capture.py <소스> <출력 파일> <프레임 수> [fps]"); sys.exit(2)
+    record(sys.argv[1], sys.argv[2], int(sys.argv[3]), float(sys.argv[4]) if len(sys.argv) > 4 else 12.0)
@@ -0,0 +1,205 @@
+# server/codec.py
+import fractions, zlib
+import numpy as np, cv2
+
+try:
+    import av   # 선택: H.264 모드(libx264, CPU 인코딩)
+except ImportError:
+    av = None
+
+from common import (JPEG_QUALITY, PKT_FRAME, PKT_BANDS, PKT_REGIONS, TILE_HDR, TILE_SIZE, BAND_HDR, BANDS_HDR,
+                    REGION_HDR, PALETTE_HDR, BAND_MIN_HEIGHT, CODEC_THREADS, H264_KEYINT_SEC,
+                    TILE_JPEG, TILE_PALETTE, REGION_LOSSLESS, REGION_FLAT_COLORS, REGION_MAX_COLORS,
+                    REGION_EDGE_DELTA, REGION_EDGE_RATIO, REGION_ZLIB_LEVEL, REGION_SAMPLE_STEP, REGION_SAMPLE_COLORS,
+                    REGION_PHOTO_RATIO, REGION_SKIP_MIN, REGION_SKIP_MAX)
+
+# ===== 기본 JPEG / 축소 =====
+def encode_jpeg(img: np.ndarray, quality: int = JPEG_QUALITY) -> bytes | None:
+    ok, enc = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    return enc.tobytes() if ok else None
+
+def scale_frame(frame: np.ndarray, scale: float) -> np.ndarray:
+    if scale >= 1.0: return frame
+    h, w = frame.shape[:2]
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+# ===== 내용별 영역 코덱: 글자/단색 UI는 팔레트+zlib(무손실), 사진은 JPEG =====
+def color_keys(img: np.ndarray) -> np.ndarray:
+    # BGR 픽셀 → 24비트 정수(색 비교/정렬용)
+    return (img[..., 0].astype(np.uint32) << 16) | (img[..., 1].astype(np.uint32) << 8) | img[..., 2]
+
+def photo_tiles(img: np.ndarray, ts: int = TILE_SIZE) -> np.ndarray:
+    # (행, 열) bool: REGION_SAMPLE_STEP 간격 표본의 색 수가 REGION_SAMPLE_COLORS를 넘는 타일 = 사진
+    # 프레임 전체를 한 번에(타일마다 np.unique를 부르지 않음). 가장자리 타일은 끝 표본을 반복해서 채움(색 수는 그대로)
+    s = REGION_SAMPLE_STEP; k = ts // s
+    h, w = img.shape[:2]; rows, cols = -(-h // ts), -(-w // ts)
+    key = color_keys(img[::s, ::s])
+    if key.shape != (rows * k, cols * k):
+        key = np.pad(key, ((0, rows * k - key.shape[0]), (0, cols * k - key.shape[1])), mode="edge")
+    key = np.sort(key.reshape(rows, k, cols, k).swapaxes(1, 2).reshape(rows, cols, k * k), axis=2)
+    return (key[..., 1:] != key[..., :-1]).sum(axis=2) + 1 > REGION_SAMPLE_COLORS
+
+def encode_palette(tile: np.ndarray) -> tuple[bytes, np.ndarray] | None:
+    # 색 수와 에지 비율로 분류해 무손실이 유리한 타일만 인코딩. 반환: (blob, 가장 많이 쓰인 색)
+    key = color_keys(tile)
+    if (key == key.flat[0]).all():   # 단색(배경) 타일: 정렬 없이 바로
+        idx = np.zeros(key.size, dtype=np.uint8); c = tile.reshape(-1, 3)[0]
+        return PALETTE_HDR.pack(1) + c.tobytes() + zlib.compress(idx.tobytes(), REGION_ZLIB_LEVEL), c
+    s = REGION_SAMPLE_STEP
+    if len(np.unique(key[::s, ::s])) > REGION_SAMPLE_COLORS: return None   # 표본만으로도 사진 → 전체 정렬 생략
+    colors, idx = np.unique(key.ravel(), return_inverse=True)
+    n = len(colors)
+    if n > REGION_MAX_COLORS: return None   # 사진
+    if n > REGION_FLAT_COLORS:
+        edges = np.abs(tile[:, 1:].astype(np.int16) - tile[:, :-1]).max(axis=2) > REGION_EDGE_DELTA
+        if edges.mean() < REGION_EDGE_RATIO: return None   # 색은 적지만 부드러운 그라데이션 → JPEG가 유리
+    pal = np.stack([colors >> 16, (colors >> 8) & 255, colors & 255], axis=1).astype(np.uint8)
+    idx = idx.astype(np.uint8)
+    blob = PALETTE_HDR.pack(n) + pal.tobytes() + zlib.compress(idx.tobytes(), REGION_ZLIB_LEVEL)
+    return blob, pal[np.bincount(idx).argmax()]
+
+def encode_region(tile: np.ndarray, quality: int) -> tuple[int, bytes] | None:
+    # 반환: (타일 코덱, blob)
+    if REGION_LOSSLESS:
+        r = encode_palette(tile)
+        if r is not None: return TILE_PALETTE, r[0]
+    blob = encode_jpeg(tile, quality)
+    return (TILE_JPEG, blob) if blob is not None else None
+
+# ===== 타일 델타 =====
+def dirty_tile_mask(prev: np.ndarray, cur: np.ndarray, ts: int = TILE_SIZE) -> np.ndarray:
+    # (행, 열) bool 마스크: 픽셀이 하나라도 바뀐 타일 = True
+    h, w = cur.shape[:2]
+    diff = (prev != cur).any(axis=2)
+    rows, cols = -(-h // ts), -(-w // ts)
+    if rows * ts != h or cols * ts != w:   # 가장자리 타일: ts 배수로 패딩
+        pad = np.zeros((rows * ts, cols * ts), dtype=bool); pad[:h, :w] = diff; diff = pad
+    return diff.reshape(rows, ts, cols, ts).any(axis=(1, 3))
+
+def encode_tiles(frame: np.ndarray, mask: np.ndarray, ts: int = TILE_SIZE, quality: int = JPEG_QUALITY,
+                 pool=None) -> bytes:
+    # payload = [TILE_HDR + blob] * 변경 타일 수. 타일이 많으면 스레드 풀에서 병렬 인코딩
+    tiles = [frame[int(r)*ts:int(r)*ts+ts, int(c)*ts:int(c)*ts+ts] for r, c in zip(*np.nonzero(mask))]
+    coords = [(int(c) * ts, int(r) * ts) for r, c in zip(*np.nonzero(mask))]
+    enc = lambda t: encode_region(t, quality)
+    blobs = pool.map(enc, tiles) if pool is not None and len(tiles) > CODEC_THREADS else map(enc, tiles)
+    parts = []
+    for (x, y), tile, r in zip(coords, tiles, blobs):
+        if r is None: continue
+        th, tw = tile.shape[:2]
+        parts.append(TILE_HDR.pack(x, y, tw, th, r[0], len(r[1]))); parts.append(r[1])
+    return b"".join(parts)
+
+# ===== 전체 프레임: 가로 띠(band) N개를 코어마다 병렬 JPEG =====
+def band_count(h: int) -> int:
+    return max(1, min(CODEC_THREADS, h // BAND_MIN_HEIGHT))
+
+def encode_bands(img: np.ndarray, quality: int, pool, n: int) -> list[bytes] | None:
+    # payload = BANDS_HDR(w,h) + [BAND_HDR + jpeg] * n. 띠 높이는 16의 배수(JPEG MCU 경계)
+    h, w = img.shape[:2]
+    step = -(-h // n); step = -(-step // 16) * 16
+    ys = list(range(0, h, step))
+    blobs = list(pool.map(lambda y: encode_jpeg(img[y:y+step], quality), ys))
+    if any(b is None for b in blobs): return None
+    parts = [BANDS_HDR.pack(w, h)]
+    for y, blob in zip(ys, blobs):
+        parts.append(BAND_HDR.pack(y, min(step, h - y), len(blob))); parts.append(blob)
+    return parts
+
+def encode_base(img: np.ndarray, quality: int, pool=None) -> tuple[int, list[bytes]] | None:
+    # 반환: (패킷 타입, payload 버퍼 목록). 큰 화면은 PKT_BANDS, 작으면 JPEG 1장(PKT_FRAME)
+    n = band_count(img.shape[0]) if pool is not None else 1
+    if n > 1:
+        parts = encode_bands(img, quality, pool, n)
+        return (PKT_BANDS, parts) if parts else None
+    blob = encode_jpeg(img, quality)
+    return (PKT_FRAME, [blob]) if blob is not None else None
+
+class RegionCache:
+    # 스트림별 타일 분류 결과(프레임 사이 유지, 인코딩 스레드에서만). 바뀐 타일은 부르는 쪽이 evict
+    def __init__(self):
+        self.tiles: dict[tuple[int, int], tuple | None] = {}   # (x, y) → encode_palette 결과(None = 사진)
+        self.skip = 0      # 남은 "분류 없이 JPEG" 전체 프레임 수
+        self.backoff = 0   # PKT_REGIONS가 JPEG보다 크지 않을 때마다 두 배(REGION_SKIP_MIN~MAX), 이기면 0
+
+    def evict(self, mask: np.ndarray, ts: int = TILE_SIZE):
+        for r, c in zip(*np.nonzero(mask)): self.tiles.pop((int(c) * ts, int(r) * ts), None)
+
+    def clear(self):
+        self.tiles.clear()
+
+    def lost(self):
+        self.backoff = min(REGION_SKIP_MAX, max(REGION_SKIP_MIN, self.backoff * 2)); self.skip = self.backoff
+
+def encode_full(img: np.ndarray, quality: int, pool=None, ts: int = TILE_SIZE,
+                cache: RegionCache | None = None) -> tuple[int, list[bytes]] | None:
+    # 무손실 타일이 있으면 PKT_REGIONS: 바탕 JPEG에서는 그 자리를 단색으로 지워 거의 0바이트로 만들고 타일을 덮어씀
+    # 분류는 처음 보는/바뀐 타일만(cache). 대부분 사진이거나 PKT_REGIONS가 JPEG보다 크면 JPEG만
+    if not REGION_LOSSLESS: return encode_base(img, quality, pool)
+    if cache is None: cache = RegionCache()
+    if cache.skip > 0:
+        cache.skip -= 1; return encode_base(img, quality, pool)   # 글자 스크롤 등: 얼마 전 영역 코덱이 졌음
+    known = cache.tiles
+    h, w = img.shape[:2]
+    coords = [(x, y) for y in range(0, h, ts) for x in range(0, w, ts)]
+    todo = [xy for xy in coords if xy not in known]
+    if todo:
+        photo = photo_tiles(img, ts)
+        for xy in todo:
+            if photo[xy[1] // ts, xy[0] // ts]: known[xy] = None
+        todo = [xy for xy in todo if xy not in known]
+    if sum(1 for xy in coords if xy in known and known[xy] is None) > len(coords) * REGION_PHOTO_RATIO:
+        return encode_base(img, quality, pool)   # 영상 재생 등: 남은 타일도 분류하지 않음
+    enc = lambda xy: encode_palette(img[xy[1]:xy[1]+ts, xy[0]:xy[0]+ts])
+    for xy, r in zip(todo, pool.map(enc, todo) if pool is not None else map(enc, todo)): known[xy] = r
+    found = [known[xy] for xy in coords]
+    plain = encode_base(img, quality, pool)
+    if plain is None or not any(r is not None for r in found): return plain
+    base = img.copy(); tiles = []
+    for (x, y), r in zip(coords, found):
+        if r is None: continue
+        t = base[y:y+ts, x:x+ts]; t[:] = r[1]
+        tiles.append(TILE_HDR.pack(x, y, t.shape[1], t.shape[0], TILE_PALETTE, len(r[0]))); tiles.append(r[0])
+    enc = encode_base(base, quality, pool)
+    if enc is None: return plain
+    size = sum(map(len, enc[1])) + sum(map(len, tiles))
+    if size >= sum(map(len, plain[1])): cache.lost(); return plain   # 무손실 타일이 오히려 큼(색이 많은 글자 등)
+    cache.backoff = 0
+    return PKT_REGIONS, [REGION_HDR.pack(enc[0], sum(map(len, enc[1]))), *enc[1], *tiles]
+
+# ===== H.264(프레임 간 압축): 영상 재생/스크롤에 유리 =====
+def h264_available() -> bool:
+    return av is not None
+
+class H264Encoder:
+    # libx264 저지연 설정(B프레임 없음, 프레임마다 바로 출력). yuv420p라 짝수 크기로 잘라서 인코딩
+    def __init__(self, w: int, h: int, quality: int, fps: float):
+        self.w = w & ~1; self.h = h & ~1
+        crf = max(18, min(45, round(51 - quality * 0.35)))   # JPEG 화질(30~95) → x264 CRF
+        ctx = av.CodecContext.create("libx264", "w")
+        ctx.width = self.w; ctx.height = self.h; ctx.pix_fmt = "yuv420p"
+        ctx.time_base = fractions.Fraction(1, 1000)
+        ctx.options = {"preset": "ultrafast", "tune": "zerolatency", "crf": str(crf),
+                       "g": str(max(1, round(fps * H264_KEYINT_SEC)))}
+        self.ctx = ctx
+        self._t0 = None; self._pts = -1
+
+    def fits(self, img: np.ndarray) -> bool:
+        return (img.shape[1] & ~1, img.shape[0] & ~1) == (self.w, self.h)
+
+    def encode(self, img: np.ndarray, ts: float, key: bool = False) -> bytes:
+        # key=True → IDR 강제(새 시청자/유실 복구). SPS/PPS는 IDR마다 같이 나감
+        f = av.VideoFrame.from_ndarray(np.ascontiguousarray(img[:self.h, :self.w]), format="bgr24")
+        if self._t0 is None: self._t0 = ts
+        self._pts = max(self._pts + 1, int((ts - self._t0) * 1000)); f.pts = self._pts
+        if key: f.pict_type = av.video.frame.PictureType.I
+        return b"".join(bytes(p) for p in self.ctx.encode(f))
+
+def h264_is_key(au: bytes) -> bool:
+    # Annex-B 접근 단위에 IDR(5) 또는 SPS(7) NAL이 있으면 앞 프레임 없이 디코딩 가능(중계 노드가 새 시청자 합류 시점 판단)
+    i = au.find(b"\x00\x00\x01")
+    while 0 <= i < len(au) - 3:
+        if (au[i + 3] & 0x1F) in (5, 7): return True
+        i = au.find(b"\x00\x00\x01", i + 3)
+    return False
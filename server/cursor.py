@@ -0,0 +1,100 @@
+# server/cursor.py
+import sys, ctypes
+import numpy as np
+
+# ===== 원격 커서(위치/모양) 읽기: 화면 프레임과 별도로 가볍게 보냄 =====
+class CursorSource:
+    # Windows: GetCursorInfo(위치/핸들) + DrawIconEx(모양). 다른 OS에서는 ok=False(커서 채널 없음)
+    def __init__(self):
+        self.ok = sys.platform == "win32"
+        self.version = 0     # 모양이 바뀔 때마다 +1
+        self.shape = None    # (w, h, 핫스팟 x, y, BGRA ndarray(h, w, 4)) 또는 None(기본 화살표)
+        self._handle = None
+        if self.ok:
+            try: self._init_win()
+            except Exception: self.ok = False
+
+    def poll(self) -> tuple[int, int, bool] | None:
+        # 반환: (x, y, 보임 여부) 가상 화면 좌표. 커서 핸들이 바뀌었으면 모양도 새로 읽음
+        if not self.ok: return None
+        ci = self._CURSORINFO(); ci.cbSize = ctypes.sizeof(ci)
+        if not self._u32.GetCursorInfo(ctypes.byref(ci)): return None
+        visible = bool(ci.flags & 0x1)   # CURSOR_SHOWING
+        if visible and ci.hCursor != self._handle:
+            self._handle = ci.hCursor
+            try: self.shape = self._read_shape(ci.hCursor)
+            except Exception: self.shape = None
+            self.version += 1
+        return ci.pt.x, ci.pt.y, visible
+
+    # ---- Windows GDI ----
+    def _init_win(self):
+        from ctypes import wintypes as wt
+        class CURSORINFO(ctypes.Structure):
+            _fields_ = [("cbSize", wt.DWORD), ("flags", wt.DWORD), ("hCursor", wt.HANDLE), ("pt", wt.POINT)]
+        class ICONINFO(ctypes.Structure):
+            _fields_ = [("fIcon", wt.BOOL), ("xHotspot", wt.DWORD), ("yHotspot", wt.DWORD),
+                        ("hbmMask", wt.HBITMAP), ("hbmColor", wt.HBITMAP)]
+        class BITMAP(ctypes.Structure):
+            _fields_ = [("bmType", wt.LONG), ("bmWidth", wt.LONG), ("bmHeight", wt.LONG), ("bmWidthBytes", wt.LONG),
+                        ("bmPlanes", wt.WORD), ("bmBitsPixel", wt.WORD), ("bmBits", ctypes.c_void_p)]
+        class BITMAPINFOHEADER(ctypes.Structure):
+            _fields_ = [("biSize", wt.DWORD), ("biWidth", wt.LONG), ("biHeight", wt.LONG), ("biPlanes", wt.WORD),
+                        ("biBitCount", wt.WORD), ("biCompression", wt.DWORD), ("biSizeImage", wt.DWORD),
+                        ("biXPelsPerMeter", wt.LONG), ("biYPelsPerMeter", wt.LONG),
+                        ("biClrUsed", wt.DWORD), ("biClrImportant", wt.DWORD)]
+        self._CURSORINFO, self._ICONINFO, self._BITMAP, self._BIH = CURSORINFO, ICONINFO, BITMAP, BITMAPINFOHEADER
+        u32 = self._u32 = ctypes.windll.user32; g32 = self._g32 = ctypes.windll.gdi32
+        # 64비트에서 핸들이 잘리지 않도록 인자/반환 타입 지정
+        u32.GetCursorInfo.argtypes = [ctypes.POINTER(CURSORINFO)]
+        u32.GetIconInfo.argtypes = [wt.HANDLE, ctypes.POINTER(ICONINFO)]
+        u32.DrawIconEx.argtypes = [wt.HDC, ctypes.c_int, ctypes.c_int, wt.HANDLE, ctypes.c_int, ctypes.c_int,
+                                   wt.UINT, wt.HBRUSH, wt.UINT]
+        g32.CreateCompatibleDC.argtypes = [wt.HDC]; g32.CreateCompatibleDC.restype = wt.HDC
+        g32.CreateDIBSection.argtypes = [wt.HDC, ctypes.POINTER(BITMAPINFOHEADER), wt.UINT,
+                                         ctypes.POINTER(ctypes.c_void_p), wt.HANDLE, wt.DWORD]
+        g32.CreateDIBSection.restype = wt.HBITMAP
+        g32.SelectObject.argtypes = [wt.HDC, wt.HGDIOBJ]; g32.SelectObject.restype = wt.HGDIOBJ
+        g32.DeleteObject.argtypes = [wt.HGDIOBJ]; g32.DeleteDC.argtypes = [wt.HDC]
+        g32.GetObjectW.argtypes = [wt.HANDLE, ctypes.c_int, ctypes.c_void_p]
+
+    def _read_shape(self, hcur) -> tuple | None:
+        u32, g32 = self._u32, self._g32
+        ii = self._ICONINFO()
+        if not u32.GetIconInfo(hcur, ctypes.byref(ii)): return None
+        try:
+            bm = self._BITMAP()
+            g32.GetObjectW(ii.hbmMask, ctypes.sizeof(bm), ctypes.byref(bm))
+            w = bm.bmWidth; h = bm.bmHeight if ii.hbmColor else bm.bmHeight // 2   # 흑백 커서는 마스크 2장이 세로로
+            if w <= 0 or h <= 0 or w > 256 or h > 256: return None
+            black = self._draw(hcur, w, h, 0); white = self._draw(hcur, w, h, 255)
+        finally:
+            if ii.hbmMask: g32.DeleteObject(ii.hbmMask)
+            if ii.hbmColor: g32.DeleteObject(ii.hbmColor)
+        # 검정/흰 바탕에 각각 그려서 차이로 알파를 구함(알파 없는 흑백 커서도 같은 방식)
+        b = black[..., :3].astype(np.int16); wh = white[..., :3].astype(np.int16)
+        alpha = np.clip(255 - (wh - b).max(axis=2), 0, 255).astype(np.uint8)
+        out = np.zeros((h, w, 4), dtype=np.uint8)
+        nz = alpha > 0
+        out[..., :3][nz] = np.clip(b[nz] * 255 // alpha[nz, None], 0, 255).astype(np.uint8)
+        out[..., :3][(wh - b).max(axis=2) < 0] = 0   # 반전(XOR) 픽셀(I-빔 등)은 검정으로
+        out[..., 3] = alpha
+        return w, h, int(ii.xHotspot), int(ii.yHotspot), out
+
+    def _draw(self, hcur, w: int, h: int, bg: int) -> np.ndarray:
+        g32 = self._g32
+        bih = self._BIH(); bih.biSize = ctypes.sizeof(bih)
+        bih.biWidth = w; bih.biHeight = -h; bih.biPlanes = 1; bih.biBitCount = 32   # 위→아래 BGRA
+        bits = ctypes.c_void_p()
+        dc = g32.CreateCompatibleDC(None)
+        dib = g32.CreateDIBSection(dc, ctypes.byref(bih), 0, ctypes.byref(bits), None, 0)
+        try:
+            old = g32.SelectObject(dc, dib)
+            buf = np.ctypeslib.as_array((ctypes.c_uint8 * (w * h * 4)).from_address(bits.value)).reshape(h, w, 4)
+            buf[:] = bg
+            self._u32.DrawIconEx(dc, 0, 0, hcur, w, h, 0, None, 0x0003)   # DI_NORMAL
+            img = buf.copy()
+            g32.SelectObject(dc, old)
+            return img
+        finally:
+            g32.DeleteObject(dib); g32.DeleteDC(dc)
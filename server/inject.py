@@ -0,0 +1,168 @@
+# server/inject.py
+import sys, ctypes, ctypes.util
+
+from common import INPUT_BACKEND, EV_MOVE, EV_DOWN, EV_UP, EV_WHEEL, EV_KEY_DOWN, EV_KEY_UP
+
+# ===== 입력 주입 백엔드: 제어 서버가 받은 입력 이벤트를 OS에 넣음 =====
+# 백엔드는 모두 같은 모양:
+#   name
+#   inject(events)  이벤트 [(EV_*, 인자, a, b)] 묶음을 순서대로 한 번에(호출 1번). 루프 스레드에서만 호출
+#   close()
+# common.py의 INPUT_BACKEND(환경 변수 RD_INPUT_BACKEND)로 고름:
+#   "auto"(Windows → sendinput, X 디스플레이가 있으면 xtest, 아니면 none) | "sendinput" | "xtest" | "record" | "none"
+def open_backend(spec: str = INPUT_BACKEND):
+    kind = spec or "auto"
+    if kind == "auto":
+        if sys.platform == "win32": return SendInputBackend()
+        try: return XTestBackend()
+        except (OSError, RuntimeError): return NullBackend()
+    if kind == "sendinput": return SendInputBackend()
+    if kind == "xtest": return XTestBackend()
+    if kind == "record": return RecordingBackend()
+    if kind == "none": return NullBackend()
+    raise ValueError(f"알 수 없는 입력 백엔드: {spec}")
+
+# ----- 주입 안 함(입력을 넣을 수 없는 환경) -----
+class NullBackend:
+    name = "none"
+    def inject(self, events: list[tuple]): pass
+    def close(self): pass
+
+# ----- 메모리에 기록(시험/벤치마크용): 받은 이벤트와 주입 호출 수만 셈 -----
+class RecordingBackend:
+    name = "record"
+    def __init__(self):
+        self.events: list[tuple] = []
+        self.calls = 0   # inject 호출 수(= OS 주입 호출 수에 해당)
+
+    def inject(self, events: list[tuple]):
+        self.events.extend(events); self.calls += 1
+
+    def close(self): pass
+
+# ----- Windows: SendInput 한 번에 묶음 전체(이벤트마다 mouse_event/keybd_event를 부르지 않음) -----
+class SendInputBackend:
+    name = "sendinput"
+    INPUT_MOUSE, INPUT_KEYBOARD = 0, 1
+    MOUSEEVENTF_MOVE       = 0x0001
+    MOUSEEVENTF_LEFTDOWN   = 0x0002
+    MOUSEEVENTF_LEFTUP     = 0x0004
+    MOUSEEVENTF_RIGHTDOWN  = 0x0008
+    MOUSEEVENTF_RIGHTUP    = 0x0010
+    MOUSEEVENTF_MIDDLEDOWN = 0x0020
+    MOUSEEVENTF_MIDDLEUP   = 0x0040
+    MOUSEEVENTF_WHEEL      = 0x0800
+    MOUSEEVENTF_VIRTUALDESK = 0x4000
+    MOUSEEVENTF_ABSOLUTE   = 0x8000
+    KEYEVENTF_KEYUP        = 0x0002
+    SM_XVIRTUALSCREEN, SM_YVIRTUALSCREEN, SM_CXVIRTUALSCREEN, SM_CYVIRTUALSCREEN = 76, 77, 78, 79
+    # 버튼 번호(CTRL_BUTTONS 순서) → 플래그
+    BTN_DOWN = (MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_RIGHTDOWN, MOUSEEVENTF_MIDDLEDOWN)
+    BTN_UP   = (MOUSEEVENTF_LEFTUP, MOUSEEVENTF_RIGHTUP, MOUSEEVENTF_MIDDLEUP)
+
+    def __init__(self):
+        if not hasattr(ctypes, "windll"): raise RuntimeError("SendInput은 Windows에서만 쓸 수 있습니다")
+        from ctypes import wintypes as wt
+        class MOUSEINPUT(ctypes.Structure):
+            _fields_ = [("dx", wt.LONG), ("dy", wt.LONG), ("mouseData", wt.DWORD), ("dwFlags", wt.DWORD),
+                        ("time", wt.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+        class KEYBDINPUT(ctypes.Structure):
+            _fields_ = [("wVk", wt.WORD), ("wScan", wt.WORD), ("dwFlags", wt.DWORD), ("time", wt.DWORD),
+                        ("dwExtraInfo", ctypes.c_size_t)]
+        class HARDWAREINPUT(ctypes.Structure):
+            _fields_ = [("uMsg", wt.DWORD), ("wParamL", wt.WORD), ("wParamH", wt.WORD)]
+        class _U(ctypes.Union):
+            _fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("hi", HARDWAREINPUT)]
+        class INPUT(ctypes.Structure):
+            _anonymous_ = ("u",)
+            _fields_ = [("type", wt.DWORD), ("u", _U)]
+        self._INPUT = INPUT
+        self._u32 = ctypes.windll.user32
+        self._u32.SendInput.argtypes = (wt.UINT, ctypes.POINTER(INPUT), ctypes.c_int)
+        self._u32.SendInput.restype = wt.UINT
+
+    def inject(self, events: list[tuple]):
+        if not events: return
+        arr = (self._INPUT * len(events))(); m = self._u32.GetSystemMetrics
+        vx = vy = vw = vh = None
+        for r, (kind, arg, a, b) in zip(arr, events):
+            if kind in (EV_KEY_DOWN, EV_KEY_UP):
+                r.type = self.INPUT_KEYBOARD; r.ki.wVk = arg
+                r.ki.dwFlags = self.KEYEVENTF_KEYUP if kind == EV_KEY_UP else 0
+                continue
+            r.type = self.INPUT_MOUSE
+            if kind == EV_MOVE:
+                # SetCursorPos와 같은 가상 화면 좌표 → 절대 좌표(0~65535, 가상 데스크톱 전체 기준)
+                if vx is None:
+                    vx, vy = m(self.SM_XVIRTUALSCREEN), m(self.SM_YVIRTUALSCREEN)
+                    vw, vh = max(2, m(self.SM_CXVIRTUALSCREEN)), max(2, m(self.SM_CYVIRTUALSCREEN))
+                r.mi.dx = (a - vx) * 65535 // (vw - 1); r.mi.dy = (b - vy) * 65535 // (vh - 1)
+                r.mi.dwFlags = self.MOUSEEVENTF_MOVE | self.MOUSEEVENTF_ABSOLUTE | self.MOUSEEVENTF_VIRTUALDESK
+            elif kind == EV_DOWN: r.mi.dwFlags = self.BTN_DOWN[min(arg, 2)]
+            elif kind == EV_UP: r.mi.dwFlags = self.BTN_UP[min(arg, 2)]
+            elif kind == EV_WHEEL: r.mi.dwFlags = self.MOUSEEVENTF_WHEEL; r.mi.mouseData = a & 0xFFFFFFFF
+        self._u32.SendInput(len(events), arr, ctypes.sizeof(self._INPUT))
+
+    def close(self): pass
+
+# ----- Linux(X11): XTest 가짜 입력, 묶음 끝에 XFlush 한 번 -----
+# Windows 가상 키 → X keysym (글자/숫자는 아래에서 계산)
+_VK_KEYSYM = {
+    0x08: 0xFF08, 0x09: 0xFF09, 0x0D: 0xFF0D, 0x10: 0xFFE1, 0x11: 0xFFE3, 0x12: 0xFFE9, 0x13: 0xFF13, 0x14: 0xFFE5,
+    0x15: 0xFF31, 0x19: 0xFF34, 0x1B: 0xFF1B, 0x20: 0x0020, 0x21: 0xFF55, 0x22: 0xFF56, 0x23: 0xFF57, 0x24: 0xFF50,
+    0x25: 0xFF51, 0x26: 0xFF52, 0x27: 0xFF53, 0x28: 0xFF54, 0x2C: 0xFF61, 0x2D: 0xFF63, 0x2E: 0xFFFF,
+    0x5B: 0xFFEB, 0x5C: 0xFFEC, 0x5D: 0xFF67, 0x6A: 0xFFAA, 0x6B: 0xFFAB, 0x6C: 0xFFAC, 0x6D: 0xFFAD, 0x6E: 0xFFAE,
+    0x6F: 0xFFAF, 0x90: 0xFF7F, 0x91: 0xFF14,
+    0xBA: 0x003B, 0xBB: 0x003D, 0xBC: 0x002C, 0xBD: 0x002D, 0xBE: 0x002E, 0xBF: 0x002F, 0xC0: 0x0060,
+    0xDB: 0x005B, 0xDC: 0x005C, 0xDD: 0x005D, 0xDE: 0x0027,
+}
+
+def vk_keysym(vk: int) -> int:
+    if 0x41 <= vk <= 0x5A: return vk + 0x20            # A-Z → a-z
+    if 0x30 <= vk <= 0x39: return vk                   # 0-9
+    if 0x60 <= vk <= 0x69: return 0xFFB0 + vk - 0x60   # 숫자 키패드
+    if 0x70 <= vk <= 0x87: return 0xFFBE + vk - 0x70   # F1-F24
+    return _VK_KEYSYM.get(vk, 0)
+
+class XTestBackend:
+    name = "xtest"
+    BUTTONS = (1, 3, 2)   # CTRL_BUTTONS 순서(왼/오른/가운데) → X 버튼 번호. 휠은 4(위)/5(아래)
+
+    def __init__(self):
+        x11 = ctypes.CDLL(ctypes.util.find_library("X11") or "libX11.so.6")
+        xt = ctypes.CDLL(ctypes.util.find_library("Xtst") or "libXtst.so.6")
+        x11.XOpenDisplay.argtypes = (ctypes.c_char_p,); x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XKeysymToKeycode.argtypes = (ctypes.c_void_p, ctypes.c_ulong); x11.XKeysymToKeycode.restype = ctypes.c_ubyte
+        x11.XFlush.argtypes = (ctypes.c_void_p,)
+        x11.XCloseDisplay.argtypes = (ctypes.c_void_p,)
+        xt.XTestFakeMotionEvent.argtypes = (ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_ulong)
+        xt.XTestFakeButtonEvent.argtypes = (ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong)
+        xt.XTestFakeKeyEvent.argtypes = (ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong)
+        self._dpy = x11.XOpenDisplay(None)
+        if not self._dpy: raise RuntimeError("X 디스플레이에 연결할 수 없습니다")
+        self._x11 = x11; self._xt = xt
+        self._codes: dict[int, int] = {}   # 가상 키 → keycode
+
+    def _keycode(self, vk: int) -> int:
+        code = self._codes.get(vk)
+        if code is None:
+            sym = vk_keysym(vk)
+            code = self._codes[vk] = self._x11.XKeysymToKeycode(self._dpy, sym) if sym else 0
+        return code
+
+    def inject(self, events: list[tuple]):
+        d = self._dpy; xt = self._xt
+        for kind, arg, a, b in events:
+            if kind == EV_MOVE: xt.XTestFakeMotionEvent(d, -1, a, b, 0)
+            elif kind in (EV_DOWN, EV_UP): xt.XTestFakeButtonEvent(d, self.BUTTONS[min(arg, 2)], kind == EV_DOWN, 0)
+            elif kind == EV_WHEEL:
+                btn = 4 if a > 0 else 5
+                for _ in range(max(1, abs(a) // 120)):   # Windows 휠 한 칸 = 120
+                    xt.XTestFakeButtonEvent(d, btn, True, 0); xt.XTestFakeButtonEvent(d, btn, False, 0)
+            elif kind in (EV_KEY_DOWN, EV_KEY_UP):
+                code = self._keycode(arg)
+                if code: xt.XTestFakeKeyEvent(d, code, kind == EV_KEY_DOWN, 0)
+        self._x11.XFlush(d)
+
+    def close(self):
+        if self._dpy: self._x11.XCloseDisplay(self._dpy); self._dpy = None
@@ -0,0 +1,177 @@
+# server/mux.py
+# 다중화 연결: 클라이언트 TCP 연결 하나에 영상/제어/파일 스트림을 프레임(MUX_HDR)으로 나눠 실음
+# 스트림 하나 = 내부 소켓 쌍. 한쪽은 채널 서버(VideoServer/ControlServer/FileServer)에 보통 연결처럼 붙이고(attach),
+# 다른 쪽은 이 연결이 읽고 써서 → 채널 서버 코드와 포트별 프로토콜은 그대로, 포트별 연결은 호환 모드로 남음
+import socket, asyncio
+
+from aio import LoopServer, sock_recv_exact
+from common import (MUX_MAGIC, MUX_HDR, MUX_OPEN, MUX_DATA, MUX_CLOSE, MUX_CREDIT, MUX_CREDIT_LEN, MUX_PRIORITY, MUX_CHUNK,
+                    MUX_PAIR_BUF, MUX_WINDOW, MUX_MAX_CONNS, MUX_MAX_STREAMS)
+
+def stream_pair() -> tuple[socket.socket, socket.socket]:
+    # 버퍼를 작게 → 회선이 밀리면 채널 서버의 송신이 바로 막혀서 영상 ABR/건너뛰기가 그대로 동작
+    a, b = socket.socketpair()
+    for s in (a, b):
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, MUX_PAIR_BUF)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, MUX_PAIR_BUF)
+        s.setblocking(False)
+    return a, b
+
+def credit_frame(sid: int, n: int) -> bytes:
+    return MUX_HDR.pack(sid, MUX_CREDIT, MUX_CREDIT_LEN.size) + MUX_CREDIT_LEN.pack(n)
+
+class _Stream:
+    __slots__ = ("sock", "prio", "closing", "out", "window", "owed", "writing", "paused")
+    def __init__(self, sock: socket.socket, prio: int):
+        self.sock = sock; self.prio = prio
+        self.closing = False      # 상대가 CLOSE를 보냄 → 남은 데이터를 다 쓰면 채널 서버 쪽에 EOF, 채널 서버가 닫기를 기다림
+        self.out = bytearray()    # 상대에게 받았지만 아직 채널 서버 쪽에 못 쓴 데이터
+        self.window = MUX_WINDOW  # 상대에게 더 보내도 되는 양(상대의 CREDIT으로 늘어남)
+        self.owed = 0             # 채널 서버 쪽에 넘겼지만 아직 CREDIT으로 돌려주지 않은 양
+        self.writing = False      # add_writer로 쓰기 대기 중
+        self.paused = False       # 창이 0 → 읽기를 멈춤(CREDIT이 오면 다시)
+
+# ===== 다중화 연결 하나(루프 스레드에서만): 스트림 표 + 우선순위 송신 + 스트림별 창 =====
+class MuxLink:
+    def __init__(self, sock: socket.socket, loop: asyncio.AbstractEventLoop):
+        self.sock = sock; self.loop = loop
+        self.streams: dict[int, _Stream] = {}
+        self.ready: set[int] = set()    # 읽을 데이터(또는 EOF)가 있고 창이 남은 스트림
+        self.ctrl: list[bytes] = []     # 보낼 CLOSE/CREDIT 프레임(스트림 데이터보다 먼저)
+        self.wake = asyncio.Event()
+
+    def add(self, sid: int, sock: socket.socket, prio: int):
+        self.streams[sid] = _Stream(sock, prio)
+        self.loop.add_reader(sock.fileno(), self._on_readable, sid)
+
+    def _on_readable(self, sid: int):
+        # 읽기 대기는 잠시 내려놓고 송신 루프가 비울 때까지 ready에 둠(레벨 트리거로 루프가 헛돌지 않게)
+        st = self.streams.get(sid)
+        if st is None: return
+        self.loop.remove_reader(st.sock.fileno())
+        self.ready.add(sid); self.wake.set()
+
+    def send_close(self, sid: int):
+        self.ctrl.append(MUX_HDR.pack(sid, MUX_CLOSE, 0)); self.wake.set()
+
+    def deliver(self, sid: int, data: bytes):
+        # 받은 DATA → 스트림 버퍼 → 채널 서버 쪽으로(막히면 add_writer). 수신 루프는 기다리지 않음
+        # → 채널 서버가 안 읽는 스트림은 창이 차서 상대가 그 스트림만 멈춤
+        st = self.streams.get(sid)
+        if st is None or st.closing: return   # 이미 닫은 스트림의 늦은 데이터
+        if len(st.out) + st.owed + len(data) > MUX_WINDOW: raise ValueError("스트림 창을 넘었습니다")
+        st.out += data
+        self._flush(sid)
+
+    def _flush(self, sid: int):
+        st = self.streams.get(sid)
+        if st is None: return
+        try:
+            while st.out:
+                n = st.sock.send(st.out)
+                del st.out[:n]; st.owed += n
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self.drop(sid, notify=True); return
+        if st.owed >= MUX_WINDOW // 4:   # 모아서 돌려줌(작은 제어 메시지마다 CREDIT을 보내지 않음)
+            self.ctrl.append(credit_frame(sid, st.owed)); st.owed = 0; self.wake.set()
+        if st.out:
+            if not st.writing: st.writing = True; self.loop.add_writer(st.sock.fileno(), self._flush, sid)
+            return
+        if st.writing: st.writing = False; self.loop.remove_writer(st.sock.fileno())
+        if st.closing:
+            try: st.sock.shutdown(socket.SHUT_WR)
+            except OSError: self.drop(sid)
+
+    def credit(self, sid: int, n: int):
+        st = self.streams.get(sid)
+        if st is None: return
+        st.window += n
+        if st.paused and st.window > 0:
+            st.paused = False; self.loop.add_reader(st.sock.fileno(), self._on_readable, sid)
+
+    def remote_close(self, sid: int):
+        st = self.streams.get(sid)
+        if st is None: return
+        st.closing = True
+        self._flush(sid)   # 남은 데이터를 다 쓴 뒤에 EOF
+
+    def drop(self, sid: int, notify: bool = False):
+        st = self.streams.pop(sid, None)
+        if st is None: return
+        self.ready.discard(sid)
+        self.loop.remove_reader(st.sock.fileno())
+        if st.writing: self.loop.remove_writer(st.sock.fileno())
+        try: st.sock.close()
+        except OSError: pass
+        if notify and not st.closing: self.send_close(sid)
+
+    def close(self):
+        for sid in list(self.streams): self.drop(sid)
+
+    async def send_loop(self):
+        # 준비된 스트림 중 우선순위가 가장 높은 것에서 MUX_CHUNK만큼 → 대용량 스트림이 있어도 제어 메시지는 다음 차례에 나감
+        while True:
+            if self.ctrl:
+                data = b"".join(self.ctrl); self.ctrl.clear()
+                await self.loop.sock_sendall(self.sock, data); continue
+            if not self.ready:
+                self.wake.clear(); await self.wake.wait(); continue
+            sid = min(self.ready, key=lambda i: self.streams[i].prio)
+            st = self.streams[sid]
+            try:
+                data = st.sock.recv(MUX_CHUNK if st.closing else min(MUX_CHUNK, st.window))
+            except (BlockingIOError, InterruptedError):
+                self.ready.discard(sid); self.loop.add_reader(st.sock.fileno(), self._on_readable, sid); continue
+            except OSError:
+                data = b""
+            if not data: self.drop(sid, notify=True); continue   # 채널 서버가 연결을 닫음
+            if st.closing: continue                                # 상대가 닫은 스트림 → 버림
+            st.window -= len(data)
+            if st.window <= 0: self.ready.discard(sid); st.paused = True   # 상대가 CREDIT을 줄 때까지 이 스트림만 멈춤
+            await self.loop.sock_sendall(self.sock, MUX_HDR.pack(sid, MUX_DATA, len(data)) + data)
+
+# ===== 다중화 서버: 연결마다 스트림 OPEN을 채널 서버에 붙임 =====
+class MuxServer(LoopServer):
+    def __init__(self, host: str, port: int, channels: dict):
+        super().__init__(host, port, MUX_MAX_CONNS)
+        self.channels = channels   # 채널 번호(MUX_VIDEO/CONTROL/FILE) → LoopServer
+
+    async def handle(self, c: socket.socket, ip: str):
+        loop = asyncio.get_running_loop()
+        c.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)   # 작은 제어 프레임을 모으지 않음
+        if await sock_recv_exact(c, len(MUX_MAGIC)) != MUX_MAGIC: return
+        link = MuxLink(c, loop)
+        tx = loop.create_task(link.send_loop())
+        buf = bytearray()
+        try:
+            while True:
+                data = await loop.sock_recv(c, 256 * 1024)
+                if not data: return
+                buf += data; off = 0
+                while len(buf) - off >= MUX_HDR.size:
+                    sid, op, n = MUX_HDR.unpack_from(buf, off)
+                    if n > MUX_CHUNK: raise ValueError("프레임이 너무 큽니다")
+                    if len(buf) - off < MUX_HDR.size + n: break
+                    body = bytes(buf[off + MUX_HDR.size:off + MUX_HDR.size + n]); off += MUX_HDR.size + n
+                    if op == MUX_DATA: link.deliver(sid, body)
+                    elif op == MUX_OPEN: self._open(link, sid, body, ip)
+                    elif op == MUX_CLOSE: link.remote_close(sid)
+                    elif op == MUX_CREDIT and n == MUX_CREDIT_LEN.size: link.credit(sid, MUX_CREDIT_LEN.unpack(body)[0])
+                del buf[:off]
+        finally:
+            tx.cancel()
+            await asyncio.gather(tx, return_exceptions=True)
+            link.close()
+
+    def _open(self, link: MuxLink, sid: int, body: bytes, ip: str):
+        if sid in link.streams: raise ValueError("이미 열린 스트림")
+        ch = body[0] if body else -1
+        srv = self.channels.get(ch)
+        if srv is None or len(link.streams) >= MUX_MAX_STREAMS:
+            link.send_close(sid); return
+        a, b = stream_pair()
+        if not srv.attach(b, ip):   # 채널 서버 상한/정지 중 → 포트별 연결처럼 바로 닫힘
+            a.close(); b.close(); link.send_close(sid); return
+        link.add(sid, a, MUX_PRIORITY.get(ch, len(MUX_PRIORITY)))
@@ -1,168 +1,680 @@
 # server/net.py
-import os, time, socket, select, threading, struct, json, tempfile, zipfile
-import numpy as np, cv2
-from mss import mss
-from PySide6.QtCore import QThread, Signal, QStandardPaths
+import os, time, math, socket, asyncio, threading, struct, json, tempfile, zipfile, collections, zlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PySide6.QtCore import Signal, QStandardPaths
 
-from utils import recv_exact, send_json
-from common import DEFAULT_HOST, VIDEO_PORT, CONTROL_PORT, FILE_PORT, FRAME_FPS, JPEG_QUALITY
+from utils import recv_exact, send_json, wall_us, LatestSlot, FramePool
+from aio import LoopServer, sock_recv_exact, sock_messages
+from record import SessionRecorder
+from cursor import CursorSource
+from capture import open_source
+from inject import open_backend
+from udp import UdpSender
+from codec import dirty_tile_mask, scale_frame, encode_tiles, encode_full, h264_available, H264Encoder, RegionCache
+from common import (DEFAULT_HOST, VIDEO_PORT, CONTROL_PORT, FILE_PORT, FRAME_FPS, FRAME_IDLE_FPS, FRAME_BACKOFF,
+                    PKT_TILES, PKT_H264, PKT_INFO, PKT_CURSOR, PKT_CURSOR_SHAPE, VIDEO_HDR, DEFAULT_MONITOR,
+                    FRAME_META, VIDEO_VERSION, FRAME_SOURCE, RECORD_DIR,
+                    CURSOR_HDR, CURSOR_SHAPE_HDR, CURSOR_HZ, TILE_FULL_RATIO, CODEC_THREADS,
+                    STREAM_PROFILES, DEFAULT_PROFILE, VIEWPORT_SCALE_STEPS, VIDEO_CODECS, DEFAULT_CODEC,
+                    ABR_TARGET_LATENCY, ABR_LADDER, ABR_MIN_QUALITY, ABR_MIN_SCALE, ABR_MIN_FPS,
+                    ABR_STEP_INTERVAL, ABR_RECOVER_HOLD,
+                    VIDEO_MAX_CONNS, CONTROL_MAX_CONNS, FILE_MAX_CONNS, FILE_IO_TIMEOUT, UDP_FALLBACK_STALL,
+                    CONTROL_VERSION, CTRL_EVENT, EV_MOVE, EV_DOWN, EV_UP, EV_WHEEL, EV_KEY_DOWN, EV_KEY_UP,
+                    CTRL_BUTTONS, INPUT_BACKEND)
+
+# ===== 클라이언트별 적응형 비트레이트 =====
+class RateController:
+    # ack로 잰 종단 지연 + 송신 대기량/처리량을 보고 ABR_LADDER 단계를 조정
+    __slots__ = ("level", "latency", "bps", "last_ack", "last_step", "good_since")
+    def __init__(self):
+        self.level = 0
+        self.latency = None      # 종단 지연 EWMA(초)
+        self.bps = 0.0           # ack 기준 처리량 EWMA(bytes/s)
+        self.last_ack = None
+        self.last_step = 0.0
+        self.good_since = None
+
+    def on_ack(self, now: float, latency: float, nbytes: int):
+        self.latency = latency if self.latency is None else self.latency * 0.8 + latency * 0.2
+        if self.last_ack is not None and now > self.last_ack:
+            rate = nbytes / (now - self.last_ack)
+            self.bps = rate if not self.bps else self.bps * 0.8 + rate * 0.2
+        self.last_ack = now
+
+    def update(self, now: float, backlog: int, stall: float, skipped: bool) -> bool:
+        # 단계가 바뀌면 True. backlog: 아직 못 보낸 바이트, stall: 가장 오래된 미확인 프레임의 나이
+        if now - self.last_step < ABR_STEP_INTERVAL: return False
+        drain = backlog / self.bps if self.bps > 0 else 0.0   # 쌓인 데이터를 지금 속도로 비우는 시간
+        delay = max(self.latency or 0.0, drain, stall)
+        if skipped or delay > ABR_TARGET_LATENCY * 1.5:
+            self.good_since = None
+            if self.level >= len(ABR_LADDER) - 1: return False
+            self.level += 1; self.last_step = now
+            return True
+        if delay > ABR_TARGET_LATENCY * 0.6 or self.level == 0:
+            self.good_since = None
+            return False
+        if self.good_since is None: self.good_since = now
+        if now - self.good_since < ABR_RECOVER_HOLD: return False
+        self.level -= 1; self.last_step = now; self.good_since = now
+        return True
+
+# ===== 영상 클라이언트별 송신 버퍼 =====
+SEND_IOV_MAX  = 64         # sendmsg 한 번에 넘길 버퍼 수
+VIDEO_MSG_MAX = 64 * 1024  # 클라이언트 → 서버 메시지 최대 크기
+CONTROL_MSG_MAX = 64 * 1024
+FILE_REQ_MAX  = 16 * 1024 * 1024   # 파일 요청 JSON(경로 목록) 최대 크기
+VIDEO_SNDBUF  = 256 * 1024 # 커널 송신 버퍼 제한: 밀린 데이터가 커널이 아닌 VideoPeer에 쌓여야 건너뛰기/ABR이 동작
+
+def send_buffers(sock: socket.socket, bufs) -> int:
+    # 헤더/본문을 이어붙이지 않고 scatter-gather로 전송. sendmsg가 없는 OS(Windows)는 버퍼 하나씩
+    if hasattr(sock, "sendmsg"):
+        return sock.sendmsg([bufs[i] for i in range(min(len(bufs), SEND_IOV_MAX))])
+    return sock.send(bufs[0])
+
+def info_packet(obj: dict) -> tuple:
+    body = json.dumps(obj).encode("utf-8")
+    return VIDEO_HDR.pack(PKT_INFO, len(body), 0, 0), body
+
+class VideoPeer:
+    # 네트워크 루프 스레드에서만 만짐. 보내는 중인 프레임 1개 + 대기 프레임 1개까지만 보관
+    __slots__ = ("sock", "ip", "version", "profile", "codec", "monitor", "viewport", "rate", "rbuf", "bufs", "queued",
+                 "started", "inflight", "seq", "cursor_pos", "cursor_shape", "cursor_sent", "shape_sent",
+                 "udp", "udp_token", "udp_inflight")
+    def __init__(self, sock: socket.socket, ip: str):
+        self.sock = sock; self.ip = ip
+        self.version = 1                   # 헤더 버전: hello에서 v2를 요청하면 FRAME_META를 붙임
+        self.profile = DEFAULT_PROFILE     # hello 전까지는 기본 프로필
+        self.codec = DEFAULT_CODEC
+        self.monitor = DEFAULT_MONITOR     # 구독 중인 모니터(mss 번호)
+        self.viewport = None               # 클라이언트 화면 표시 영역(w, h), 모르면 None
+        self.rate = RateController()
+        self.rbuf = bytearray()            # 클라이언트 → 서버 메시지 수신 버퍼
+        self.bufs = collections.deque()   # 전송 중인 프레임의 남은 조각(memoryview)
+        self.queued = None                # 아직 한 바이트도 안 나간 다음 프레임(버퍼 튜플, 캡처 ts, 스탬프)
+        self.started = 0                  # 전송을 시작한 프레임 수(클라이언트 ack 번호와 대응)
+        self.inflight = collections.deque(maxlen=64)   # (번호, 캡처 ts, bytes): ack 대기 중
+        self.seq = 0                      # 이 시청자에게 넘긴 화면 프레임 순번(건너뛴 것도 셈 → 클라이언트가 손실 계산)
+        self.cursor_pos = None            # 아직 못 보낸 최신 커서 위치/모양 패킷(프레임 경계에서 끼워 보냄)
+        self.cursor_shape = None
+        self.cursor_sent = None           # 마지막으로 넘긴 (x, y, 보임) / 모양 버전
+        self.shape_sent = 0
+        self.udp = None                   # UDP로 화면 패킷을 받는 클라이언트의 주소(아니면 None, TCP)
+        self.udp_token = None             # 협상 중인 프로브 토큰
+        self.udp_inflight = collections.deque(maxlen=64)   # (프레임 순번, 캡처 ts, bytes): UDP로 보낸 프레임의 ack 대기
+
+    def stream_key(self, w: int, h: int) -> tuple[str, float, int, str, int]:
+        # (프로필, 배율, ABR 단계, 코덱, 모니터): 프로필 배율과 뷰어 크기 맞춤 배율 중 작은 쪽에 ABR 배율을 곱하고
+        # 1/VIEWPORT_SCALE_STEPS 단위로 올림
+        level = self.rate.level
+        scale = STREAM_PROFILES[self.profile]["scale"]
+        if self.viewport:
+            vw, vh = self.viewport
+            scale = min(scale, vw / w, vh / h)
+        if level: scale = max(min(scale, ABR_MIN_SCALE), scale * ABR_LADDER[level][1])
+        return self.profile, min(1.0, math.ceil(scale * VIEWPORT_SCALE_STEPS) / VIEWPORT_SCALE_STEPS), level, self.codec, self.monitor
+
+    def backlog(self) -> int:
+        n = sum(len(b) for b in self.bufs)
+        if self.queued is not None: n += sum(len(b) for b in self.queued[0])
+        return n
+
+    def on_ack(self, n: int, now: float):
+        # 클라이언트가 n번째 프레임까지 표시함 → 지연/처리량 샘플
+        nbytes = 0; ts = None
+        while self.inflight and self.inflight[0][0] <= n:
+            _, ts, size = self.inflight.popleft(); nbytes += size
+        if ts is not None: self.rate.on_ack(now, now - ts, nbytes)
+
+    def on_ack_seq(self, s: int, now: float) -> int:
+        # UDP: 클라이언트가 s번 프레임을 받음. 그 앞에서 ack 없이 지나간 프레임 수(복구 못 한 유실)를 반환
+        lost = 0; ts = None; nbytes = 0
+        while self.udp_inflight and self.udp_inflight[0][0] <= s:
+            seq, t, size = self.udp_inflight.popleft()
+            if seq == s: ts = t; nbytes = size
+            else: lost += 1
+        if ts is not None: self.rate.on_ack(now, now - ts, nbytes)
+        return lost
+
+    def stall(self, now: float) -> float:
+        # ack를 보내는 클라이언트만: 가장 오래된 미확인 프레임의 나이
+        heads = [q[0][1] for q in (self.inflight, self.udp_inflight) if q]
+        if self.rate.last_ack is None or not heads: return 0.0
+        return now - min(heads)
+
+    def feed(self, data: bytes) -> list[dict] | None:
+        # 길이(>I) + JSON 메시지 단위로 잘라 반환. 형식이 깨졌으면 None
+        self.rbuf += data; msgs = []
+        while len(self.rbuf) >= 4:
+            n = struct.unpack_from(">I", self.rbuf)[0]
+            if n > VIDEO_MSG_MAX: return None
+            if len(self.rbuf) < 4 + n: break
+            body = bytes(self.rbuf[4:4+n]); del self.rbuf[:4+n]
+            try: msgs.append(json.loads(body.decode("utf-8", errors="ignore")))
+            except ValueError: return None
+        return msgs
+
+    def pending(self) -> bool:
+        return bool(self.bufs) or self.queued is not None or self.cursor_pos is not None or self.cursor_shape is not None
+
+    def offer(self, pkt: tuple, ts: float, full: bool, enc_ts: float = 0.0) -> bool:
+        # 밀린 클라이언트는 최신 프레임으로 건너뜀. False → 델타를 버렸으니 전체 프레임이 필요
+        self.seq += 1; stamp = (self.seq, ts, enc_ts)
+        if not self.bufs: self._start(pkt, ts, stamp); return True
+        if self.queued is None or full: self.queued = (pkt, ts, stamp); return True
+        self.queued = None
+        return False
+
+    def stamp_udp(self, pkt: tuple, ts: float, enc_ts: float = 0.0) -> tuple[int, list]:
+        # UDP 시청자: 대기열 없이 바로 보냄(밀리면 건너뛰는 대신 네트워크에서 버려짐). FRAME_META 순번 = 데이터그램 프레임 번호
+        self.seq += 1
+        bufs = [pkt[0], FRAME_META.pack(self.seq & 0xFFFFFFFF, wall_us(ts), wall_us(enc_ts or ts), wall_us(time.monotonic())),
+                *pkt[1:]]
+        self.udp_inflight.append((self.seq, ts, sum(len(b) for b in bufs)))
+        return self.seq, bufs
+
+    def notify(self, pkt: tuple):
+        # 알림 패킷: 건너뛰지 않고 지금 보내는 프레임 바로 뒤에 붙임(ack 번호도 함께 셈)
+        self._start(pkt, time.monotonic())
+
+    def _start(self, pkt: tuple, ts: float | None = None, stamp: tuple | None = None):
+        # ts=None → 커서 패킷: 클라이언트가 ack하지 않으므로 번호를 세지 않음
+        # stamp=(순번, 캡처, 인코딩 완료) → v2 시청자에게는 헤더 바로 뒤에 FRAME_META(송신 시작 시각 포함)
+        if stamp is not None and self.version >= 2:
+            seq, cap, enc = stamp
+            meta = FRAME_META.pack(seq & 0xFFFFFFFF, wall_us(cap), wall_us(enc or cap), wall_us(time.monotonic()))
+            pkt = (pkt[0], meta, *pkt[1:])
+        self.bufs.extend(memoryview(b) for b in pkt)
+        if ts is None: return
+        self.started += 1
+        self.inflight.append((self.started, ts, sum(len(b) for b in pkt)))
+
+    def flush(self):
+        # 쓸 수 있는 만큼만 보내고 반환(블로킹 없음). 연결 오류는 OSError로 전달
+        while True:
+            if not self.bufs:
+                # 프레임 경계: 커서(모양 → 위치)를 먼저. 밀려 있는 동안은 최신 값만 남음
+                if self.cursor_shape is not None: self._start(self.cursor_shape); self.cursor_shape = None
+                elif self.cursor_pos is not None: self._start(self.cursor_pos); self.cursor_pos = None
+                elif self.queued is None: return
+                else: self._start(*self.queued); self.queued = None
+            try:
+                n = send_buffers(self.sock, self.bufs)
+            except (BlockingIOError, InterruptedError):
+                return
+            while n > 0:
+                head = self.bufs[0]
+                if n >= len(head): self.bufs.popleft(); n -= len(head)
+                else: self.bufs[0] = head[n:]; n = 0
+
+# 스트림(같은 모니터·프로필·배율·ABR 단계·코덱 = 같은 인코딩 결과를 공유하는 시청자 묶음)별 인코딩 상태
+class StreamState:
+    __slots__ = ("key", "scale", "codec", "monitor", "quality", "fps", "basis", "due", "encoder", "regions")
+    def __init__(self, key: tuple[str, float, int, str, int]):
+        prof = STREAM_PROFILES[key[0]]; q, _, f = ABR_LADDER[key[2]]
+        self.key = key; self.scale = key[1]; self.codec = key[3]; self.monitor = key[4]
+        self.quality = max(min(prof["quality"], ABR_MIN_QUALITY), round(prof["quality"] * q))
+        self.fps = max(min(prof["fps"], ABR_MIN_FPS), prof["fps"] * f)
+        self.basis = None   # 이 스트림 시청자들이 갖고 있을 화면(델타 기준)
+        self.due = 0.0      # 다음 인코딩 시각(monotonic)
+        self.encoder = None # H.264 스트림의 인코더(참조 프레임 상태를 가짐)
+        self.regions = RegionCache()   # 전체 프레임 타일 분류 결과(basis 기준, 바뀐 타일만 지움)
+
+# 인코딩 단계 결과 1건(송신 단계로 전달)
+class EncodedFrame:
+    __slots__ = ("key", "ts", "enc_ts", "basis", "frame", "w", "h", "fresh", "steady", "full", "delta")
+    def __init__(self, key, ts, basis, frame, w, h, fresh, steady, full, delta):
+        self.key = key; self.ts = ts               # 스트림 키(프로필, 배율, ABR 단계, 코덱, 모니터) / 캡처 시각(monotonic)
+        self.enc_ts = 0.0                          # 인코딩 완료 시각(monotonic)
+        self.basis = basis; self.frame = frame     # 델타 기준 프레임 / 이번 프레임
+        self.w = w; self.h = h
+        self.fresh = fresh; self.steady = steady   # 전체(키) 프레임 / 델타를 받을 클라이언트
+        self.full = full; self.delta = delta       # (헤더, 본문) 버퍼 튜플 또는 None
 
 # ===== 영상 서버 =====
-class VideoServer(QThread):
+class VideoServer(LoopServer):
     sig_conn_changed = Signal(int)       # 현재 영상 연결 수
     sig_res_changed  = Signal(int, int)  # (w,h)
     sig_last_client  = Signal(str)       # 최근(마지막 accept) 클라이언트 IP
     sig_conn_start   = Signal(float)     # 첫 영상 연결 시작 ts(초). 0.0 → 리셋
 
-    def __init__(self, host: str, port: int):
-        super().__init__()
-        self.host = host; self.port = port
-        self._stop = threading.Event()
-        self._clients: set[socket.socket] = set()
-        self._addr_of: dict[socket.socket, str] = {}
+    def __init__(self, host: str, port: int, source=None, record_dir: str | None = None):
+        super().__init__(host, port, VIDEO_MAX_CONNS)
+        self._stop = threading.Event()   # 캡처/인코딩/커서 단계 종료
+        self._source = source or open_source(FRAME_SOURCE)   # 화면(mss)/합성/녹화 재생 (capture.py)
+        self.record_dir = RECORD_DIR if record_dir is None else record_dir
+        self._recorder = SessionRecorder(self.record_dir) if self.record_dir else None   # 세션 녹화(record.py)
+        self._clients: dict[socket.socket, VideoPeer] = {}
+        self._fresh: set[socket.socket] = set()   # 전체 프레임을 아직 못 받은 클라이언트
         self._lock = threading.Lock()
+        self._writing: set[socket.socket] = set()   # 쓰기 가능 이벤트를 기다리는(커널 버퍼가 찬) 클라이언트
+        self._disk = None   # 녹화 파일 쓰기(순서 보장용 1스레드): 루프 스레드를 디스크에 묶지 않음
+        self._udp = None    # UDP 화면 전송(udp.py): TCP와 같은 포트 번호. 못 열면 모두 TCP
+        self._udp_tokens: dict[int, socket.socket] = {}   # 프로브 토큰 → 협상 중인 클라이언트
+        self._kick = threading.Event()                     # 캡처 단계 깨우기(새 시청자/종료)
+        self._intervals: dict[int, float] = {}             # 모니터별 현재 캡처 간격(인코딩 단계가 조정)
+        self._monitors = [dict(m) for m in self._source.monitors[1:]]   # 1번부터: left, top, width, height
+        # 캡처 → 인코딩 → 송신: 각 단계는 자기 스레드에서 돌고, 밀리면 오래된 값을 버림
+        self._cap_slot = LatestSlot()
+        self._enc_slot = LatestSlot(on_put=self._wake)
+        self._pool = None   # 띠/타일 병렬 인코딩(OpenCV가 GIL을 놓으므로 코어 수만큼 빨라짐)
+        self._frames: dict[int, FramePool] = {}   # 모니터별 캡처 프레임 버퍼(BGR) 재사용
+        self._cursor = None        # 커서 단계가 읽은 최신 (x, y, 보임) 가상 화면 좌표
+        self._cursor_shape = (0, None)   # (모양 버전, PKT_CURSOR_SHAPE 패킷)
 
-    def run(self):
-        srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        srv.bind((self.host, self.port)); srv.listen(8); srv.setblocking(False)
+    # ---- 송신 단계(네트워크 루프): accept + 완성된 패킷 전송. 캡처/인코딩/커서는 각자 스레드 ----
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        self._pool = ThreadPoolExecutor(CODEC_THREADS, thread_name_prefix="video-codec")
+        self._disk = ThreadPoolExecutor(1, thread_name_prefix="video-record")
+        stages = [threading.Thread(target=self._capture_loop, name="video-capture", daemon=True),
+                  threading.Thread(target=self._encode_loop, name="video-encode", daemon=True),
+                  threading.Thread(target=self._cursor_loop, name="video-cursor", daemon=True)]
+        for t in stages: t.start()
+        try:
+            self._udp = UdpSender(self.host, self.port)
+            loop.add_reader(self._udp.sock, self._on_udp)
+        except OSError:
+            self._udp = None
+        try:
+            await super().serve()
+        finally:
+            if self._udp is not None: loop.remove_reader(self._udp.sock); self._udp.close(); self._udp = None
+            self._stop.set(); self._kick.set()
+            self._cap_slot.close(); self._enc_slot.close()
+            self._end_recording()
+            await loop.run_in_executor(None, self._join_stages, stages)   # join은 루프 밖에서
+            self.sig_conn_changed.emit(0)
+            self.sig_conn_start.emit(0.0)
+            self.sig_last_client.emit("")
 
-        sct = mss(); mon = sct.monitors[1]
-        last_frame_ts = 0.0
-        frame_interval = 1.0 / max(1, FRAME_FPS)
+    def _join_stages(self, stages: list[threading.Thread]):
+        for t in stages: t.join(2.0)
+        self._pool.shutdown(wait=False)
+        self._disk.shutdown(wait=True)   # 남은 녹화 쓰기/닫기까지
+        self._source.close()
 
+    async def handle(self, c: socket.socket, ip: str):
+        loop = asyncio.get_running_loop()
+        c.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, VIDEO_SNDBUF)
+        with self._lock:
+            self._clients[c] = peer = VideoPeer(c, ip)
+            self._fresh.add(c)
+            if len(self._clients) == 1:
+                self.sig_conn_start.emit(time.time())   # 첫 연결 시작
+            if ip: self.sig_last_client.emit(ip)
+            self.sig_conn_changed.emit(len(self._clients))
+        self._kick.set()   # 새 시청자 → 바로 캡처해서 전체 프레임
+        loop.add_reader(c, self._on_readable, c)
         try:
-            while not self._stop.is_set():
-                rlist, _, _ = select.select([srv] + list(self._clients), [], [], 0.01)
-                for s in rlist:
-                    if s is srv:
-                        try:
-                            c, addr = srv.accept(); c.setblocking(False)
-                            ip = addr[0] if addr else ""
-                            with self._lock:
-                                self._clients.add(c)
-                                self._addr_of[c] = ip
-                                if len(self._clients) == 1:
-                                    self.sig_conn_start.emit(time.time())   # 첫 연결 시작
-                                if ip: self.sig_last_client.emit(ip)
-                                self.sig_conn_changed.emit(len(self._clients))
-                        except BlockingIOError:
-                            pass
-                    else:
-                        try:
-                            if not s.recv(1): self._drop(s)
-                        except (BlockingIOError, ConnectionResetError, OSError):
-                            self._drop(s)
-
-                now = time.time()
-                if now - last_frame_ts >= frame_interval:
-                    frame = np.array(sct.grab(mon))[:, :, :3]
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
-                    h, w, _ = frame.shape
-                    self.sig_res_changed.emit(w, h)
-                    ok, enc = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY])
-                    if ok:
-                        blob = enc.tobytes()
-                        packet = struct.pack(">III", len(blob), w, h) + blob
-                        drop = []
-                        with self._lock:
-                            for c in self._clients:
-                                try: c.sendall(packet)
-                                except OSError: drop.append(c)
-                            for dc in drop: self._drop(dc)
-                    last_frame_ts = now
+            peer.notify(self._monitor_info(peer))   # 접속하자마자 모니터 목록
+            self._flush(c)
+            await loop.create_future()   # 끊길 때까지(_drop → 취소)
         finally:
+            loop.remove_reader(c); loop.remove_writer(c); self._writing.discard(c)
+            self._udp_tokens.pop(peer.udp_token, None)
             with self._lock:
-                for c in list(self._clients):
-                    try: c.close()
-                    except: pass
-                self._clients.clear(); self._addr_of.clear()
-                self.sig_conn_changed.emit(0)
-                self.sig_conn_start.emit(0.0)
-                self.sig_last_client.emit("")
-            try: srv.close()
-            except: pass
-
-    def _drop(self, s: socket.socket):
-        try: s.close()
-        except: pass
-        with self._lock:
-            if s in self._clients:
-                self._clients.remove(s)
-                self._addr_of.pop(s, None)
-                if len(self._clients) == 0:
+                self._clients.pop(c, None)
+                self._fresh.discard(c)
+                n = len(self._clients)
+                if n == 0:
                     self.sig_conn_start.emit(0.0)   # 모두 끊김 → 리셋
                     self.sig_last_client.emit("")
-                self.sig_conn_changed.emit(len(self._clients))
+                self.sig_conn_changed.emit(n)
+            if n == 0: self._end_recording()   # 세션 끝 → 녹화 파일 닫기
 
-    # ✅ 변경: 반드시 _drop()을 호출해 내부 집합에서 제거 + 시그널 갱신
-    def force_disconnect_all(self):
+    def _end_recording(self):
+        rec = self._recorder
+        if rec is None: return
         with self._lock:
-            conns = list(self._clients)
-        for s in conns:
-            self._drop(s)  # _drop 안에서 close + self._clients 제거 + 시그널 emit
+            if rec.key is None: return
+            rec.reset()
+        self._disk.submit(rec.close)
 
-    def stop(self): self._stop.set()
+    def _pump(self):
+        # 다른 단계가 깨움(call_soon_threadsafe): 완성된 인코딩 결과 + 최신 커서
+        for enc in self._enc_slot.take_nowait() or ():
+            self._send_encoded(enc)
+        self._send_cursor()
 
-# ===== 제어 서버 =====
-class ControlServer(QThread):
-    # UI에서는 표시하지 않지만 강제 끊기에 사용
-    def __init__(self, host: str, port: int):
-        super().__init__()
-        self.host = host; self.port = port
-        self._stop = threading.Event()
-        self._lock = threading.Lock()
-        self._clients: set[socket.socket] = set()
+    # ---- 캡처 단계: 구독 중인 모니터만, 모니터마다 자기 다음 프레임 시각까지 잠들었다가 grab ----
+    def _capture_loop(self):
+        src = self._source
+        next_due: dict[int, float] = {}
+        while not self._stop.is_set():
+            with self._lock:
+                subs = {p.monitor for p in self._clients.values()}
+            if not subs:
+                self._kick.wait(); self._kick.clear()   # 새 시청자(또는 종료)까지 완전히 대기
+                next_due.clear(); continue
+            now = time.monotonic()
+            for m in list(next_due):
+                if m not in subs: del next_due[m]       # 구독이 끝난 모니터는 더 이상 캡처 안 함
+            for m in subs: next_due.setdefault(m, now)
+            due = min(next_due.values())
+            if now < due and self._kick.wait(due - now):
+                now = time.monotonic()                  # 새 시청자 → 기다리지 않고 즉시
+                for m in next_due: next_due[m] = now
+            self._kick.clear()
+            if self._stop.is_set(): break
+            now = time.monotonic()
+            grabbed = {}
+            for m, t in next_due.items():
+                if now < t or m > len(src.monitors) - 1: continue
+                grabbed[m] = (src.grab(m, self._frames.setdefault(m, FramePool())), now)
+                iv = self._intervals.get(m, 1.0 / max(1, FRAME_FPS))
+                next_due[m] = t + iv
+                if next_due[m] < now: next_due[m] = now + iv   # 밀린 틱은 몰아서 처리하지 않음
+            if grabbed: self._cap_slot.merge(grabbed)
 
-    def _drop(self, s: socket.socket):
-        try:
-            s.shutdown(socket.SHUT_RDWR)
-        except Exception:
-            pass
+    # ---- 커서 단계: 화면 캡처와 별도로 CURSOR_HZ마다 위치 확인, 바뀌었을 때만 송신 단계를 깨움 ----
+    def _cursor_loop(self):
+        src = CursorSource()
+        if not src.ok: return   # 이 OS에서는 커서 채널 없음(화면 프레임만)
+        iv = 1.0 / CURSOR_HZ; version = 0
+        while not self._stop.is_set():
+            with self._lock:
+                watching = bool(self._clients)
+            if not watching:
+                self._stop.wait(0.25); continue
+            cur = src.poll()
+            if src.version != version:
+                version = src.version
+                if src.shape is not None:
+                    w, h, hx, hy, bgra = src.shape
+                    body = CURSOR_SHAPE_HDR.pack(w, h, hx, hy) + zlib.compress(bgra.tobytes())
+                else:
+                    body = CURSOR_SHAPE_HDR.pack(0, 0, 0, 0)   # 모양을 못 읽음 → 클라이언트 기본 화살표
+                self._cursor_shape = (version, (VIDEO_HDR.pack(PKT_CURSOR_SHAPE, len(body), 0, 0), body))
+            if cur is not None and cur != self._cursor:
+                self._cursor = cur; self._wake()
+            self._stop.wait(iv)
+
+    def _send_cursor(self):
+        # 송신 단계에서만 호출: 시청자마다 자기 모니터 기준 좌표로 바꿔서, 바뀐 경우에만 넘김
+        cur = self._cursor
+        if cur is None: return
+        version, shape = self._cursor_shape
+        with self._lock:
+            peers = list(self._clients.values())
+        for peer in peers:
+            if not 1 <= peer.monitor <= len(self._monitors): continue
+            mon = self._monitors[peer.monitor - 1]
+            pos = (cur[0] - mon["left"], cur[1] - mon["top"], cur[2])
+            touched = False
+            if version != peer.shape_sent and shape is not None:
+                peer.shape_sent = version; peer.cursor_shape = shape; touched = True
+            if pos != peer.cursor_sent:
+                peer.cursor_sent = pos; touched = True
+                peer.cursor_pos = (VIDEO_HDR.pack(PKT_CURSOR, CURSOR_HDR.size, 0, 0), CURSOR_HDR.pack(*pos[:2], int(pos[2])))
+            if touched: self._flush(peer.sock)
+
+    # ---- 인코딩 단계: 스트림별로 한 번씩만 인코딩해서 같은 스트림 시청자가 결과를 공유 ----
+    def _encode_loop(self):
+        idle_interval = 1.0 / max(1, FRAME_IDLE_FPS)
+        streams: dict[tuple, StreamState] = {}
+        while not self._stop.is_set():
+            item = self._cap_slot.get()   # {모니터: (프레임, 캡처 ts)}
+            if not item: continue
+            now = time.monotonic()
+            m0 = min(item); self.sig_res_changed.emit(item[m0][0].shape[1], item[m0][0].shape[0])
+            with self._lock:
+                fresh_all = self._fresh & self._clients.keys()
+                groups: dict[tuple, set] = {}
+                for c, p in self._clients.items():
+                    if p.monitor not in item: continue   # 이번에 캡처하지 않은 모니터
+                    fh, fw = item[p.monitor][0].shape[:2]
+                    groups.setdefault(p.stream_key(fw, fh), set()).add(c)
+                rec = self._recorder; lead = next(iter(self._clients.values()), None)
+                if rec is not None and lead is not None and lead.monitor in item:
+                    # 녹화기는 가장 먼저 접속한 시청자의 스트림에 끼어 같은 패킷을 받음. 스트림이 바뀌면 키 프레임부터
+                    fh, fw = item[lead.monitor][0].shape[:2]
+                    key = lead.stream_key(fw, fh)
+                    if key != rec.key: rec.key = key; rec.need_key = True
+                    groups[key].add(rec)
+                    if rec.wants_key(now): fresh_all.add(rec)
+                served = set().union(*groups.values()) if groups else set()
+                self._fresh -= served
+            for key in list(streams):
+                if key[4] in item and key not in groups: del streams[key]   # 시청자가 없는 스트림은 상태도 버림
+            # 아직 안 나간 결과가 있으면 회수해서, 그 결과의 기준 프레임으로 델타를 다시 만듦(타일 유실 방지)
+            stale = {e.key: e for e in (self._enc_slot.take_nowait() or ())}
+
+            batch = []; changed: dict[int, bool] = {}
+            for key, socks in groups.items():
+                st = streams.get(key)
+                if st is None: st = streams[key] = StreamState(key)
+                frame, ts = item[st.monitor]
+                fresh = fresh_all & socks; steady = socks - fresh
+                old = stale.pop(key, None)
+                if old is not None:
+                    st.basis = old.basis; st.regions.clear(); fresh |= old.fresh & steady; steady -= fresh
+                    if st.codec == "h264": fresh, steady = fresh | steady, set()   # 인코더 참조가 앞서 감 → IDR
+                elif not fresh and now < st.due:
+                    continue   # 이 스트림은 아직 다음 프레임 차례가 아님(프로필별 FPS)
+                iv = 1.0 / st.fps
+                st.due = max(st.due, now - iv) + iv
+                fh, fw = frame.shape[:2]
+                enc, ch = self._encode_stream(st, frame, ts, fw, fh, fresh, steady)
+                changed[st.monitor] = changed.get(st.monitor, False) or ch
+                if enc is not None: enc.enc_ts = time.monotonic(); batch.append(enc)
+            batch += stale.values()   # 이번에 다루지 않은 스트림(다른 모니터)의 결과는 그대로 다시 넘김
+
+            for m, ch in changed.items():
+                # 캡처는 모니터마다 가장 빠른 스트림 기준. 같은 화면이 이어지면 간격을 늘리고, 바뀌면 즉시 복귀
+                base_interval = 1.0 / max(streams[k].fps for k in groups if k[4] == m)
+                cur = self._intervals.get(m, base_interval)
+                self._intervals[m] = base_interval if ch else min(max(cur, base_interval) * FRAME_BACKOFF, idle_interval)
+            if batch: self._enc_slot.put(batch)
+
+    def _encode_stream(self, st: StreamState, frame, ts, w, h, fresh, steady):
+        # 반환: (EncodedFrame 또는 None, 화면 변경 여부)
+        img = scale_frame(frame, st.scale)   # 영역 평균(INTER_AREA)으로 축소 후 인코딩
+        if st.codec == "h264": return self._encode_h264(st, img, ts, w, h, fresh, steady)
+        changed = True
+        delta = None
+        if st.basis is not None and st.basis.shape == img.shape:
+            mask = dirty_tile_mask(st.basis, img)
+            n = int(mask.sum())
+            st.regions.evict(mask)
+            changed = n > 0
+            if n >= mask.size * TILE_FULL_RATIO: fresh, steady = fresh | steady, set()
+            elif n and steady: delta = encode_tiles(img, mask, quality=st.quality, pool=self._pool)
+        else:
+            fresh, steady = fresh | steady, set(); st.regions.clear()
+
+        full = None
+        if fresh:
+            full = encode_full(img, st.quality, self._pool, cache=st.regions)
+            if full is None:
+                st.regions.clear()
+                with self._lock: self._fresh |= fresh   # 인코딩 실패 → 다음 프레임에서 재시도
+                fresh = set()
+        if full is None and not delta:
+            if not changed or not steady: st.basis = img   # 변경분을 못 보냈으면 기준 유지 → 다음에 다시 델타
+            return None, changed
+        enc = EncodedFrame(
+            st.key, ts, st.basis, img, w, h, fresh, steady,
+            (VIDEO_HDR.pack(full[0], sum(map(len, full[1])), w, h), *full[1]) if full is not None else None,
+            (VIDEO_HDR.pack(PKT_TILES, len(delta), w, h), delta) if delta else None)
+        st.basis = img
+        return enc, changed
+
+    def _encode_h264(self, st: StreamState, img, ts, w, h, fresh, steady):
+        # 프레임 간 압축: 화면이 그대로면 인코딩하지 않음. 새 시청자가 있으면 IDR을 스트림 전체에 보냄
+        changed = st.basis is None or st.basis.shape != img.shape or not np.array_equal(st.basis, img)
+        if not changed and not fresh: return None, False
+        if st.encoder is None or not st.encoder.fits(img):
+            st.encoder = H264Encoder(img.shape[1], img.shape[0], st.quality, st.fps)
+            fresh, steady = fresh | steady, set()
+        key = bool(fresh)
         try:
-            s.close()
+            data = st.encoder.encode(img, ts, key)
         except Exception:
-            pass
+            st.encoder = None; data = b""   # 인코더 오류 → 다음 프레임에서 새 인코더로 IDR부터
+        st.basis = img
+        if not data:
+            with self._lock: self._fresh |= fresh | steady
+            return None, changed
+        everyone = fresh | steady
+        pkt = (VIDEO_HDR.pack(PKT_H264, len(data), w, h), data)
+        return EncodedFrame(st.key, ts, None, img, w, h,
+                            everyone if key else set(), set() if key else everyone,
+                            pkt if key else None, None if key else pkt), changed
+
+    def _send_encoded(self, enc: EncodedFrame):
         with self._lock:
-            self._clients.discard(s)
+            targets = [(self._clients.get(c), enc.full, True) for c in enc.fresh] if enc.full else []
+            if enc.delta: targets += [(self._clients.get(c), enc.delta, False) for c in enc.steady]
+            rec = self._recorder.take(enc) if self._recorder is not None else None
+        if rec is not None: self._disk.submit(self._recorder.write, rec[0], enc.ts, rec[1])   # 디스크는 루프 밖에서
+        for peer, pkt, full in targets:
+            if peer is None: continue   # 그 사이 끊긴 클라이언트
+            if peer.udp is not None: self._send_udp(peer, pkt, enc); continue
+            skipped = not peer.offer(pkt, enc.ts, full, enc.enc_ts)
+            self._flush(peer.sock)
+            if skipped or peer.pending(): self._adapt(peer, skipped)
+
+    def _send_udp(self, peer: VideoPeer, pkt: tuple, enc: EncodedFrame):
+        seq, bufs = peer.stamp_udp(pkt, enc.ts, enc.enc_ts)
+        if self._udp is None or peer.stall(time.monotonic()) > UDP_FALLBACK_STALL:
+            self._udp_off(peer); return   # ack가 끊김(경로 막힘 등) → TCP로 되돌림
+        if not self._udp.send_frame(peer.udp, seq, bufs): self._adapt(peer, True)
 
-    def force_disconnect_all(self):
+    # ---- UDP 협상: hello {"udp": true} → TCP로 토큰 → 클라이언트가 UDP로 토큰 프로브 → 그 주소로 화면 패킷 ----
+    def _on_udp(self):
+        for token, addr in self._udp.probes():
+            s = self._udp_tokens.pop(token, None)
+            with self._lock:
+                peer = self._clients.get(s)
+                if peer is None or peer.udp is not None: continue
+                peer.udp = addr; peer.udp_token = None; self._fresh.add(s)   # UDP 첫 프레임은 전체 프레임
+            peer.notify(info_packet({"t": "udp", "on": True}))
+            self._flush(s); self._kick.set()
+
+    def _udp_off(self, peer: VideoPeer):
         with self._lock:
-            conns = list(self._clients)
-        for s in conns:
-            self._drop(s)
-
-    def run(self):
-        srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        srv.bind((self.host, self.port)); srv.listen(8); srv.settimeout(0.5)
+            peer.udp = None; peer.udp_inflight.clear(); self._fresh.add(peer.sock)
+        peer.notify(info_packet({"t": "udp", "on": False}))
+        self._flush(peer.sock); self._kick.set()
+
+    def _adapt(self, peer: VideoPeer, skipped: bool = False):
+        # ABR 단계가 바뀌면 새 스트림으로 옮겨 가므로 전체 프레임부터. 델타를 건너뛴 경우도 전체 프레임
+        now = time.monotonic()
+        with self._lock:   # 인코딩 단계가 stream_key()를 읽는 것과 원자적으로
+            moved = peer.rate.update(now, peer.backlog(), peer.stall(now), skipped)
+            if moved or skipped: self._fresh.add(peer.sock)
+
+    # ---- 클라이언트 → 서버 메시지(길이+JSON): hello(프로필/코덱/모니터 선택) 등 ----
+    def _on_readable(self, s: socket.socket):
+        with self._lock:
+            peer = self._clients.get(s)
+        if peer is None: return
         try:
-            while not self._stop.is_set():
+            data = s.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        msgs = peer.feed(data) if data else None
+        if msgs is None: self._drop(s); return
+        for m in msgs:
+            t = m.get("t")
+            if t == "ack":
                 try:
-                    c, _ = srv.accept()
-                except socket.timeout:
-                    continue
-                threading.Thread(target=self._handle_conn, args=(c,), daemon=True).start()
-        finally:
-            try: srv.close()
-            except: pass
-
-    def stop(self): self._stop.set()
-
-    # ---- Windows 입력 주입 ----
-    import ctypes
-    user32 = ctypes.windll.user32
-    SetCursorPos = user32.SetCursorPos
-    mouse_event  = user32.mouse_event
-    keybd_event  = user32.keybd_event
-    MOUSEEVENTF_LEFTDOWN   = 0x0002
-    MOUSEEVENTF_LEFTUP     = 0x0004
-    MOUSEEVENTF_RIGHTDOWN  = 0x0008
-    MOUSEEVENTF_RIGHTUP    = 0x0010
-    MOUSEEVENTF_MIDDLEDOWN = 0x0020
-    MOUSEEVENTF_MIDDLEUP   = 0x0040
-    MOUSEEVENTF_WHEEL      = 0x0800
-    KEYEVENTF_KEYUP = 0x0002
+                    if "s" in m:   # UDP 프레임 ack: 유실은 ABR에만 반영(기준 화면 복구는 클라이언트가 키 프레임을 요청)
+                        lost = peer.on_ack_seq(int(m["s"]), time.monotonic())
+                        now = time.monotonic()
+                        with self._lock:
+                            if peer.rate.update(now, 0, peer.stall(now), lost > 0): self._fresh.add(s)
+                        continue
+                    peer.on_ack(int(m.get("n", 0)), time.monotonic())
+                except (TypeError, ValueError): continue
+                self._adapt(peer)
+                continue
+            if t == "udp":
+                if not m.get("on", True) and peer.udp is not None: self._udp_off(peer)   # 클라이언트가 손실이 많아 TCP 요청
+                continue
+            if t == "ping":
+                # 시계 차이 추정용: 클라이언트 시각 c를 서버 시각과 함께 돌려줌
+                peer.notify(info_packet({"t": "pong", "c": m.get("c"), "s": wall_us(time.monotonic()) / 1e6}))
+                continue
+            if t == "key":
+                # 클라이언트가 디코딩에 실패해 기준 화면을 잃음 → 전체 프레임 요청
+                with self._lock: self._fresh.add(s)
+                self._kick.set()
+                continue
+            if t not in ("hello", "viewport"): continue
+            if t == "hello" and peer.version < 2:
+                try: v = int(m.get("v", 1))
+                except (TypeError, ValueError): v = 1
+                if v >= 2:
+                    # 이 알림 이후에 시작하는 화면 패킷부터 FRAME_META가 붙음(송신 순서 = 수신 순서)
+                    peer.notify(info_packet({"t": "hello", "v": min(v, VIDEO_VERSION)})); peer.version = min(v, VIDEO_VERSION)
+            if t == "hello" and m.get("udp") and self._udp is not None and peer.version >= 2 and peer.udp is None:
+                self._udp_tokens.pop(peer.udp_token, None)
+                peer.udp_token = int.from_bytes(os.urandom(4), "big"); self._udp_tokens[peer.udp_token] = s
+                peer.notify(info_packet({"t": "udp", "port": self.port, "token": peer.udp_token}))
+            prof = m.get("profile", peer.profile)
+            codec = m.get("codec", peer.codec)
+            try: mon = int(m.get("monitor", peer.monitor))
+            except (TypeError, ValueError): mon = peer.monitor
+            if not 1 <= mon <= len(self._monitors): mon = peer.monitor
+            if codec == "h264" and not h264_available(): codec = "mjpeg"   # PyAV 없음 → MJPEG로 대체
+            if codec not in VIDEO_CODECS: codec = peer.codec
+            vp = peer.viewport
+            if "w" in m and "h" in m:
+                try: vw, vh = int(m["w"]), int(m["h"])
+                except (TypeError, ValueError): vw = vh = 0
+                vp = (vw, vh) if vw >= 16 and vh >= 16 else None
+            if prof in STREAM_PROFILES and (prof, codec, mon, vp) != (peer.profile, peer.codec, peer.monitor, peer.viewport):
+                # 프로필/코덱/모니터/뷰어 크기 변경 → 새 스트림 기준의 전체 프레임부터 다시 받아야 함
+                with self._lock:
+                    if mon != peer.monitor:
+                        peer.monitor = mon; peer.notify(self._monitor_info(peer))   # 클라이언트 좌표 원점 갱신
+                        peer.cursor_sent = None   # 새 모니터 기준 커서 위치를 다시 보냄
+                    peer.profile = prof; peer.codec = codec; peer.viewport = vp; self._fresh.add(s)
+                self._kick.set()
+        self._flush(s)   # 알림(pong/hello/모니터 목록 등)을 바로 내보냄
+
+    def _flush(self, s: socket.socket):
+        with self._lock:
+            peer = self._clients.get(s)
+        if peer is None: return
+        try: peer.flush()
+        except OSError: self._drop(s); return
+        # 커널 버퍼가 찬 클라이언트만 쓰기 가능 이벤트를 기다림(다 보내면 해제)
+        if peer.pending():
+            if s not in self._writing: self._writing.add(s); self.net.loop.add_writer(s, self._flush, s)
+        elif s in self._writing:
+            self._writing.discard(s); self.net.loop.remove_writer(s)
+
+    def _monitor_info(self, peer: VideoPeer) -> tuple:
+        # PKT_INFO: 모니터 목록(가상 화면 좌표) + 이 클라이언트가 구독 중인 모니터
+        mons = [{"i": i, "x": m["left"], "y": m["top"], "w": m["width"], "h": m["height"]}
+                for i, m in enumerate(self._monitors, 1)]
+        return info_packet({"t": "monitors", "list": mons, "cur": peer.monitor})
+
+    def capture_stats(self) -> dict:
+        # 캡처 경로 할당 추적: 시청 중 allocs가 계속 늘면 버퍼 재사용이 깨진 것
+        pools = list(self._frames.values())
+        return {"allocs": sum(p.allocs for p in pools), "reused": sum(p.reused for p in pools),
+                "cap_dropped": self._cap_slot.dropped, "enc_dropped": self._enc_slot.dropped}
+
+    def _wake(self):
+        self.net.call(self._pump)
+
+    def stop(self): self._stop.set(); self._kick.set(); super().stop()
+
+# ===== 제어 서버 =====
+class ControlServer(LoopServer):
+    # UI에서는 표시하지 않지만 강제 끊기에 사용. 입력 주입은 짧은 API 호출이라 루프에서 바로 처리
+    # 실제 주입은 백엔드(inject.py: Windows SendInput / X11 XTest / 메모리 기록)가 묶음 단위로
+    def __init__(self, host: str, port: int, backend=None):
+        super().__init__(host, port, CONTROL_MAX_CONNS)
+        self.backend = backend or open_backend(INPUT_BACKEND)
+        self.moves_coalesced = 0   # 주입하지 않고 건너뛴(더 새 위치가 뒤에 있던) 마우스 이동 수
 
     VK_FALLBACK = {
         "ESC":0x1B,"ENTER":0x0D,"BACK":0x08,"TAB":0x09,"SPACE":0x20,
@@ -172,111 +684,86 @@ class ControlServer(QThread):
         "HANGUL":0x15,"HANJA":0x19,
     }
 
-    def _handle_conn(self, sock: socket.socket):
-        with self._lock:
-            self._clients.add(sock)
-        try:
-            sock.settimeout(1.0)
-            while True:
-                hdr = recv_exact(sock, 4)
-                if not hdr: break
-                jlen = struct.unpack(">I", hdr)[0]
-                body = recv_exact(sock, jlen)
-                if not body: break
-                msg = json.loads(body.decode("utf-8", errors="ignore"))
-                self._handle_msg(msg)
-        except Exception:
-            pass
-        finally:
-            try: sock.close()
-            except: pass
-            with self._lock:
-                self._clients.discard(sock)
+    async def handle(self, sock: socket.socket, ip: str):
+        # 연결이 쉬고 있어도 스레드를 잡지 않으므로 유휴 타임아웃 없음
+        # 한 번에 읽은 메시지를 모아서 주입 → 밀려 있던 마우스 이동은 마지막 위치만, 나머지는 백엔드 호출 1번(_inject)
+        async for msgs in sock_messages(sock, CONTROL_MSG_MAX, binary=True):
+            evs = []
+            for msg in msgs:
+                if type(msg) is bytes: evs.extend(CTRL_EVENT.iter_unpack(msg))
+                elif msg.get("t") == "hello":
+                    # 이진 입력 묶음을 받을 수 있음을 알림(예전 서버는 hello를 무시 → 클라이언트는 JSON 그대로)
+                    raw = json.dumps({"t": "hello", "v": CONTROL_VERSION}).encode("utf-8")
+                    await asyncio.get_running_loop().sock_sendall(sock, struct.pack(">I", len(raw)) + raw)
+                else:
+                    ev = self._json_event(msg)   # 예전 클라이언트의 JSON 입력도 같은 묶음에(순서 유지)
+                    if ev: evs.append(ev)
+            self._inject(evs)
+
+    def _inject(self, evs: list[tuple]):
+        # 이진 입력 이벤트(종류, 인자, a, b): JSON 파싱/문자열 비교 없이 순서대로
+        # 연속된 이동은 마지막 것만 → 부하로 밀린 이동을 하나씩 재생하느라 입력이 늦어지지 않음(버튼/키 사이 위치는 유지)
+        if not evs: return
+        n = len(evs); out = []
+        for i, ev in enumerate(evs):
+            if ev[0] == EV_MOVE and i + 1 < n and evs[i + 1][0] == EV_MOVE: self.moves_coalesced += 1; continue
+            out.append(ev)
+        self.backend.inject(out)
 
-    def _handle_msg(self, m: dict):
+    def _json_event(self, m: dict) -> tuple | None:
+        # 예전(v1) JSON 입력 메시지 → 이진 이벤트와 같은 (종류, 인자, a, b). 모르는 메시지/키 → None
         t = m.get("t")
         if t == "mouse_move":
-            self.SetCursorPos(int(m.get("x",0)), int(m.get("y",0))); return
-        if t == "mouse_down":
-            btn = m.get("btn","left")
-            if btn=="left": self.mouse_event(self.MOUSEEVENTF_LEFTDOWN,0,0,0,0)
-            elif btn=="right": self.mouse_event(self.MOUSEEVENTF_RIGHTDOWN,0,0,0,0)
-            else: self.mouse_event(self.MOUSEEVENTF_MIDDLEDOWN,0,0,0,0); return
-            return
-        if t == "mouse_up":
+            return (EV_MOVE, 0, int(m.get("x",0)), int(m.get("y",0)))
+        if t in ("mouse_down", "mouse_up"):
             btn = m.get("btn","left")
-            if btn=="left": self.mouse_event(self.MOUSEEVENTF_LEFTUP,0,0,0,0)
-            elif btn=="right": self.mouse_event(self.MOUSEEVENTF_RIGHTUP,0,0,0,0)
-            else: self.mouse_event(self.MOUSEEVENTF_MIDDLEUP,0,0,0,0); return
-            return
+            return (EV_DOWN if t == "mouse_down" else EV_UP, CTRL_BUTTONS.index(btn) if btn in CTRL_BUTTONS else 2, 0, 0)
         if t == "mouse_wheel":
-            self.mouse_event(self.MOUSEEVENTF_WHEEL, 0,0, int(m.get("delta",0)), 0); return
+            return (EV_WHEEL, 0, int(m.get("delta",0)), 0)
         if t == "key":
-            vk = int(m.get("vk", 0)); down = bool(m.get("down", True))
-            if vk:
-                self.keybd_event(vk, 0, 0 if down else self.KEYEVENTF_KEYUP, 0); return
+            kind = EV_KEY_DOWN if m.get("down", True) else EV_KEY_UP
+            vk = int(m.get("vk", 0))
+            if vk: return (kind, vk, 0, 0)
             name = m.get("key","")
             if name == " ": name = "SPACE"
             up = name.upper()
-            if len(up)==1 and ("A"<=up<="Z" or "0"<=up<="9"):
-                self.keybd_event(ord(up), 0, 0 if down else self.KEYEVENTF_KEYUP, 0); return
+            if len(up)==1 and ("A"<=up<="Z" or "0"<=up<="9"): return (kind, ord(up), 0, 0)
             vk2 = self.VK_FALLBACK.get(up,0)
-            if vk2: self.keybd_event(vk2, 0, 0 if down else self.KEYEVENTF_KEYUP, 0)
-
-    def force_disconnect_all(self):
-        with self._lock:
-            conns = list(self._clients)
-        for s in conns:
-            try: s.shutdown(socket.SHUT_RDWR)
-            except Exception: pass
-            try: s.close()
-            except Exception: pass
+            if vk2: return (kind, vk2, 0, 0)
+        return None
 
 # ===== 파일 서버 =====
-class FileServer(QThread):
+class FileServer(LoopServer):
+    # 요청(길이+JSON)은 루프에서 받고, 디스크/전송은 공유 실행기(NET_IO_THREADS개)에서 블로킹으로 → 나머지는 대기
     def __init__(self, host: str, port: int):
-        super().__init__()
-        self.host = host; self.port = port
-        self._stop = threading.Event()
-
-    def run(self):
-        srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        srv.bind((self.host, self.port)); srv.listen(8); srv.settimeout(0.5)
-        try:
-            while not self._stop.is_set():
-                try:
-                    c, _ = srv.accept()
-                except socket.timeout:
-                    continue
-                threading.Thread(target=self._handle_conn, args=(c,), daemon=True).start()
-        finally:
-            try: srv.close()
-            except: pass
-
-    def stop(self): self._stop.set()
+        super().__init__(host, port, FILE_MAX_CONNS)
 
-    def _handle_conn(self, sock: socket.socket):
+    async def handle(self, sock: socket.socket, ip: str):
+        hdr = await asyncio.wait_for(sock_recv_exact(sock, 4), FILE_IO_TIMEOUT)
+        if not hdr: return
+        jlen = struct.unpack(">I", hdr)[0]
+        if jlen > FILE_REQ_MAX: return
+        jraw = await asyncio.wait_for(sock_recv_exact(sock, jlen), FILE_IO_TIMEOUT)
+        if not jraw: return
+        req = json.loads(jraw.decode("utf-8", errors="ignore"))
+        sock.settimeout(FILE_IO_TIMEOUT)   # 이제부터 실행기 스레드가 블로킹으로 씀
+        job = asyncio.get_running_loop().run_in_executor(None, self._handle_req, sock, req)
         try:
-            hdr = recv_exact(sock, 4)
-            if not hdr: return
-            jlen = struct.unpack(">I", hdr)[0]
-            jraw = recv_exact(sock, jlen)
-            if not jraw: return
-            req = json.loads(jraw.decode("utf-8", errors="ignore"))
-            cmd = req.get("cmd","")
-
-            if cmd == "ls":                      self._handle_ls(sock, req)
-            elif cmd == "upload_to":             self._handle_upload_to(sock, req)
-            elif cmd == "upload_tree_to":        self._handle_upload_tree_to(sock, req)
-            elif cmd == "download_paths":        self._handle_download_paths(sock, req)
-            elif cmd == "download_tree_paths":   self._handle_download_tree_paths(sock, req)
-            elif cmd == "download_paths_as_zip": self._handle_download_paths_as_zip(sock, req)
-        except Exception:
-            pass
-        finally:
-            try: sock.close()
-            except: pass
+            await asyncio.shield(job)
+        except asyncio.CancelledError:
+            # 강제 끊기/종료: 전송 중인 작업을 깨워서 끝난 뒤에 소켓을 닫음
+            try: sock.shutdown(socket.SHUT_RDWR)
+            except OSError: pass
+            await asyncio.wait([job]); raise
+
+    def _handle_req(self, sock: socket.socket, req: dict):
+        cmd = req.get("cmd","")
+        if cmd == "ls":                      self._handle_ls(sock, req)
+        elif cmd == "upload_to":             self._handle_upload_to(sock, req)
+        elif cmd == "upload_tree_to":        self._handle_upload_tree_to(sock, req)
+        elif cmd == "download_paths":        self._handle_download_paths(sock, req)
+        elif cmd == "download_tree_paths":   self._handle_download_tree_paths(sock, req)
+        elif cmd == "download_paths_as_zip": self._handle_download_paths_as_zip(sock, req)
 
     # 이하 handlers 동일(생략 없이 사용)
     def _handle_ls(self, sock, req):
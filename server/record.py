@@ -0,0 +1,72 @@
+# server/record.py
+import os, time, itertools
+
+from utils import wall_us
+from common import RECORD_EXT, RECORD_KEYINT_SEC, REC_MAGIC, REC_HDR, REC_FRAME, REC_INDEX, REC_KEY
+
+# ===== 세션 녹화: 시청자에게 보내는 인코딩 결과를 그대로 파일에 이어 씀 =====
+class SessionRecorder:
+    # 녹화기는 가장 먼저 접속한 시청자의 스트림에 한 명의 시청자처럼 끼어 있음 → 따로 캡처/인코딩하지 않음
+    # key/need_key는 VideoServer._lock 안에서만(인코딩·송신 단계), 파일 쓰기/닫기는 녹화 스레드(VideoServer._disk)에서만
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.key = None          # 따라가는 스트림 키. 바뀌면 새 스트림의 키 프레임부터
+        self.need_key = True
+        self.path = None         # 지금 쓰는 파일(세션 사이에는 None)
+        self._f = None; self._idx = None
+        self._last_key = 0.0
+
+    def wants_key(self, now: float) -> bool:
+        return self.need_key or now - self._last_key >= RECORD_KEYINT_SEC
+
+    def take(self, enc) -> tuple[tuple, bool] | None:
+        # 이 인코딩 결과에서 기록할 패킷과 키 프레임 여부. 키 프레임 전의 델타/다른 스트림 결과는 버림
+        if enc.key != self.key: return None
+        if enc.full is not None and self in enc.fresh:
+            self.need_key = False; self._last_key = time.monotonic()
+            return enc.full, True
+        if enc.delta is not None and self in enc.steady and not self.need_key:
+            return enc.delta, False
+        return None
+
+    def write(self, pkt: tuple, ts: float, key: bool):
+        try:
+            if self._f is None:
+                if not key: return
+                self._open(ts)
+            off = self._f.tell()
+            self._f.write(REC_FRAME.pack(wall_us(ts), REC_KEY if key else 0, sum(len(b) for b in pkt)))
+            for b in pkt: self._f.write(b)
+            if key:
+                # 본문을 먼저 내보낸 뒤 색인 → 중간에 끊겨도 색인은 항상 온전한 기록만 가리킴
+                self._f.flush()
+                self._idx.write(REC_INDEX.pack(wall_us(ts), off)); self._idx.flush()
+        except OSError:
+            self.close()   # 디스크 오류 등 → 다음 키 프레임에서 새 파일(스트리밍은 계속)
+
+    def _open(self, ts: float):
+        os.makedirs(self.folder, exist_ok=True)
+        # 같은 초에 다시 열어도(재접속, 디스크 오류 뒤 다음 키 프레임) 앞 녹화를 덮어쓰지 않음: 있으면 _1, _2 ...
+        base = os.path.join(self.folder, time.strftime("session_%Y%m%d_%H%M%S"))
+        for n in itertools.count():
+            path = base + (f"_{n}" if n else "") + RECORD_EXT
+            try: self._f = open(path, "xb")
+            except FileExistsError: continue
+            try: self._idx = open(path + ".idx", "xb")
+            except FileExistsError:   # 본문 없이 남은 색인 → 이 이름은 건너뜀
+                self._f.close(); self._f = None; os.remove(path); continue
+            break
+        self.path = path
+        self._f.write(REC_HDR.pack(REC_MAGIC, wall_us(ts)))
+
+    def reset(self):
+        # 세션 끝(시청자 0명) 또는 서버 종료: 스트림 추적을 처음으로. 파일은 close()로 따로 닫음
+        self.key = None; self.need_key = True
+
+    def close(self):
+        # 다음 세션은 새 파일
+        for f in (self._f, self._idx):
+            if f is None: continue
+            try: f.close()
+            except OSError: pass
+        self._f = self._idx = None; self.path = None
@@ -0,0 +1,226 @@
+# server/relay.py
+# 중계(팬아웃) 노드: 상위 서버(또는 다른 중계 노드)에 시청자 1명으로 붙어서, 받은 인코딩 패킷을 바꾸지 않고
+# 하위 VideoClient 여러 명에게 다시 보냄. 재인코딩이 없어서 발표자 PC는 스트림 1개만 보내고, 중계를 이어 붙여 확장
+#
+#   python server/relay.py 192.168.0.10                          # 상위 192.168.0.10:VIDEO_PORT → 이 PC의 VIDEO_PORT
+#   python server/relay.py 10.0.0.5:50107 --port 50207 --codec h264
+#
+# 시청자는 중계 노드 주소로 평소처럼 접속(영상만; 제어/파일 채널은 없음)
+import os, sys, time, json, struct, socket, asyncio, argparse, collections
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from utils import wall_us, mono_from_wall
+from aio import LoopServer
+from codec import h264_is_key
+from net import VideoPeer, info_packet, VIDEO_SNDBUF
+from common import (DEFAULT_HOST, VIDEO_PORT, VIDEO_HDR, FRAME_META, FRAME_PKTS, VIDEO_VERSION, PKT_INFO,
+                    PKT_CURSOR, PKT_CURSOR_SHAPE, PKT_FRAME, PKT_BANDS, PKT_REGIONS, PKT_H264,
+                    DEFAULT_PROFILE, DEFAULT_CODEC, DEFAULT_MONITOR, STREAM_PROFILES, VIDEO_CODECS,
+                    RELAY_MAX_CONNS, RELAY_RETRY_SEC, RELAY_KEY_INTERVAL)
+
+def is_key_packet(ptype: int, body: bytes) -> bool:
+    # 앞 화면 없이 그릴 수 있는 패킷 → 새로 합류했거나 밀려서 건너뛴 시청자가 여기서부터 받기 시작
+    if ptype in (PKT_FRAME, PKT_BANDS, PKT_REGIONS): return True
+    return ptype == PKT_H264 and h264_is_key(body)
+
+# ===== 중계 서버: 상위 연결 1개(코루틴) + 하위 시청자(LoopServer 연결) =====
+class RelayServer(LoopServer):
+    def __init__(self, host: str, port: int, up_host: str, up_port: int = VIDEO_PORT,
+                 profile: str = DEFAULT_PROFILE, codec: str = DEFAULT_CODEC, monitor: int = DEFAULT_MONITOR):
+        super().__init__(host, port, RELAY_MAX_CONNS)
+        self.up_host = up_host; self.up_port = up_port
+        self.profile = profile; self.codec = codec; self.monitor = monitor
+        self._peers: dict[socket.socket, VideoPeer] = {}   # 하위 시청자(루프 스레드에서만)
+        self._fresh: set[socket.socket] = set()            # 키 패킷을 기다리는 시청자(새로 왔거나 델타를 건너뜀)
+        self._writing: set[socket.socket] = set()
+        self._up = None           # 상위 연결 StreamWriter(끊겼으면 None)
+        self._up_ver = 1          # 상위가 v2를 확인해 주면 화면 패킷 뒤에 FRAME_META
+        self._rx_n = 0            # 상위에 ack할 수신 패킷 수(VideoClient와 같은 방식)
+        self._key_ts = 0.0        # 마지막 키 프레임 요청 시각
+        self._clock = collections.deque(maxlen=8)   # (왕복 시간, 상위 시각 - 이 PC 시각) 표본
+        self._offset = None
+        self._monitors = None     # 상위의 모니터 목록 알림 패킷(새 시청자에게 먼저 보냄)
+        self._shape = None        # 최신 커서 모양/위치 패킷
+        self._cursor = None
+        self.frames_in = 0; self.bytes_in = 0
+
+    # ---- 상위 연결: 끊기면 RELAY_RETRY_SEC 뒤에 다시. 하위 시청자는 그대로 두고 재접속 후 키 프레임부터 ----
+    async def serve(self):
+        up = asyncio.get_running_loop().create_task(self._upstream_loop())
+        try:
+            await super().serve()
+        finally:
+            up.cancel()
+            await asyncio.gather(up, return_exceptions=True)
+
+    async def _upstream_loop(self):
+        while True:
+            try:
+                await self._upstream()
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                pass
+            finally:
+                if self._up is not None: self._up.close(); self._up = None
+            self._fresh |= self._peers.keys()   # 새 연결의 인코딩 기준은 처음부터
+            await asyncio.sleep(RELAY_RETRY_SEC)
+
+    async def _upstream(self):
+        reader, self._up = await asyncio.wait_for(asyncio.open_connection(self.up_host, self.up_port), 5.0)
+        self._up_ver = 1; self._rx_n = 0; self._clock.clear(); self._offset = None; self._key_ts = 0.0
+        self._send_up({"t": "hello", "v": VIDEO_VERSION, "profile": self.profile, "codec": self.codec,
+                       "monitor": self.monitor})
+        ping_ts = 0.0
+        while True:
+            hdr = await reader.readexactly(VIDEO_HDR.size)
+            ptype, n, _, _ = VIDEO_HDR.unpack(hdr)
+            meta = await reader.readexactly(FRAME_META.size) if self._up_ver >= 2 and ptype in FRAME_PKTS else None
+            body = await reader.readexactly(n)
+            self.bytes_in += len(hdr) + n + (len(meta) if meta else 0)
+            if ptype in (PKT_CURSOR, PKT_CURSOR_SHAPE): self._on_cursor(ptype, (hdr, body))
+            else:
+                if ptype == PKT_INFO: self._on_info(hdr, body)
+                elif ptype in FRAME_PKTS: self._on_frame(ptype, hdr, body, meta)
+                self._rx_n += 1
+                self._send_up({"t": "ack", "n": self._rx_n})   # 상위 ABR: 상위 → 이 노드 구간의 지연/처리량
+            now = time.time()
+            if self._up_ver >= 2 and now - ping_ts >= 2.0:
+                ping_ts = now; self._send_up({"t": "ping", "c": now})
+
+    def _send_up(self, obj: dict):
+        if self._up is None: return
+        raw = json.dumps(obj).encode("utf-8")
+        self._up.write(struct.pack(">I", len(raw)) + raw)
+
+    def _request_key(self):
+        now = time.monotonic()
+        if now - self._key_ts < RELAY_KEY_INTERVAL: return   # 키 프레임 도착 전 연속 요청 방지
+        self._key_ts = now; self._send_up({"t": "key"})
+
+    def _on_info(self, hdr: bytes, body: bytes):
+        try: info = json.loads(body.decode("utf-8", "ignore"))
+        except ValueError: info = {}
+        t = info.get("t")
+        if t == "hello":
+            self._up_ver = int(info.get("v", 1)); return
+        if t == "pong":
+            # NTP식 시계 차이(왕복 시간이 가장 짧은 표본): 상위 시각을 이 PC 시계로 바꿔서 하위에 다시 찍어 줌
+            try: c, s = float(info["c"]), float(info["s"])
+            except (KeyError, TypeError, ValueError): return
+            now = time.time()
+            if now >= c: self._clock.append((now - c, s - (c + now) / 2.0)); self._offset = min(self._clock)[1]
+            return
+        if t == "monitors":
+            self.monitor = int(info.get("cur", self.monitor)); self._monitors = (hdr, body)
+        for s, peer in self._peers.items():   # 그 밖의 알림은 그대로 전달
+            peer.notify((hdr, body)); self._flush(s)
+
+    def _on_frame(self, ptype: int, hdr: bytes, body: bytes, meta: bytes | None):
+        self.frames_in += 1
+        now = time.monotonic(); cap = enc = now
+        if meta is not None and self._offset is not None:
+            _, c, e, _ = FRAME_META.unpack(meta)
+            cap = mono_from_wall(c - int(self._offset * 1_000_000)); enc = mono_from_wall(e - int(self._offset * 1_000_000))
+        key = is_key_packet(ptype, body); pkt = (hdr, body)
+        for s, peer in self._peers.items():
+            if s in self._fresh:
+                if not key: continue   # 기준 화면이 없는 시청자에게 델타는 소용없음
+                self._fresh.discard(s)
+            if not peer.offer(pkt, cap, key, enc):
+                self._fresh.add(s)   # 밀려서 델타를 버림 → 다음 키 프레임부터
+            self._flush(s)
+        if self._fresh: self._request_key()
+
+    def _on_cursor(self, ptype: int, pkt: tuple):
+        # 커서는 ack 없이 최신 값만: 밀린 시청자에게는 프레임 경계에서 마지막 값 하나만 나감
+        if ptype == PKT_CURSOR_SHAPE: self._shape = pkt
+        else: self._cursor = pkt
+        for s, peer in self._peers.items():
+            if ptype == PKT_CURSOR_SHAPE: peer.cursor_shape = pkt
+            else: peer.cursor_pos = pkt
+            self._flush(s)
+
+    # ---- 하위 시청자 ----
+    async def handle(self, c: socket.socket, ip: str):
+        loop = asyncio.get_running_loop()
+        c.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, VIDEO_SNDBUF)
+        self._peers[c] = peer = VideoPeer(c, ip); self._fresh.add(c)
+        peer.profile, peer.codec, peer.monitor = self.profile, self.codec, self.monitor
+        loop.add_reader(c, self._on_readable, c)
+        try:
+            if self._monitors is not None: peer.notify(self._monitors)
+            peer.cursor_shape, peer.cursor_pos = self._shape, self._cursor
+            self._flush(c); self._request_key()
+            await loop.create_future()   # 끊길 때까지(_drop → 취소)
+        finally:
+            loop.remove_reader(c); loop.remove_writer(c); self._writing.discard(c)
+            self._peers.pop(c, None); self._fresh.discard(c)
+
+    def _on_readable(self, s: socket.socket):
+        peer = self._peers.get(s)
+        if peer is None: return
+        try:
+            data = s.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        msgs = peer.feed(data) if data else None
+        if msgs is None: self._drop(s); return
+        for m in msgs:
+            t = m.get("t")
+            if t == "ack":
+                try: peer.on_ack(int(m.get("n", 0)), time.monotonic())
+                except (TypeError, ValueError): pass
+            elif t == "ping":
+                peer.notify(info_packet({"t": "pong", "c": m.get("c"), "s": wall_us(time.monotonic()) / 1e6}))
+            elif t == "key":
+                self._fresh.add(s); self._request_key()
+            elif t == "hello" and peer.version < 2:
+                # 프로필/코덱/모니터 요청은 무시(모두 같은 상위 스트림을 받음). 헤더 버전만 협상
+                try: v = int(m.get("v", 1))
+                except (TypeError, ValueError): v = 1
+                if v >= 2: peer.notify(info_packet({"t": "hello", "v": min(v, VIDEO_VERSION)})); peer.version = min(v, VIDEO_VERSION)
+        self._flush(s)
+
+    def _flush(self, s: socket.socket):
+        peer = self._peers.get(s)
+        if peer is None: return
+        try: peer.flush()
+        except OSError: self._drop(s); return
+        if peer.pending():
+            if s not in self._writing: self._writing.add(s); self.net.loop.add_writer(s, self._flush, s)
+        elif s in self._writing:
+            self._writing.discard(s); self.net.loop.remove_writer(s)
+
+    def stats(self) -> dict:
+        return {"upstream": self._up is not None, "viewers": len(self._peers), "waiting_key": len(self._fresh),
+                "rejected": self.rejected, "frames_in": self.frames_in, "bytes_in": self.bytes_in}
+
+def main():
+    ap = argparse.ArgumentParser(description="영상 중계(팬아웃) 노드: 상위 스트림 1개를 여러 시청자에게 그대로 전달")
+    ap.add_argument("upstream", help="상위 서버 또는 중계 노드 host[:port]")
+    ap.add_argument("--host", default=DEFAULT_HOST)
+    ap.add_argument("--port", type=int, default=VIDEO_PORT, help="시청자가 접속할 포트")
+    ap.add_argument("--profile", default=DEFAULT_PROFILE, choices=tuple(STREAM_PROFILES))
+    ap.add_argument("--codec", default=DEFAULT_CODEC, choices=VIDEO_CODECS)
+    ap.add_argument("--monitor", type=int, default=DEFAULT_MONITOR)
+    args = ap.parse_args()
+    up_host, _, up_port = args.upstream.partition(":")
+    relay = RelayServer(args.host, args.port, up_host, int(up_port or VIDEO_PORT), args.profile, args.codec, args.monitor)
+    relay.start()
+    last = (0, 0, time.monotonic())
+    try:
+        while not relay.wait(5000):
+            st = relay.stats(); now = time.monotonic(); dt = max(now - last[2], 1e-6)
+            print(f"[relay] 상위 {'연결' if st['upstream'] else '끊김'}  시청자 {st['viewers']}  "
+                  f"{(st['frames_in'] - last[0]) / dt:.1f} fps  {(st['bytes_in'] - last[1]) * 8 / dt / 1e6:.2f} Mbps",
+                  flush=True)
+            last = (st["frames_in"], st["bytes_in"], now)
+    except KeyboardInterrupt:
+        relay.stop(); relay.wait(3000)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# server/udp.py
+import socket, itertools
+import numpy as np
+
+import fec
+from common import UDP_HDR, UDP_PROBE, UDP_MAGIC, UDP_SHARD, UDP_FEC_GROUP, UDP_FEC_PARITY
+
+UDP_SNDBUF = 4 * 1024 * 1024   # 키 프레임 한 장의 조각이 한꺼번에 들어갈 만큼
+
+def fec_datagrams(seq: int, bufs) -> list[bytes]:
+    # 프레임 바이트(VIDEO_HDR + FRAME_META + payload)를 UDP_SHARD 조각으로 자르고 묶음마다 패리티를 붙임
+    # 묶음을 번갈아 가며 보내는 순서로 반환 → 연속 유실(버스트)이 한 묶음에 몰리지 않음
+    data = b"".join(bufs); size = len(data); n = max(1, -(-size // UDP_SHARD))
+    arr = np.zeros((n, UDP_SHARD), dtype=np.uint8)
+    arr.reshape(-1)[:size] = np.frombuffer(data, dtype=np.uint8)
+    groups = []
+    for g, start in enumerate(range(0, n, UDP_FEC_GROUP)):
+        block = arr[start:start + UDP_FEC_GROUP]
+        out = [UDP_HDR.pack(seq, size, i, n, UDP_FEC_GROUP, UDP_FEC_PARITY) + data[i * UDP_SHARD:(i + 1) * UDP_SHARD]
+               for i in range(start, start + len(block))]   # 마지막 조각은 자른 그대로(수신 측이 0으로 채움)
+        par = fec.encode(block, fec.parity_count(len(block), UDP_FEC_GROUP, UDP_FEC_PARITY))
+        out += [UDP_HDR.pack(seq, size, n + g * UDP_FEC_PARITY + j, n, UDP_FEC_GROUP, UDP_FEC_PARITY) + p.tobytes()
+                for j, p in enumerate(par)]
+        groups.append(out)
+    return [d for row in itertools.zip_longest(*groups) for d in row if d is not None]
+
+# ===== 영상 UDP 소켓: TCP와 같은 포트 번호. 클라이언트 프로브로 주소를 알고, 화면 패킷만 이쪽으로 =====
+class UdpSender:
+    def __init__(self, host: str, port: int):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, UDP_SNDBUF)
+        s.bind((host, port)); s.setblocking(False)
+        self.sock = s
+        self.dropped = 0   # 송신 버퍼가 차서 못 보낸 프레임 수
+
+    def probes(self) -> list[tuple[int, tuple]]:
+        # 도착한 프로브 (토큰, 클라이언트 주소). NAT 뒤라면 이 주소가 바깥에서 본 주소
+        out = []
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(64)
+            except (BlockingIOError, InterruptedError):
+                return out
+            except ConnectionResetError:
+                continue   # Windows: 앞서 보낸 곳의 ICMP port unreachable
+            except OSError:
+                return out
+            if len(data) != UDP_PROBE.size: continue
+            magic, token = UDP_PROBE.unpack(data)
+            if magic == UDP_MAGIC: out.append((token, addr))
+
+    def send_frame(self, addr: tuple, seq: int, bufs) -> bool:
+        # 송신 버퍼가 차면 이 프레임의 나머지는 버림(클라이언트는 복구 못 하면 건너뜀). False → 못 보냄
+        for d in fec_datagrams(seq, bufs):
+            try:
+                self.sock.sendto(d, addr)
+            except (BlockingIOError, InterruptedError):
+                self.dropped += 1; return False
+            except OSError:
+                return False
+        return True
+
+    def close(self):
+        try: self.sock.close()
+        except OSError: pass
@@ -7,8 +7,10 @@ from PySide6.QtWidgets import (
 from PySide6.QtGui import QPixmap, QColor, QPainter, QBrush
 
 from net import VideoServer, ControlServer, FileServer
+from mux import MuxServer
 from utils import hms
-from common import DEFAULT_HOST, VIDEO_PORT, CONTROL_PORT, FILE_PORT, get_local_ip
+from common import (DEFAULT_HOST, VIDEO_PORT, CONTROL_PORT, FILE_PORT, MUX_PORT, MUX_VIDEO, MUX_CONTROL, MUX_FILE,
+                    get_local_ip)
 
 def make_dot_pix(color: QColor, d: int = 10) -> QPixmap:
     pm = QPixmap(d, d); pm.fill(Qt.transparent)
@@ -32,6 +34,7 @@ class ServerWindow(QMainWindow):
         self.video = VideoServer(DEFAULT_HOST, VIDEO_PORT)
         self.ctrl  = ControlServer(DEFAULT_HOST, CONTROL_PORT)  # UI표시는 안 하지만 입력 처리를 위해 구동
         self.files = FileServer(DEFAULT_HOST, FILE_PORT)
+        self.mux   = MuxServer(DEFAULT_HOST, MUX_PORT, {MUX_VIDEO: self.video, MUX_CONTROL: self.ctrl, MUX_FILE: self.files})
 
         # ===== UI =====
         title = QLabel("원격 서버 실행 중", alignment=Qt.AlignCenter)
@@ -93,6 +96,8 @@ class ServerWindow(QMainWindow):
         except Exception: pass
         try: self.ctrl.force_disconnect_all()
         except Exception: pass
+        try: self.mux.force_disconnect_all()
+        except Exception: pass
 
 
     # ---- 신호 핸들러 ----
@@ -125,9 +130,11 @@ class ServerWindow(QMainWindow):
     # ---- 생명주기 ----
     def showEvent(self, e):
         super().showEvent(e)
-        self.video.start(); self.ctrl.start(); self.files.start()
+        self.video.start(); self.ctrl.start(); self.files.start(); self.mux.start()
 
     def closeEvent(self, e):
+        try: self.mux.stop();   self.mux.wait(1500)
+        except Exception: pass
         try: self.video.stop(); self.video.wait(1500)
         except Exception: pass
         try: self.ctrl.stop();  self.ctrl.wait(1500)
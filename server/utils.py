@@ -1,5 +1,6 @@
 # server/utils.py
-import json, struct
+import time, json, struct, threading, weakref
+import numpy as np
 
 def recv_exact(sock, n: int) -> bytes | None:
     buf = bytearray()
@@ -14,8 +15,98 @@ def send_json(sock, obj: dict):
     raw = json.dumps(obj).encode("utf-8")
     sock.sendall(struct.pack(">I", len(raw)) + raw)
 
+# 서버 시계: 캡처/인코딩 시각은 monotonic → 보내거나 기록할 때 벽시계(µs)로 바꿈(클라이언트가 시계 차이를 보정)
+_WALL0 = time.time() - time.monotonic()
+def wall_us(mono: float) -> int:
+    return int((mono + _WALL0) * 1_000_000)
+
+def mono_from_wall(us: int) -> float:
+    return us / 1_000_000 - _WALL0
+
 def hms(sec: int) -> str:
     h = sec // 3600
     m = (sec % 3600) // 60
     s = sec % 60
     return f"{h:02d}:{m:02d}:{s:02d}"
+
+# ----- 파이프라인 단계 연결: 크기 1, 최신 값 우선 큐 -----
+class LatestSlot:
+    def __init__(self, on_put=None):
+        self._cond = threading.Condition()
+        self._item = None; self._closed = False
+        self._on_put = on_put   # 값이 들어오면 소비자 깨우기(예: select 대기 중인 스레드)
+        self.dropped = 0        # 소비되기 전에 덮어쓴 횟수
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None: self.dropped += 1
+            self._item = item
+            self._cond.notify()
+        if self._on_put: self._on_put()
+
+    def merge(self, items: dict):
+        # dict 값 전용: 같은 키만 최신 값으로 덮어쓰고, 아직 안 가져간 다른 키는 유지(모니터별 최신 프레임)
+        with self._cond:
+            if self._item is None: self._item = dict(items)
+            else:
+                self.dropped += len(self._item.keys() & items.keys())
+                self._item.update(items)
+            self._cond.notify()
+        if self._on_put: self._on_put()
+
+    def get(self, timeout: float | None = None):
+        # 값이 올 때까지 대기. 닫혔거나 timeout이면 None
+        with self._cond:
+            if self._item is None and not self._closed:
+                self._cond.wait(timeout)
+            item, self._item = self._item, None
+            return item
+
+    def take_nowait(self):
+        with self._cond:
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+# ----- 프레임 버퍼 재사용: 캡처마다 화면 크기 배열을 새로 잡지 않음 -----
+class _Lease:
+    # 풀 버퍼 하나를 빌려준 표시. take가 돌려준 배열과 그 뷰(슬라이스/reshape)는 모두 이 객체를 base로 붙잡음
+    __slots__ = ("buf", "__array_interface__", "__weakref__")
+    def __init__(self, buf: np.ndarray):
+        self.buf = buf; self.__array_interface__ = buf.__array_interface__
+
+class FramePool:
+    # 한 스레드(캡처 단계)에서만 take. 빌려준 버퍼는 그 배열과 뷰가 모두 없어져야(인코딩 기준 프레임 등) 반납됨
+    # 반납은 빌려줄 때마다 만든 _Lease의 finalize로 → 늦게 거둬지면 늦게 반납될 뿐, 쓰는 중인 버퍼를 덮어쓰지 않음
+    def __init__(self, limit: int = 8):
+        self._lock = threading.Lock()    # 반납(finalize)은 마지막 참조를 놓은 스레드에서 불림
+        self._free: list[np.ndarray] = []; self._shape = None
+        self._gen = 0                    # 해상도가 바뀔 때마다 +1 → 예전 크기 버퍼는 반납돼도 버림
+        self._pooled = 0                 # 이번 세대에서 풀이 관리하는 버퍼 수(limit까지)
+        self._limit = limit
+        self.allocs = 0   # 새로 잡은 버퍼 수. 정상이라면 처음 몇 번 이후로는 늘지 않음(회귀 감지용)
+        self.reused = 0
+
+    def take(self, shape: tuple) -> np.ndarray:
+        with self._lock:
+            if shape != self._shape:   # 해상도 변경 → 새로
+                self._free.clear(); self._shape = shape; self._gen += 1; self._pooled = 0
+            b = self._free.pop() if self._free else None
+            if b is not None: self.reused += 1
+            elif self._pooled < self._limit: self._pooled += 1; pooled = True
+            else: pooled = False   # 상한 → 이 버퍼는 풀에 돌아오지 않음
+            gen = self._gen
+        if b is None:
+            b = np.empty(shape, dtype=np.uint8); self.allocs += 1
+            if not pooled: return b
+        lease = _Lease(b)
+        weakref.finalize(lease, self._give_back, b, gen).atexit = False
+        return np.asarray(lease)
+
+    def _give_back(self, b: np.ndarray, gen: int):
+        with self._lock:
+            if gen == self._gen: self._free.append(b)
@@ -0,0 +1,22 @@
+# tests/conftest.py
+# 서버 모듈은 실행할 때처럼 server/를 경로에 두고 평소 이름(net, udp, utils ...)으로 불러옴
+# 클라이언트 모듈은 이름이 겹치므로(udp, utils ...) 시험 파일에서 load_client로 client/에서 따로 불러옴
+import sys, pathlib, importlib
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+CLIENT = ROOT / "client"
+for p in (ROOT / "server", ROOT):
+    if str(p) not in sys.path: sys.path.insert(0, str(p))
+
+def load_client(name: str):
+    # 불러오는 동안만 client/를 앞에 두고 겹치는 이름을 비워서 클라이언트 모듈끼리의 import(utils, codec ...)도
+    # client/ 파일로. 끝나면 서버 모듈을 그대로 되돌림
+    names = {p.stem for p in CLIENT.glob("*.py")}
+    saved = {n: sys.modules.pop(n) for n in names if n in sys.modules}
+    sys.path.insert(0, str(CLIENT))
+    try:
+        return importlib.import_module(name)
+    finally:
+        sys.path.remove(str(CLIENT))
+        for n in names: sys.modules.pop(n, None)
+        sys.modules.update(saved)
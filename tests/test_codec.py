@@ -0,0 +1,117 @@
+# tests/test_codec.py
+import numpy as np, cv2
+
+from codec import dirty_tile_mask, encode_tiles, encode_palette, encode_region, encode_full, RegionCache
+from conftest import load_client
+from common import TILE_SIZE, TILE_JPEG, TILE_PALETTE, PKT_FRAME, PKT_REGIONS, REGION_HDR, JPEG_QUALITY
+
+client_codec = load_client("codec")
+
+def photo(h: int, w: int, seed: int) -> np.ndarray:
+    # 사진 비슷한 내용: 부드러운 그라데이션 + 약한 잡음(색이 많아서 JPEG로 감)
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:h, 0:w]
+    img = np.stack([(x * 255 // max(w - 1, 1)), (y * 255 // max(h - 1, 1)), ((x + y) * 127 // max(w + h, 1))], axis=2)
+    return np.clip(img + rng.integers(-6, 7, (h, w, 3)), 0, 255).astype(np.uint8)
+
+def psnr(a: np.ndarray, b: np.ndarray) -> float:
+    mse = ((a.astype(np.float64) - b) ** 2).mean()
+    return float("inf") if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+def tiles_of(mask: np.ndarray) -> set[tuple[int, int]]:
+    return {(int(r), int(c)) for r, c in zip(*np.nonzero(mask))}
+
+# ===== 타일 델타: 서버 dirty_tile_mask/encode_tiles → 클라이언트 apply_tiles =====
+def test_delta_round_trip():
+    ts = TILE_SIZE; h, w = ts * 3 + 20, ts * 4 + 37   # 가장자리 타일이 잘리는 크기
+    prev = photo(h, w, 1); cur = prev.copy()
+    cur[10:40, 10:50] = photo(30, 40, 2)                  # (0, 0) 타일: 사진 조각
+    cur[ts + 5:ts + 20, 2 * ts:2 * ts + 60] = (255, 255, 255)   # (1, 2) 타일: 단색 띠
+    cur[h - 3, w - 1] = (0, 0, 255)                       # 오른쪽 아래 잘린 타일: 픽셀 하나
+    mask = dirty_tile_mask(prev, cur)
+    assert mask.shape == (4, 5) and tiles_of(mask) == {(0, 0), (1, 2), (3, 4)}
+    payload = encode_tiles(cur, mask)
+    fb = prev.copy()
+    assert client_codec.apply_tiles(fb, payload)
+    for r in range(mask.shape[0]):
+        for c in range(mask.shape[1]):
+            a = fb[r * ts:r * ts + ts, c * ts:c * ts + ts]; b = cur[r * ts:r * ts + ts, c * ts:c * ts + ts]
+            if not mask[r, c]:
+                assert np.array_equal(a, prev[r * ts:r * ts + ts, c * ts:c * ts + ts])   # 안 바뀐 타일은 그대로
+            else:
+                assert psnr(a, b) > 30   # JPEG 허용 오차
+    assert psnr(fb, cur) > 35
+
+def test_delta_nothing_changed():
+    prev = photo(TILE_SIZE * 2, TILE_SIZE * 2, 3)
+    mask = dirty_tile_mask(prev, prev.copy())
+    assert not mask.any() and encode_tiles(prev, mask) == b""
+    fb = prev.copy()
+    assert client_codec.apply_tiles(fb, b"") and np.array_equal(fb, prev)
+
+def test_delta_rejects_out_of_frame_tile():
+    cur = photo(TILE_SIZE * 2, TILE_SIZE * 2, 4)
+    payload = encode_tiles(cur, np.ones((2, 2), dtype=bool))
+    fb = np.zeros((TILE_SIZE, TILE_SIZE * 2, 3), dtype=np.uint8)   # 해상도가 바뀐 뒤 늦게 온 델타
+    assert not client_codec.apply_tiles(fb, payload)
+
+# ===== 팔레트+zlib: 글자/단색 타일은 픽셀 그대로, 사진 타일은 JPEG =====
+def text_tile(seed: int = 0, aa: bool = True) -> np.ndarray:
+    # 흰 바탕에 글자. aa → cv2.putText(가장자리 중간색 때문에 단색 기준보다 색이 많아서 에지 기준으로 판정)
+    # 아니면 5x7 비트맵 글꼴처럼 픽셀 단위 글자(검정 + 색 한 줄)
+    t = np.full((TILE_SIZE, TILE_SIZE, 3), 255, dtype=np.uint8)
+    if aa:
+        cv2.putText(t, "Ab3", (2, 26), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2, cv2.LINE_AA)
+        cv2.putText(t, "xy", (4, 56), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 40, 10 + seed), 1, cv2.LINE_AA)
+        return t
+    glyphs = np.random.default_rng(seed).random((6, 10, 7, 5)) < 0.4   # 줄 6 x 글자 10
+    for r in range(6):
+        for c in range(10):
+            t[2 + r * 10:9 + r * 10, 2 + c * 6:7 + c * 6][glyphs[r, c]] = (0, 0, 0) if r != 3 else (200, 40, 10)
+    return t
+
+def flat_tile() -> np.ndarray:
+    t = np.full((TILE_SIZE, TILE_SIZE, 3), (240, 240, 240), dtype=np.uint8)
+    t[20:44, 8:56] = (215, 120, 0); t[20, 8:56] = (90, 60, 0)   # 버튼과 테두리
+    return t
+
+def test_palette_is_lossless():
+    for tile in (text_tile(), text_tile(aa=False), flat_tile(), np.full((TILE_SIZE, TILE_SIZE, 3), 7, dtype=np.uint8), text_tile()[:20, :37]):
+        r = encode_palette(tile)
+        assert r is not None
+        out = client_codec.decode_palette(r[0], tile.shape[1], tile.shape[0])
+        assert out is not None and np.array_equal(out, tile)
+        codec, blob = encode_region(tile, JPEG_QUALITY)
+        assert codec == TILE_PALETTE and np.array_equal(client_codec.decode_tile(codec, blob, tile.shape[1], tile.shape[0]), tile)
+    assert len(np.unique(text_tile().reshape(-1, 3), axis=0)) > 16   # 에지 기준으로 판정한 경우도 들어 있음
+
+def test_photo_tile_goes_to_jpeg():
+    tile = np.random.default_rng(5).integers(0, 256, (TILE_SIZE, TILE_SIZE, 3), dtype=np.uint8)
+    assert encode_palette(tile) is None
+    assert encode_palette(photo(TILE_SIZE, TILE_SIZE, 6)) is None   # 색이 많은 부드러운 그림
+    assert encode_region(tile, JPEG_QUALITY)[0] == TILE_JPEG
+
+def test_regions_frame_keeps_lossless_tiles_exact():
+    # UI 화면(선명한 글자 + 단색): 글자/단색 타일은 PKT_REGIONS 안에서 픽셀 그대로, 사진 칸은 JPEG 오차 안
+    ts = TILE_SIZE; img = np.empty((ts * 3, ts * 4, 3), dtype=np.uint8)
+    for r in range(3):
+        for c in range(4): img[r*ts:r*ts+ts, c*ts:c*ts+ts] = text_tile(r * 4 + c, aa=False) if (r + c) % 2 else flat_tile()
+    img[ts:2*ts, ts:2*ts] = photo(ts, ts, 7)
+    cache = RegionCache()
+    ptype, parts = encode_full(img, JPEG_QUALITY, cache=cache)
+    assert ptype == PKT_REGIONS and REGION_HDR.unpack_from(parts[0])[0] == PKT_FRAME
+    out = client_codec.decode_regions(b"".join(parts), None)
+    for r in range(3):
+        for c in range(4):
+            a = out[r*ts:r*ts+ts, c*ts:c*ts+ts]; b = img[r*ts:r*ts+ts, c*ts:c*ts+ts]
+            if (r, c) == (1, 1): assert cache.tiles[(ts, ts)] is None and psnr(a, b) > 30
+            else: assert np.array_equal(a, b)
+    assert len(cache.tiles) == 12   # 다음 프레임은 분류를 다시 하지 않음
+    again = encode_full(img, JPEG_QUALITY, cache=cache)
+    assert again[0] == PKT_REGIONS and b"".join(again[1]) == b"".join(parts)
+
+def test_photo_frame_skips_regions():
+    img = photo(TILE_SIZE * 3, TILE_SIZE * 4, 8)
+    img[:TILE_SIZE, :TILE_SIZE] = flat_tile()   # 단색 타일 하나가 있어도 대부분 사진 → JPEG만
+    cache = RegionCache()
+    assert encode_full(img, JPEG_QUALITY, cache=cache)[0] == PKT_FRAME
@@ -0,0 +1,117 @@
+# tests/test_control.py
+import json, time, socket, struct, asyncio
+import pytest
+
+from net import ControlServer, CONTROL_MSG_MAX
+from inject import RecordingBackend, open_backend
+from conftest import load_client
+from common import (CTRL_EVENT, CTRL_BIN_FLAG, CONTROL_QUEUE_MAX, CONTROL_RETRY_MAX,
+                    EV_MOVE, EV_DOWN, EV_UP, EV_WHEEL, EV_KEY_DOWN, EV_KEY_UP)
+
+client_net = load_client("net")
+
+def batch(events: list[tuple]) -> bytes:
+    body = b"".join(CTRL_EVENT.pack(*e) for e in events)
+    return struct.pack(">I", CTRL_BIN_FLAG | len(body)) + body
+
+def message(obj: dict) -> bytes:
+    raw = json.dumps(obj).encode("utf-8")
+    return struct.pack(">I", len(raw)) + raw
+
+def serve(data: bytes, close: bool = True) -> tuple[ControlServer, RecordingBackend, socket.socket]:
+    # 소켓 쌍 한쪽을 제어 연결로 처리(연결 정리까지 LoopServer와 같은 _conn_main). close → 다 보낸 뒤 EOF
+    rec = RecordingBackend()
+    cs = ControlServer("127.0.0.1", 0, backend=rec)
+    a, b = socket.socketpair(); a.setblocking(False)
+    b.sendall(data)
+    if close: b.shutdown(socket.SHUT_WR)
+    asyncio.run(asyncio.wait_for(cs._conn_main(a, "test"), 5.0))
+    return cs, rec, b
+
+def test_move_burst_coalesces():
+    moves = [(EV_MOVE, 0, i, i * 2) for i in range(50)]
+    cs, rec, b = serve(b"".join(batch([m]) for m in moves))
+    assert rec.events == [(EV_MOVE, 0, 49, 98)]
+    assert rec.calls == 1 and cs.moves_coalesced == 49
+
+def test_buttons_and_keys_keep_order():
+    evs = ([(EV_MOVE, 0, i, 0) for i in range(10)] + [(EV_DOWN, 0, 0, 0), (EV_UP, 0, 0, 0), (EV_KEY_DOWN, 0x41, 0, 0)]
+           + [(EV_MOVE, 0, 5, i) for i in range(10)] + [(EV_WHEEL, 0, -120, 0), (EV_KEY_UP, 0x41, 0, 0)])
+    cs, rec, b = serve(batch(evs[:7]) + batch(evs[7:]))
+    assert rec.events == [(EV_MOVE, 0, 9, 0), (EV_DOWN, 0, 0, 0), (EV_UP, 0, 0, 0), (EV_KEY_DOWN, 0x41, 0, 0),
+                          (EV_MOVE, 0, 5, 9), (EV_WHEEL, 0, -120, 0), (EV_KEY_UP, 0x41, 0, 0)]
+    assert rec.calls == 1   # 한 번에 읽은 묶음 → 백엔드 호출 1번
+
+def test_json_input_joins_batch_in_order():
+    data = (batch([(EV_MOVE, 0, 1, 1)]) + message({"t": "mouse_down", "btn": "right"}) + message({"t": "mouse_move", "x": 3, "y": 4})
+            + message({"t": "key", "key": "a", "down": False}) + message({"t": "key", "key": "?"}))
+    cs, rec, b = serve(data)
+    assert rec.events == [(EV_MOVE, 0, 1, 1), (EV_DOWN, 1, 0, 0), (EV_MOVE, 0, 3, 4), (EV_KEY_UP, ord("A"), 0, 0)]
+
+def test_hello_reply():
+    cs, rec, b = serve(message({"t": "hello", "v": 2}))
+    n = struct.unpack(">I", b.recv(4))[0]
+    assert json.loads(b.recv(n)) == {"t": "hello", "v": 2}
+
+@pytest.mark.parametrize("bad", [
+    struct.pack(">I", CTRL_BIN_FLAG | 5) + b"\0" * 5,               # 이벤트 크기의 배수가 아님
+    struct.pack(">I", CTRL_BIN_FLAG | (CONTROL_MSG_MAX + 1)),       # 상한 초과
+])
+def test_malformed_batch_closes_connection(bad):
+    cs, rec, b = serve(batch([(EV_KEY_DOWN, 0x41, 0, 0)]) + bad + batch([(EV_KEY_UP, 0x41, 0, 0)]), close=False)
+    assert b.recv(64) == b""   # 서버가 연결을 닫음(EOF를 보내지 않았는데 처리가 끝남)
+    assert (EV_KEY_UP, 0x41, 0, 0) not in rec.events
+
+def test_open_backend():
+    assert open_backend("record").name == "record"
+    assert open_backend("none").name == "none"
+    with pytest.raises(ValueError): open_backend("bogus")
+
+# ===== 클라이언트(ControlClient): 서버가 받지 않는 동안 대기열이 넘쳐도 버튼/키는 순서대로 모두 =====
+def read_events(c: socket.socket, until: tuple, cs: ControlServer) -> list[tuple]:
+    # 길이 + JSON/이진 묶음을 이벤트 튜플로(until이 올 때까지). hello에는 v2로 답해서 중간부터 이진 묶음
+    c.settimeout(10.0); out = []
+    def exact(n):
+        buf = b""
+        while len(buf) < n:
+            chunk = c.recv(n - len(buf)); assert chunk, "연결이 끊김"
+            buf += chunk
+        return buf
+    while until not in out:
+        n = struct.unpack(">I", exact(4))[0]
+        if n & CTRL_BIN_FLAG:
+            body = exact(n & ~CTRL_BIN_FLAG)
+            out += [CTRL_EVENT.unpack_from(body, i) for i in range(0, len(body), CTRL_EVENT.size)]
+            continue
+        m = json.loads(exact(n))
+        if m.get("t") == "hello": c.sendall(message({"t": "hello", "v": 2})); continue
+        out.append(cs._json_event(m))
+    return out
+
+def test_client_queue_keeps_buttons_and_keys_across_reconnect():
+    srv = socket.socket(); srv.bind(("127.0.0.1", 0))   # listen 전 → 연결 거부, 송신 스레드는 재시도 대기
+    cc = client_net.ControlClient("127.0.0.1", srv.getsockname()[1])
+    try:
+        sent = []
+        for i in range(CONTROL_QUEUE_MAX * 3):
+            evs = [(EV_MOVE, 0, i, j) for j in range(3)]   # 한 번에 온 이동 여러 개 → 마지막 것만
+            if i % 8 == 0: evs.append((EV_DOWN if i % 16 == 0 else EV_UP, i % 3, 0, 0))
+            if i % 20 == 0: evs += [(EV_KEY_DOWN, 0x41 + i % 26, 0, 0), (EV_KEY_UP, 0x41 + i % 26, 0, 0)]
+            cc.send_events(evs); sent += evs
+        end = (EV_KEY_UP, 0x87, 0, 0); cc.send_events([end]); sent.append(end)   # 끝 표시(앞에 같은 이벤트 없음)
+        time.sleep(0.2)
+        assert cc.dropped > 0 and cc.sock is None
+        srv.listen(); srv.settimeout(CONTROL_RETRY_MAX + 5)
+        c, _ = srv.accept()   # 재연결(대기열은 그대로)
+        got = read_events(c, end, ControlServer("127.0.0.1", 0, backend=RecordingBackend()))
+        assert [e for e in got if e[0] != EV_MOVE] == [e for e in sent if e[0] != EV_MOVE]   # 버튼/키: 빠짐없이 순서대로
+        moves = [e for e in got if e[0] == EV_MOVE]
+        assert moves and len(moves) <= CONTROL_QUEUE_MAX and moves[-1] == [e for e in sent if e[0] == EV_MOVE][-1]
+        assert all(e[3] == 2 for e in moves)                 # 합쳐진 이동은 최신 위치
+        assert [e[2] for e in moves] == sorted(e[2] for e in moves)   # 버린 것은 오래된 이동부터, 순서는 그대로
+        cc.send_events([(EV_MOVE, 0, 1, 1), (EV_KEY_DOWN, 0x86, 0, 0)])
+        assert read_events(c, (EV_KEY_DOWN, 0x86, 0, 0), ControlServer("127.0.0.1", 0)) == [(EV_MOVE, 0, 1, 1), (EV_KEY_DOWN, 0x86, 0, 0)]
+        assert cc.binary   # hello 답을 받은 뒤로 이진 묶음
+        c.close()
+    finally:
+        cc.close(); srv.close()
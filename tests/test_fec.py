@@ -0,0 +1,79 @@
+# tests/test_fec.py
+import random, socket, time
+import numpy as np
+import pytest
+
+import fec
+from udp import fec_datagrams
+from conftest import load_client
+from common import UDP_HDR, UDP_SHARD, UDP_FEC_GROUP, UDP_FEC_PARITY
+
+client_udp = load_client("udp")
+
+# ===== 리드-솔로몬: 데이터 k개 + 패리티 m개 중 아무 k개만 있으면 복구 =====
+@pytest.mark.parametrize("k, m", [(1, 1), (5, 3), (24, 6), (100, 20)])
+def test_recover_any_k_of_n(k, m):
+    rng = np.random.default_rng(k * 31 + m)
+    data = rng.integers(0, 256, (k, 64), dtype=np.uint8)
+    shards = list(data) + list(fec.encode(data, m))
+    for _ in range(20):
+        lost = rng.choice(k + m, int(rng.integers(0, m + 1)), replace=False)
+        got = fec.recover([None if i in lost else s for i, s in enumerate(shards)], k, m)
+        assert got is not None
+        assert all(np.array_equal(a, b) for a, b in zip(got, data))
+
+def test_recover_too_many_lost():
+    data = np.random.default_rng(1).integers(0, 256, (6, 32), dtype=np.uint8)
+    shards = list(data) + list(fec.encode(data, 2))
+    shards[0] = shards[3] = shards[7] = None
+    assert fec.recover(shards, 6, 2) is None
+
+# ===== 조립: 서버가 자른 데이터그램을 빠뜨리고 섞어서 클라이언트 수신기로 =====
+def group_of(d: bytes) -> int:
+    _, _, idx, n, group, parity = UDP_HDR.unpack_from(d)
+    return idx // group if idx < n else (idx - n) // parity
+
+def deliver(rx, datagrams: list[bytes]) -> list[tuple[int, bytes]]:
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    addr = ("127.0.0.1", rx.sock.getsockname()[1])
+    try:
+        for d in datagrams: tx.sendto(d, addr)
+    finally:
+        tx.close()
+    out = []; deadline = time.monotonic() + 2.0
+    while time.monotonic() < deadline:
+        out += rx.read()
+        if out: break
+        time.sleep(0.01)
+    return out
+
+def drop(datagrams: list[bytes], per_group: int, rng: random.Random) -> list[bytes]:
+    groups: dict[int, list[bytes]] = {}
+    for d in datagrams: groups.setdefault(group_of(d), []).append(d)
+    gone = {id(d) for g in groups.values() for d in rng.sample(g, min(per_group, len(g) - 1))}
+    return [d for d in datagrams if id(d) not in gone]
+
+def test_reassemble_with_loss_and_reorder():
+    rng = random.Random(7)
+    frame = rng.randbytes(UDP_SHARD * UDP_FEC_GROUP * 2 + 500)   # 묶음 3개(마지막은 짧음)
+    kept = drop(fec_datagrams(1, [frame]), UDP_FEC_PARITY // 2 + 1, rng); rng.shuffle(kept)
+    rx = client_udp.UdpReceiver(loss=0.0)
+    try:
+        assert deliver(rx, kept) == [(1, frame)]
+        assert rx.recovered == 1 and rx.lost == 0
+    finally:
+        rx.close()
+
+def test_unrecoverable_frame_is_skipped():
+    rng = random.Random(9)
+    f1, f2 = rng.randbytes(UDP_SHARD * 10), rng.randbytes(UDP_SHARD * 10)
+    d1 = fec_datagrams(1, [f1])
+    _, _, _, n, group, parity = UDP_HDR.unpack_from(d1[0])
+    broken = d1[fec.parity_count(n, group, parity) + 1:]   # 묶음 하나에서 패리티보다 많이 빠짐
+    rx = client_udp.UdpReceiver(loss=0.0)
+    try:
+        got = deliver(rx, broken + fec_datagrams(2, [f2]))
+        assert got == [(2, f2)]
+        assert rx.lost == 1 and rx.last == 2
+    finally:
+        rx.close()
@@ -0,0 +1,172 @@
+# tests/test_mux.py
+import time, socket, asyncio, threading
+import pytest
+
+from mux import MuxLink, stream_pair
+from conftest import load_client
+from common import (MUX_MAGIC, MUX_HDR, MUX_OPEN, MUX_DATA, MUX_CLOSE, MUX_CREDIT, MUX_CREDIT_LEN, MUX_CHUNK, MUX_WINDOW,
+                    MUX_PRIORITY, MUX_VIDEO, MUX_CONTROL, MUX_FILE)
+
+client_mux = load_client("mux")
+PAYLOAD = bytes(range(256)) * ((MUX_WINDOW + 3 * MUX_CHUNK) // 256)   # 창보다 조금 큼
+
+def recv_all(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk: raise EOFError
+        buf += chunk
+    return bytes(buf)
+
+def read_frame(sock: socket.socket, timeout: float = 5.0) -> tuple[int, int, bytes] | None:
+    # (스트림 번호, 종류, payload). timeout 동안 프레임이 안 오면 None
+    sock.settimeout(timeout)
+    try: hdr = recv_all(sock, MUX_HDR.size)
+    except socket.timeout: return None
+    sock.settimeout(5.0)
+    sid, op, n = MUX_HDR.unpack(hdr)
+    return sid, op, recv_all(sock, n)
+
+def read_data(sock: socket.socket, sid: int, n: int, seen: list | None = None) -> bytes:
+    # sid의 DATA를 n바이트까지. 그 사이 다른 프레임은 seen에
+    buf = bytearray()
+    while len(buf) < n:
+        f = read_frame(sock)
+        assert f is not None, f"{len(buf)}/{n}바이트에서 멈춤"
+        if f[0] == sid and f[1] == MUX_DATA: buf += f[2]
+        elif seen is not None: seen.append(f)
+    return bytes(buf)
+
+def drain(sock: socket.socket) -> bytes:
+    # EOF까지 모두
+    sock.setblocking(True); sock.settimeout(5.0); buf = bytearray()
+    while chunk := sock.recv(1 << 16): buf += chunk
+    return bytes(buf)
+
+def credit(sid: int, n: int) -> bytes:
+    return MUX_HDR.pack(sid, MUX_CREDIT, MUX_CREDIT_LEN.size) + MUX_CREDIT_LEN.pack(n)
+
+# ===== 서버 쪽(MuxLink): 루프 하나 + 회선 대신 소켓 쌍 =====
+def run_link(body):
+    async def main():
+        loop = asyncio.get_running_loop()
+        a, b = socket.socketpair(); a.setblocking(False)
+        link = MuxLink(a, loop)
+        try: await body(loop, link, b)
+        finally:
+            link.close(); a.close(); b.close()
+    asyncio.run(asyncio.wait_for(main(), 20.0))
+
+def test_link_stalls_at_window_and_resumes_on_credit():
+    async def body(loop, link, peer):
+        ch, app = stream_pair(); link.add(5, ch, MUX_PRIORITY[MUX_FILE])
+        tx = loop.create_task(link.send_loop())
+        wr = loop.create_task(loop.sock_sendall(app, PAYLOAD))   # 채널 서버가 계속 씀
+        got = await loop.run_in_executor(None, read_data, peer, 5, MUX_WINDOW)
+        assert len(got) == MUX_WINDOW
+        assert await loop.run_in_executor(None, read_frame, peer, 0.3) is None   # 창이 0 → 이 스트림은 멈춤
+        link.credit(5, MUX_WINDOW)
+        got += await loop.run_in_executor(None, read_data, peer, 5, len(PAYLOAD) - MUX_WINDOW)
+        assert got == PAYLOAD
+        await wr; tx.cancel(); app.close()
+    run_link(body)
+
+def test_link_sends_control_frames_and_priority_first():
+    async def body(loop, link, peer):
+        v, v_app = stream_pair(); c, c_app = stream_pair()
+        link.add(1, v, MUX_PRIORITY[MUX_VIDEO]); link.add(2, c, MUX_PRIORITY[MUX_CONTROL])
+        v_app.send(b"v" * MUX_CHUNK * 4); c_app.send(b"c" * 100)
+        await asyncio.sleep(0.05)   # 두 스트림 모두 읽을 데이터가 있는 상태에서 송신 시작
+        link.send_close(9)
+        tx = loop.create_task(link.send_loop())
+        first = [await loop.run_in_executor(None, read_frame, peer) for _ in range(3)]
+        assert first[0] == (9, MUX_CLOSE, b"")                   # CLOSE/CREDIT은 스트림 데이터보다 먼저
+        assert first[1] == (2, MUX_DATA, b"c" * 100)             # 제어 채널이 영상보다 먼저
+        assert first[2][:2] == (1, MUX_DATA)
+        rest = await loop.run_in_executor(None, read_data, peer, 1, MUX_CHUNK * 3)
+        assert first[2][2] + rest == b"v" * MUX_CHUNK * 4
+        # 채널 서버가 닫음 → 남은 DATA 다음에 CLOSE
+        v_app.send(b"w" * 1000); v_app.close()
+        assert await loop.run_in_executor(None, read_data, peer, 1, 1000) == b"w" * 1000
+        assert await loop.run_in_executor(None, read_frame, peer) == (1, MUX_CLOSE, b"")
+        tx.cancel(); c_app.close()
+    run_link(body)
+
+def test_link_returns_credit_and_rejects_overrun():
+    async def body(loop, link, peer):
+        ch, app = stream_pair(); link.add(3, ch, MUX_PRIORITY[MUX_VIDEO])
+        tx = loop.create_task(link.send_loop())
+        # 채널 서버가 안 읽음: 소켓 쌍 버퍼에 넘긴 만큼만 CREDIT으로 돌아오고, 창을 넘게 보내면 형식 오류
+        sent = 0
+        with pytest.raises(ValueError):
+            for _ in range(10 * MUX_WINDOW // MUX_CHUNK):
+                link.deliver(3, b"x" * MUX_CHUNK); sent += MUX_CHUNK
+        await asyncio.sleep(0.05)
+        credits = []
+        while (f := await loop.run_in_executor(None, read_frame, peer, 0.2)) is not None:
+            assert f[:2] == (3, MUX_CREDIT); credits.append(MUX_CREDIT_LEN.unpack(f[2])[0])
+        assert credits and min(credits) >= MUX_WINDOW // 4
+        assert MUX_WINDOW - MUX_CHUNK < sent - sum(credits) <= MUX_WINDOW
+        # 상대의 CLOSE: 받아 둔 데이터를 다 넘긴 뒤에 EOF
+        link.remote_close(3)
+        assert await loop.run_in_executor(None, drain, app) == b"x" * sent
+        tx.cancel(); app.close()
+    run_link(body)
+
+# ===== 클라이언트 쪽(MuxConnection): 서버 대신 시험이 프레임을 직접 읽고 씀 =====
+@pytest.fixture
+def mux_pair():
+    srv = socket.create_server(("127.0.0.1", 0))
+    mc = client_mux.MuxConnection("127.0.0.1", srv.getsockname()[1])
+    assert mc.probe()
+    srv.settimeout(5.0); conn, _ = srv.accept()
+    assert recv_all(conn, len(MUX_MAGIC)) == MUX_MAGIC
+    yield mc, conn
+    mc.close(); conn.close(); srv.close()
+
+def test_client_open_data_close_order_and_window(mux_pair):
+    mc, conn = mux_pair
+    app = mc.open(MUX_FILE)
+    sid, op, body = read_frame(conn)
+    assert (op, body) == (MUX_OPEN, bytes([MUX_FILE]))   # OPEN이 그 스트림의 어떤 DATA보다 먼저
+    def upload():
+        app.sendall(PAYLOAD); app.close()
+    t = threading.Thread(target=upload, daemon=True); t.start()
+    got = read_data(conn, sid, MUX_WINDOW)
+    assert len(got) == MUX_WINDOW
+    assert read_frame(conn, 0.3) is None   # 창이 0 → CREDIT까지 멈춤
+    conn.sendall(credit(sid, MUX_WINDOW))
+    got += read_data(conn, sid, len(PAYLOAD) - MUX_WINDOW)
+    assert got == PAYLOAD
+    assert read_frame(conn) == (sid, MUX_CLOSE, b"")     # 앱이 닫음 → 마지막 DATA 다음에 CLOSE
+    t.join(5.0)
+
+def test_client_control_overtakes_bulk_stream(mux_pair):
+    mc, conn = mux_pair
+    bulk = mc.open(MUX_FILE); ctl = mc.open(MUX_CONTROL)
+    assert {read_frame(conn)[2][0] for _ in range(2)} == {MUX_FILE, MUX_CONTROL}
+    # 회선 쓰기를 잠시 막아서 두 스트림 모두 밀려 있게 한 뒤 풀어 줌
+    with mc._send_lock:
+        t = threading.Thread(target=bulk.sendall, args=(b"f" * MUX_CHUNK * 24,), daemon=True); t.start()
+        time.sleep(0.1); ctl.sendall(b"c" * 10); time.sleep(0.1)
+    frames = [read_frame(conn) for _ in range(2)]
+    assert frames[0][2] == b"f" * MUX_CHUNK   # 막히기 전에 이미 읽어 둔 조각
+    assert frames[1][2] == b"c" * 10          # 밀린 파일 데이터보다 제어 메시지가 먼저
+    t.join(5.0); bulk.close(); ctl.close()
+
+def test_client_returns_credit_and_delivers_before_eof(mux_pair):
+    mc, conn = mux_pair
+    app = mc.open(MUX_VIDEO)
+    sid = read_frame(conn)[0]
+    data = bytes(range(256)) * (MUX_WINDOW // 2 // 256)
+    for i in range(0, len(data), MUX_CHUNK):
+        part = data[i:i + MUX_CHUNK]; conn.sendall(MUX_HDR.pack(sid, MUX_DATA, len(part)) + part)
+    conn.sendall(MUX_HDR.pack(sid, MUX_CLOSE, 0))
+    assert drain(app) == data   # CLOSE → 남은 데이터를 다 받은 뒤 EOF
+    returned = 0
+    while returned < len(data) - MUX_WINDOW // 4:
+        f = read_frame(conn)
+        assert f is not None and f[:2] == (sid, MUX_CREDIT)
+        returned += MUX_CREDIT_LEN.unpack(f[2])[0]
+    assert returned <= len(data)
+    app.close()
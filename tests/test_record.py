@@ -0,0 +1,102 @@
+# tests/test_record.py
+import os, time
+
+from record import SessionRecorder
+from conftest import load_client
+from common import VIDEO_HDR, PKT_FRAME, PKT_TILES, REC_KEY
+
+playback = load_client("playback")
+
+def packet(ptype: int, tag: int, size: int = 32) -> tuple:
+    # 녹화기는 패킷 내용을 보지 않음: VIDEO_HDR + 알아볼 수 있는 payload
+    body = bytes([tag]) * size
+    return VIDEO_HDR.pack(ptype, len(body), 64, 64), body
+
+def record_session(rec: SessionRecorder, t0: float, tags: list[tuple[int, bool]]) -> str:
+    # tags: (payload 표시, 키 프레임 여부). 0.1초 간격으로 쓰고 닫음(세션 끝)
+    for i, (tag, key) in enumerate(tags):
+        rec.write(packet(PKT_FRAME if key else PKT_TILES, tag), t0 + i * 0.1, key)
+    path = rec.path; rec.close()
+    return path
+
+def payloads(rec) -> list[tuple[int, bool]]:
+    return [(pkt[VIDEO_HDR.size], bool(flags & REC_KEY)) for _, _, flags, pkt in rec.records(rec.key_before(0))]
+
+# ===== 같은 초 안의 두 세션(재접속): 앞 녹화를 덮어쓰지 않음 =====
+def test_back_to_back_sessions_keep_both_files(tmp_path):
+    rec = SessionRecorder(str(tmp_path)); t0 = time.monotonic()
+    first = [(1, True), (2, False), (3, False)]; second = [(7, True), (8, False)]
+    a = record_session(rec, t0, first); rec.reset()
+    b = record_session(rec, t0 + 1, second)
+    assert a != b and os.path.exists(a) and os.path.exists(b)
+    for path, tags in ((a, first), (b, second)):
+        r = playback.Recording(path)
+        try: assert payloads(r) == tags and len(r.keys) == 1
+        finally: r.close()
+
+def test_reopen_after_disk_error_keeps_earlier_file(tmp_path):
+    rec = SessionRecorder(str(tmp_path)); t0 = time.monotonic()
+    rec.write(packet(PKT_FRAME, 1), t0, True); a = rec.path
+    rec._f.close(); rec._f = open(os.devnull, "rb")   # 읽기 전용 → 다음 쓰기가 OSError(디스크 오류 흉내)
+    rec.write(packet(PKT_TILES, 2), t0 + 0.1, False)
+    assert rec.path is None   # 닫고 다음 키 프레임을 기다림
+    rec.write(packet(PKT_TILES, 3), t0 + 0.2, False)   # 키 프레임 전 델타는 버림
+    b = record_session(rec, t0 + 0.3, [(4, True)])
+    assert a != b
+    for path, tags in ((a, [(1, True)]), (b, [(4, True)])):
+        r = playback.Recording(path)
+        try: assert payloads(r) == tags
+        finally: r.close()
+
+# ===== 색인과 탐색: .idx는 키 프레임 기록만 가리키고, 잘린 파일도 열림 =====
+def keyed_recording(tmp_path, n: int = 10, keyint: int = 3) -> tuple[str, float, list[tuple[int, bool]]]:
+    rec = SessionRecorder(str(tmp_path)); t0 = time.monotonic()
+    tags = [(i + 1, i % keyint == 0) for i in range(n)]
+    return record_session(rec, t0, tags), t0, tags
+
+def test_index_points_at_key_records(tmp_path):
+    path, t0, tags = keyed_recording(tmp_path)
+    r = playback.Recording(path)
+    try:
+        assert len(r.keys) == sum(k for _, k in tags)
+        for ts, off in r.keys:
+            at, kts, flags, pkt = next(r.records(int(off)))
+            assert at == off and kts == ts and flags & REC_KEY and VIDEO_HDR.unpack_from(pkt)[0] == PKT_FRAME
+        assert payloads(r) == tags
+        assert r.duration > 0.85
+    finally: r.close()
+
+def test_key_before_finds_last_key(tmp_path):
+    path, t0, tags = keyed_recording(tmp_path)
+    r = playback.Recording(path)
+    try:
+        recs = list(r.records(r.key_before(0)))
+        for i, (off, ts, _, _) in enumerate(recs):
+            want = max(j for j in range(i + 1) if tags[j][1])   # i번째 기록 이전(포함) 마지막 키 프레임
+            assert r.key_before(ts) == recs[want][0]
+            assert r.key_before(ts + 1) == recs[want][0]
+        assert r.key_before(recs[0][1] - 1) == recs[0][0]     # 시작 전 → 첫 기록
+        assert r.key_before(recs[-1][1] + 10**9) == recs[9][0]
+    finally: r.close()
+
+def test_truncated_file_opens(tmp_path):
+    path, t0, tags = keyed_recording(tmp_path)
+    full = playback.Recording(path)
+    recs = [(off, ts) for off, ts, _, _ in full.records(full.key_before(0))]
+    full.close()
+    # 마지막 키 프레임(9번째 기록) 본문 중간에서 끊김 → 그 키 프레임은 색인에서도 빠짐
+    with open(path, "r+b") as f: f.truncate(recs[9][0] + 20)
+    r = playback.Recording(path)
+    try:
+        assert payloads(r) == tags[:9]
+        assert len(r.keys) == 3 and r.key_before(recs[9][1]) == recs[6][0]
+        assert r.end_us == recs[8][1]
+    finally: r.close()
+    # 기록 헤더 중간에서 끊김 / 색인 파일이 없음 → 본문을 훑어서 색인
+    with open(path, "r+b") as f: f.truncate(recs[5][0] + 5)
+    os.remove(path + ".idx")
+    r = playback.Recording(path)
+    try:
+        assert payloads(r) == tags[:5]
+        assert [int(o) for o in r.keys["off"]] == [recs[0][0], recs[3][0]]
+    finally: r.close()
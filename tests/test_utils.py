@@ -0,0 +1,48 @@
+# tests/test_utils.py
+import gc, threading
+import numpy as np
+
+from utils import FramePool
+
+SHAPE = (90, 160, 3)
+
+# ===== FramePool: 정상 흐름에서는 처음 몇 개 이후로 새로 잡지 않음(allocs가 capture_stats의 회귀 지표) =====
+def test_pool_steady_state_allocations():
+    pool = FramePool(); basis = None; slot = None
+    for i in range(500):
+        # 캡처: 새 버퍼에 채움 → 인코딩: 앞 프레임(기준)과 비교한 뒤 이번 프레임이 기준, 뷰(타일/축소)도 잠깐 붙잡음
+        frame = pool.take(SHAPE); frame[:] = i % 256
+        slot, cur = frame, slot   # 캡처 → 인코딩 단계 사이 크기 1 슬롯
+        if cur is None: continue
+        tile = cur[:32, :32]; flat = cur.reshape(-1, 3)
+        assert basis is None or basis[0, 0, 0] == (i - 2) % 256   # 쓰는 중인 기준 프레임은 덮어쓰지 않음
+        basis = cur; del cur, tile, flat
+    assert pool.allocs == 3 and pool.reused == 500 - 3   # 기준 + 슬롯 + 캡처 중인 버퍼
+
+def test_pool_returns_buffer_after_last_view():
+    pool = FramePool()
+    a = pool.take(SHAPE); view = a[10:20]
+    del a
+    b = pool.take(SHAPE)
+    assert pool.allocs == 2 and not np.shares_memory(b, view)   # 뷰가 남아 있으면 반납되지 않음
+    del view, b
+    for _ in range(50): pool.take(SHAPE)
+    assert pool.allocs == 2
+
+def test_pool_resolution_change_and_limit():
+    pool = FramePool(limit=2)
+    held = [pool.take(SHAPE) for _ in range(3)]   # 상한을 넘은 버퍼는 풀 밖(반납돼도 버림)
+    assert pool.allocs == 3
+    del held
+    for _ in range(20): pool.take(SHAPE)
+    assert pool.allocs == 3
+    old = pool.take(SHAPE); pool.take((45, 80, 3))   # 해상도 변경 → 예전 크기 버퍼는 돌아와도 쓰지 않음
+    del old
+    assert pool.take((45, 80, 3)).shape == (45, 80, 3) and pool.allocs == 4
+
+def test_pool_release_from_other_thread():
+    # 마지막 참조를 인코딩/송신 스레드가 놓아도 반납
+    pool = FramePool(); frames = [pool.take(SHAPE) for _ in range(4)]
+    t = threading.Thread(target=frames.clear); t.start(); t.join(); gc.collect()
+    for _ in range(20): pool.take(SHAPE)
+    assert pool.allocs == 4